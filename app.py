@@ -16,13 +16,16 @@ Versión: 2.0 - Refactorizada
 
 import streamlit as st
 
-from src.core.image_processor import ImageProcessor
+# Sólo módulos livianos al inicio: OpenCV, scikit-image, pandas y los
+# componentes de recorte/canvas se importan cuando se carga una imagen.
 from src.ui.components import (
     configurar_sidebar, 
     cargar_imagen, 
-    mostrar_metricas_resumen
+    mostrar_metricas_resumen,
+    mostrar_estadisticas_cache,
+    mostrar_memoria_sesion,
 )
-from src.ui.tabs import tab_fracturas, tab_fragmentacion
+from src.ui.jobs import refrescar_si_hay_trabajos
 from src.utils.constants import PAGE_CONFIG, APP_TITLE, MESSAGES
 
 
@@ -44,27 +47,55 @@ def main() -> None:
     image_source = cargar_imagen()
     
     if image_source is not None:
+        from src.core.image_processor import ImageProcessor
+        from src.ui.tabs import (
+            tab_bandeja, tab_comparacion, tab_fracturas, tab_fragmentacion, tab_multi_roi,
+        )
+        
         # Procesar imagen
         processor = ImageProcessor()
         image_orig = processor.load_and_display_image(image_source)
         image = processor.crop_image_roi(image_orig)
+        image_hash = processor.get_image_hash()
         
         # Pestañas de análisis
-        fract_tab, frag_tab = st.tabs(["Fracturas", "Fragmentación"])
+        fract_tab, frag_tab, tray_tab, rois_tab, cambios_tab = st.tabs(
+            ["Fracturas", "Fragmentación", "Bandeja", "Varias ROIs", "Comparación"]
+        )
         
         with fract_tab:
             # Análisis de fracturas y métricas geotécnicas
-            resultados = tab_fracturas(image, min_crack_length_px)
+            resultados = tab_fracturas(image, min_crack_length_px, image_hash)
             
-            # Mostrar resumen de resultados
-            mostrar_metricas_resumen(**resultados)
+            # Mostrar resumen de resultados (cuando la detección terminó)
+            if resultados:
+                mostrar_metricas_resumen(**resultados)
         
         with frag_tab:
             # Análisis de fragmentación
-            tab_fragmentacion(image)
+            tab_fragmentacion(image, image_hash)
+        
+        with tray_tab:
+            # Bandeja de testigos: filas analizadas en paralelo y registro por profundidad
+            tab_bandeja(image, min_crack_length_px, image_hash)
+        
+        with rois_tab:
+            # Varias ROIs sobre la imagen completa con una sola pasada de preproceso
+            tab_multi_roi(image_orig, min_crack_length_px, processor.image_hash)
+        
+        with cambios_tab:
+            # Cambios respecto de un levantamiento anterior del mismo frente
+            tab_comparacion(image_orig, min_crack_length_px, processor.image_hash)
     
     else:
         st.info(MESSAGES["no_image"])
+    
+    # Diagnóstico de caché (tras el análisis para reflejar esta ejecución)
+    mostrar_estadisticas_cache()
+    mostrar_memoria_sesion()
+    
+    # Re-ejecución periódica mientras haya análisis en segundo plano
+    refrescar_si_hay_trabajos()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,8 @@
+"""Benchmarks de rendimiento con imágenes sintéticas de verdad conocida.
+
+Uso::
+
+    python -m benchmarks.run                      # 1 y 5 MP, compara con baseline.json
+    python -m benchmarks.run --sizes 1 5 20 100 --output resultados.json
+    python -m benchmarks.run --update-baseline    # reescribe la línea base
+"""
@@ -0,0 +1,226 @@
+"""Ejecuta los benchmarks, guarda los tiempos en JSON y compara con la línea base.
+
+Casos (por tamaño en MP):
+
+* ``detect_cracks`` y ``particle_sizes`` sobre las imágenes sintéticas;
+* ``overlay_mask`` y ``annotate_cracks`` sobre el resultado de la detección.
+
+Cada caso registra la mediana de ``--repeat`` corridas. Además se anotan
+métricas de precisión contra la verdad sintética (error de longitud total y
+de D50) y la meta de PLAN_MEJORAS (detección < 1.0 s para < 2 MP).
+
+Un caso es regresión si su mediana supera ``baseline × (1 + tolerance)`` y
+además la diferencia es mayor que ``--min-delta`` segundos (evita falsos
+positivos en tiempos de milisegundos). El proceso termina con código 1 si
+hay regresiones.
+
+Sin ``--sizes`` se miden todos los tamaños presentes en la línea base (1, 5
+y 20 MP; 20 MP tarda unos minutos y se mide una sola vez). 100 MP es un
+objetivo opcional: ``--sizes 100 --update-baseline`` lo agrega a la línea
+base y desde entonces se compara en cada corrida por defecto.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from benchmarks import synthetic  # noqa: E402
+
+__all__ = ["run_benchmarks", "compare", "baseline_sizes", "merge_baseline", "main"]
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+DETECTION_TARGET_S = 1.0  # PLAN_MEJORAS: detección < 1.0 s para < 2 MP
+MIN_LENGTH_PX = 30
+MIN_AREA_PX = 50
+
+
+def _time(fn: Callable[[], object], repeat: int) -> Dict[str, object]:
+    runs: List[float] = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - start)
+    return {"seconds": statistics.median(runs), "runs": [round(r, 4) for r in runs], "result": result}
+
+
+def _environment() -> Dict[str, object]:
+    import cv2
+
+    from src.utils.constants import APP_VERSION
+
+    return {
+        "timestamp_utc": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "app_version": APP_VERSION,
+    }
+
+
+def run_benchmarks(
+    sizes_mp: Sequence[float] = (1, 5),
+    *,
+    repeat: int = 3,
+    seed: int = 0,
+    log: Callable[[str], None] = print,
+) -> Dict[str, object]:
+    """
+    Ejecuta todos los casos para cada tamaño.
+
+    Returns:
+        ``{"environment": {...}, "results": {"<caso>@<N>MP": {...}}}``.
+    """
+    from src import crack_detection, fragmentation, image_io
+
+    results: Dict[str, Dict[str, object]] = {}
+
+    def record(name: str, mp: float, timing: Dict[str, object], **extra: object) -> None:
+        key = f"{name}@{mp:g}MP"
+        results[key] = {
+            "megapixels": mp,
+            "seconds": round(float(timing["seconds"]), 4),
+            "runs": timing["runs"],
+            **extra,
+        }
+        log(f"{key:28s} {timing['seconds']:8.3f} s")
+
+    for mp in sizes_mp:
+        # Los tamaños grandes se miden una sola vez
+        reps = repeat if mp <= 5 else 1
+        image, truth = synthetic.fracture_image(mp, seed=seed)
+        timing = _time(lambda: crack_detection.detect_cracks(image, min_length_px=MIN_LENGTH_PX), reps)
+        _, crack_mask, crack_info = timing["result"]
+        detected = sum(c["length_geodesic_px"] for c in crack_info)
+        expected = float(truth["length_px"].sum())
+        record(
+            "detect_cracks", mp, timing,
+            cracks=len(crack_info),
+            cracks_truth=int(truth["length_px"].size),
+            length_error=round(abs(detected - expected) / expected, 4),
+            **({"meets_target": timing["seconds"] < DETECTION_TARGET_S} if mp < 2 else {}),
+        )
+        record("overlay_mask", mp, _time(lambda: image_io.overlay_mask(image, crack_mask), reps))
+        record("annotate_cracks", mp, _time(lambda: image_io.annotate_cracks(image, crack_info), reps))
+        del image, crack_mask
+
+        pile, truth = synthetic.muck_pile_image(mp, seed=seed)
+        timing = _time(
+            lambda: fragmentation.particle_sizes(pile, scale_px_per_meter=1.0, min_area_px=MIN_AREA_PX), reps
+        )
+        diameters = timing["result"][0]
+        d50, d50_truth = float(np.median(diameters)) if diameters else 0.0, float(np.median(truth["diameter_px"]))
+        record(
+            "particle_sizes", mp, timing,
+            particles=len(diameters),
+            particles_truth=int(truth["diameter_px"].size),
+            d50_error=round(abs(d50 - d50_truth) / d50_truth, 4),
+        )
+        del pile
+    return {"environment": _environment(), "results": results}
+
+
+def compare(
+    current: Dict[str, object],
+    baseline: Dict[str, object],
+    *,
+    tolerance: float = 0.5,
+    min_delta_s: float = 0.05,
+) -> List[Dict[str, object]]:
+    """
+    Casos más lentos que la línea base (sólo los presentes en ambas).
+
+    Returns:
+        Lista de ``{"case", "seconds", "baseline", "ratio"}`` por regresión.
+    """
+    regressions = []
+    for case, entry in current["results"].items():
+        ref = baseline.get("results", {}).get(case)
+        if ref is None:
+            continue
+        seconds, base = float(entry["seconds"]), float(ref["seconds"])
+        if seconds > base * (1.0 + tolerance) and seconds - base > min_delta_s:
+            regressions.append(
+                {"case": case, "seconds": seconds, "baseline": base, "ratio": round(seconds / base, 2)}
+            )
+    return regressions
+
+
+def baseline_sizes(baseline: Dict[str, object]) -> List[float]:
+    """Tamaños (MP) con al menos un caso en la línea base."""
+    return sorted({float(entry["megapixels"]) for entry in baseline.get("results", {}).values()})
+
+
+def merge_baseline(current: Dict[str, object], baseline: Dict[str, object]) -> Dict[str, object]:
+    """Línea base con los casos de ``current`` reemplazados o agregados (el resto se conserva)."""
+    results = {**baseline.get("results", {}), **current["results"]}
+    # Orden estable por tamaño (dentro de cada tamaño, el orden de los casos)
+    ordered = sorted(enumerate(results.items()), key=lambda item: (float(item[1][1]["megapixels"]), item[0]))
+    return {"environment": current["environment"], "results": dict(item for _, item in ordered)}
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=float, nargs="+", default=None,
+                        help="Tamaños en megapíxeles (por defecto, los de la línea base)")
+    parser.add_argument("--repeat", type=int, default=3, help="Corridas por caso (≤ 5 MP)")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla de los generadores")
+    parser.add_argument("--output", "-o", type=Path, default=None, help="JSON con los resultados")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="Línea base a comparar")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="Fracción de lentitud tolerada respecto de la línea base")
+    parser.add_argument("--min-delta", type=float, default=0.05,
+                        help="Diferencia mínima (s) para considerar regresión")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Escribe los resultados en la línea base (conserva los demás tamaños)")
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = _build_parser().parse_args(argv)
+    baseline = (
+        json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else None
+    )
+    sizes = args.sizes or (baseline_sizes(baseline) if baseline else None) or [1, 5]
+    current = run_benchmarks(sizes, repeat=args.repeat, seed=args.seed)
+    if args.output is not None:
+        args.output.write_text(json.dumps(current, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"Resultados en {args.output}")
+    if args.update_baseline:
+        merged = merge_baseline(current, baseline or {})
+        args.baseline.write_text(json.dumps(merged, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"Línea base actualizada: {args.baseline}")
+        return 0
+    if baseline is None:
+        print(f"Sin línea base en {args.baseline}; nada que comparar.")
+        return 0
+    regressions = compare(current, baseline, tolerance=args.tolerance, min_delta_s=args.min_delta)
+    for r in regressions:
+        print(f"REGRESIÓN {r['case']}: {r['seconds']:.3f} s vs {r['baseline']:.3f} s (×{r['ratio']})")
+    unmeasured = sorted(set(baseline.get("results", {})) - set(current["results"]))
+    if unmeasured:
+        print(f"Sin medir en esta corrida (presentes en la línea base): {', '.join(unmeasured)}")
+    if not regressions:
+        print("Sin regresiones respecto de la línea base.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
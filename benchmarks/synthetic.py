@@ -0,0 +1,121 @@
+"""Generadores de imágenes sintéticas con verdad conocida.
+
+* :func:`fracture_image`: frente con grietas rectas y curvas (Bézier
+  cuadráticas) de longitud y orientación conocidas sobre una textura suave.
+* :func:`muck_pile_image`: pila de fragmentos (polígonos convexos oscuros sin
+  solapes) con distribución de tamaños log-normal conocida.
+
+Los tamaños se piden en megapíxeles (relación 4:3) y la escena se escala con
+la imagen: la densidad de grietas y de fragmentos por MP es constante.
+"""
+from __future__ import annotations
+
+from typing import Dict, Tuple
+
+import cv2
+import numpy as np
+
+__all__ = ["image_shape", "fracture_image", "muck_pile_image"]
+
+
+def image_shape(megapixels: float) -> Tuple[int, int]:
+    """Alto y ancho (4:3) para ``megapixels`` millones de píxeles."""
+    width = int(round(np.sqrt(megapixels * 1e6 * 4 / 3)))
+    return int(round(width * 3 / 4)), width
+
+
+def _background(shape: Tuple[int, int], rng: np.random.Generator, level: int, amplitude: float) -> np.ndarray:
+    """Textura suave: ruido de baja resolución ampliado (barato incluso a 100 MP)."""
+    h, w = shape
+    coarse = rng.normal(0.0, 1.0, (max(2, h // 32), max(2, w // 32))).astype(np.float32)
+    smooth = cv2.resize(coarse, (w, h), interpolation=cv2.INTER_CUBIC)
+    gray = np.clip(level + amplitude * smooth, 0, 255).astype(np.uint8)
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2RGB)
+
+
+def fracture_image(
+    megapixels: float,
+    *,
+    cracks_per_mp: int = 40,
+    curved_fraction: float = 0.5,
+    seed: int = 0,
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Frente sintético con grietas oscuras de 1 px.
+
+    Returns:
+        (imagen RGB, verdad) con ``length_px`` y ``orientation_deg`` (cuerda,
+        eje Y hacia abajo, [0, 180)) por grieta.
+    """
+    rng = np.random.default_rng(seed)
+    h, w = image_shape(megapixels)
+    image = _background((h, w), rng, level=170, amplitude=6.0)
+    n = max(1, int(round(cracks_per_mp * megapixels)))
+    side = min(h, w)
+    lengths = rng.uniform(0.04, 0.15, n) * side
+    angles = rng.uniform(0.0, np.pi, n)
+    starts = rng.uniform((0.05 * w, 0.05 * h), (0.95 * w, 0.95 * h), (n, 2))
+    ends = starts + lengths[:, None] * np.column_stack([np.cos(angles), np.sin(angles)])
+    ends = np.clip(ends, 1, (w - 2, h - 2))
+    bend = rng.uniform(-0.25, 0.25, n) * lengths
+    curved = rng.random(n) < curved_fraction
+
+    t = np.linspace(0.0, 1.0, 64)[:, None]
+    truth_len = np.empty(n)
+    polylines = []
+    for i in range(n):
+        p0, p2 = starts[i], ends[i]
+        if curved[i]:
+            chord = p2 - p0
+            normal = np.array([-chord[1], chord[0]]) / max(np.hypot(*chord), 1e-9)
+            p1 = (p0 + p2) / 2 + bend[i] * normal
+            pts = (1 - t) ** 2 * p0 + 2 * (1 - t) * t * p1 + t**2 * p2
+        else:
+            pts = np.vstack([p0, p2])
+        truth_len[i] = np.hypot(*np.diff(pts, axis=0).T).sum()
+        polylines.append(np.round(pts).astype(np.int32))
+    cv2.polylines(image, polylines, False, (40, 40, 40), 1, cv2.LINE_8)
+    chord = ends - starts
+    return image, {
+        "length_px": truth_len,
+        "orientation_deg": np.degrees(np.arctan2(chord[:, 1], chord[:, 0])) % 180.0,
+    }
+
+
+def muck_pile_image(
+    megapixels: float,
+    *,
+    median_diameter_px: float = 40.0,
+    sigma: float = 0.35,
+    seed: int = 0,
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Pila de fragmentos sintética: polígonos convexos oscuros en celdas sin solape.
+
+    Los diámetros nominales siguen una log-normal (mediana ``median_diameter_px``);
+    la verdad es el diámetro equivalente de cada polígono dibujado.
+
+    Returns:
+        (imagen RGB, verdad) con ``diameter_px`` por fragmento.
+    """
+    rng = np.random.default_rng(seed)
+    h, w = image_shape(megapixels)
+    image = _background((h, w), rng, level=205, amplitude=4.0)
+    cell = int(np.ceil(median_diameter_px * np.exp(2.5 * sigma) * 1.15))
+    gy, gx = np.mgrid[0:h - cell:cell, 0:w - cell:cell]
+    centers = np.column_stack([gx.ravel(), gy.ravel()]) + cell / 2.0
+    n = len(centers)
+    radius = np.minimum(median_diameter_px * np.exp(rng.normal(0.0, sigma, n)), cell * 0.9) / 2.0
+    centers += rng.uniform(-1, 1, (n, 2)) * (cell / 2.0 - radius - 1)[:, None]
+
+    # 7–12 vértices por polígono, en ángulos ordenados y radios variables
+    k = 12
+    theta = np.sort(rng.uniform(0, 2 * np.pi, (n, k)), axis=1)
+    r = radius[:, None] * rng.uniform(0.75, 1.0, (n, k))
+    verts = centers[:, None, :] + r[..., None] * np.stack([np.cos(theta), np.sin(theta)], axis=-1)
+    polygons = [cv2.convexHull(np.round(v).astype(np.int32)) for v in verts]
+    shade = rng.integers(50, 90, n)
+    for poly, s in zip(polygons, shade):
+        cv2.fillPoly(image, [poly], (int(s), int(s), int(s)))
+    area = np.array([cv2.contourArea(p) for p in polygons])
+    return image, {"diameter_px": 2.0 * np.sqrt(area / np.pi)}
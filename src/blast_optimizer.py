@@ -0,0 +1,223 @@
+"""Optimizador de diseño de voladura sobre grillas Langefors–Kihlström / Kuz–Ram.
+
+Evalúa todas las combinaciones de espaciamiento ``S``, burden ``B``, carga
+por pozo ``Q`` y explosivo por bloques (el índice plano de la grilla se
+descompone con ``np.unravel_index``, sin materializar la grilla completa) y
+devuelve:
+
+* el frente de Pareto entre la carga específica ``K = Q / (S·B·H)`` y el
+  tamaño medio ``Xm`` de Kuz–Ram (:func:`src.metrics.kuz_ram`), ambos a
+  minimizar;
+* los mejores candidatos: los de menor ``K`` cuyo ``P80`` Rosin–Rammler no
+  supera el objetivo.
+
+Para cada diseño se informa también la carga específica de referencia de
+Langefors–Kihlström (:func:`src.metrics.blast_lk`), que depende sólo de la
+geometría y del explosivo.
+
+Rosin–Rammler: ``R(x) = 1 - exp(-(x/xc)^n)`` con ``xc = Xm / ln(2)^(1/n)``,
+por lo que ``P80 = Xm · (ln 5 / ln 2)^(1/n)``. El índice de uniformidad ``n``
+es fijo o se estima con Cunningham (1987) a partir del diámetro de pozo.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src import metrics
+
+__all__ = [
+    "DEFAULT_EXPLOSIVES",
+    "BlastOptimizationResult",
+    "optimize_blast",
+    "rosin_rammler_passing",
+    "p80_from_xm",
+]
+
+# nombre -> (energía E en MJ/kg para L–K, RWS relativo al ANFO = 100 para Kuz–Ram)
+DEFAULT_EXPLOSIVES: Dict[str, Tuple[float, float]] = {
+    "ANFO": (3.9, 100.0),
+    "ANFO pesado 70/30": (3.6, 110.0),
+    "Emulsión": (3.2, 85.0),
+}
+
+_COLUMNS = ("S", "B", "Q", "explosive", "K", "q_lk", "Xm", "n", "P80")
+
+
+def p80_from_xm(xm, n):  # noqa: ANN001,ANN201
+    """P80 Rosin–Rammler a partir del tamaño medio ``Xm`` y la uniformidad ``n``."""
+    return xm * (np.log(5.0) / np.log(2.0)) ** (1.0 / n)
+
+
+def rosin_rammler_passing(sizes, xm: float, n: float) -> np.ndarray:  # noqa: ANN001
+    """Porcentaje pasante (%) para ``sizes`` (mismas unidades que ``xm``)."""
+    xc = xm / np.log(2.0) ** (1.0 / n)
+    return 100.0 * (1.0 - np.exp(-((np.asarray(sizes, dtype=np.float64) / xc) ** n)))
+
+
+def _uniformity(S: np.ndarray, B: np.ndarray, hole_diameter_mm: Optional[float], default: float):
+    """Índice ``n`` de Cunningham (B en m, d en mm; sin desviación, carga a altura completa)."""
+    if hole_diameter_mm is None:
+        return np.full(S.shape, default)
+    return np.clip((2.2 - 14.0 * B / hole_diameter_mm) * np.sqrt((1.0 + S / B) / 2.0), 0.5, 3.0)
+
+
+class BlastOptimizationResult:
+    """Frente de Pareto y mejores candidatos (columnas como arrays)."""
+
+    def __init__(
+        self,
+        pareto: Dict[str, np.ndarray],
+        top: Dict[str, np.ndarray],
+        evaluated: int,
+        valid: int,
+        feasible: int,
+        explosives: Sequence[str],
+    ):
+        self.pareto = pareto
+        self.top = top
+        self.evaluated = evaluated
+        self.valid = valid
+        self.feasible = feasible
+        self.explosives = list(explosives)
+
+    @staticmethod
+    def _rows(columns: Dict[str, np.ndarray], explosives: Sequence[str]) -> List[dict]:
+        n = len(columns["K"])
+        rows = []
+        for i in range(n):
+            row = {k: float(columns[k][i]) for k in _COLUMNS if k != "explosive"}
+            row["explosive"] = explosives[int(columns["explosive"][i])]
+            rows.append(row)
+        return rows
+
+    def pareto_rows(self) -> List[dict]:
+        return self._rows(self.pareto, self.explosives)
+
+    def top_rows(self) -> List[dict]:
+        return self._rows(self.top, self.explosives)
+
+
+def _take(columns: Dict[str, np.ndarray], idx: np.ndarray) -> Dict[str, np.ndarray]:
+    return {k: v[idx] for k, v in columns.items()}
+
+
+def _concat(a: Optional[Dict[str, np.ndarray]], b: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    return b if a is None else {k: np.concatenate([a[k], b[k]]) for k in b}
+
+
+def _pareto_front(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Puntos no dominados minimizando (K, Xm)."""
+    order = np.lexsort((columns["Xm"], columns["K"]))
+    xm = columns["Xm"][order]
+    best_before = np.minimum.accumulate(np.concatenate([[np.inf], xm[:-1]]))
+    return _take(columns, order[xm < best_before])
+
+
+def _dominated(front: Optional[Dict[str, np.ndarray]], columns: Dict[str, np.ndarray]) -> np.ndarray:
+    """Máscara de puntos dominados por un frente ya ordenado (K creciente, Xm decreciente)."""
+    if front is None or not len(front["K"]):
+        return np.zeros(len(columns["K"]), dtype=bool)
+    pos = np.searchsorted(front["K"], columns["K"], side="right") - 1
+    return (pos >= 0) & (front["Xm"][np.maximum(pos, 0)] <= columns["Xm"])
+
+
+def _best(columns: Dict[str, np.ndarray], k: int) -> Dict[str, np.ndarray]:
+    """Los ``k`` candidatos de menor K (desempate por Xm)."""
+    if len(columns["K"]) > k:
+        keep = np.argpartition(columns["K"], k - 1)[:k]
+        columns = _take(columns, keep)
+    return _take(columns, np.lexsort((columns["Xm"], columns["K"])))
+
+
+def optimize_blast(
+    spacing_m: Sequence[float],
+    burden_m: Sequence[float],
+    charge_kg: Sequence[float],
+    *,
+    explosives: Optional[Mapping[str, Tuple[float, float]]] = None,
+    bench_height_m: float = 10.0,
+    rock_factor: float = 5.0,
+    rock_constant: float = 1.0,
+    fe: float = 1.0,
+    target_p80_cm: Optional[float] = None,
+    uniformity: float = 1.5,
+    hole_diameter_mm: Optional[float] = None,
+    spacing_burden_ratio: Optional[Tuple[float, float]] = None,
+    top_k: int = 20,
+    chunk_size: int = 1 << 20,
+) -> BlastOptimizationResult:
+    """
+    Evalúa la grilla ``S × B × Q × explosivo`` y devuelve Pareto y mejores diseños.
+
+    Args:
+        spacing_m, burden_m, charge_kg: Valores de la grilla (S, B en m; Q en kg/pozo).
+        explosives: ``nombre -> (E MJ/kg, RWS)``; por defecto :data:`DEFAULT_EXPLOSIVES`.
+        bench_height_m: Altura de banco H (volumen por pozo V = S·B·H).
+        rock_factor: Factor de roca A de Kuz–Ram.
+        rock_constant: Constante de roca c de Langefors–Kihlström.
+        fe: Factor de fijación/eficiencia de L–K.
+        target_p80_cm: P80 objetivo (cm); sin objetivo, los mejores son los de menor K.
+        uniformity: Índice n de Rosin–Rammler si no se da ``hole_diameter_mm``.
+        hole_diameter_mm: Diámetro de pozo para estimar n (Cunningham).
+        spacing_burden_ratio: Rango admisible de S/B (p. ej. ``(1.0, 1.5)``).
+        top_k: Número de mejores candidatos a devolver.
+        chunk_size: Combinaciones por bloque (acota la memoria).
+
+    Returns:
+        BlastOptimizationResult. Son factibles los diseños válidos con
+        ``P80 ≤ objetivo`` (todos los válidos si no hay objetivo).
+    """
+    explosives = dict(explosives or DEFAULT_EXPLOSIVES)
+    names = list(explosives)
+    S_grid = np.asarray(spacing_m, dtype=np.float64)
+    B_grid = np.asarray(burden_m, dtype=np.float64)
+    Q_grid = np.asarray(charge_kg, dtype=np.float64)
+    E_grid = np.array([explosives[n][0] for n in names], dtype=np.float64)
+    RWS_grid = np.array([explosives[n][1] for n in names], dtype=np.float64)
+    shape = (S_grid.size, B_grid.size, Q_grid.size, len(names))
+    total = int(np.prod(shape))
+
+    pareto = top = None
+    valid_count = feasible_count = 0
+    for start in range(0, total, chunk_size):
+        i_s, i_b, i_q, i_e = np.unravel_index(np.arange(start, min(start + chunk_size, total)), shape)
+        S, B, Q = S_grid[i_s], B_grid[i_b], Q_grid[i_q]
+        volume = S * B * bench_height_m
+        q_lk, bad_lk = metrics.blast_lk_batch(fe, S, B, rock_constant, E_grid[i_e])
+        xm, bad_xm = metrics.kuz_ram_batch(rock_factor, volume, Q, RWS_grid[i_e])
+        valid = ~(bad_lk | bad_xm)
+        if spacing_burden_ratio is not None:
+            ratio = S / B
+            valid &= (ratio >= spacing_burden_ratio[0]) & (ratio <= spacing_burden_ratio[1])
+        n = _uniformity(S, B, hole_diameter_mm, uniformity)
+        columns = {
+            "S": S, "B": B, "Q": Q, "explosive": i_e,
+            "K": Q / volume, "q_lk": q_lk, "Xm": xm, "n": n, "P80": p80_from_xm(xm, n),
+        }
+        if not valid.all():
+            columns = _take(columns, np.flatnonzero(valid))
+        valid_count += len(columns["K"])
+        if not len(columns["K"]):
+            continue
+        # Sólo se ordenan los puntos que el frente acumulado no domina
+        candidates = _take(columns, np.flatnonzero(~_dominated(pareto, columns)))
+        pareto = _pareto_front(_concat(pareto, candidates))
+
+        feasible = np.ones(len(columns["K"]), dtype=bool)
+        if target_p80_cm is not None:
+            feasible = columns["P80"] <= target_p80_cm
+        feasible_count += int(feasible.sum())
+        if feasible.any():
+            top = _best(_concat(top, _best(_take(columns, np.flatnonzero(feasible)), top_k)), top_k)
+
+    empty = {k: np.zeros(0) for k in _COLUMNS}
+    return BlastOptimizationResult(
+        pareto=pareto if pareto is not None else empty,
+        top=top if top is not None else empty,
+        evaluated=total,
+        valid=valid_count,
+        feasible=feasible_count,
+        explosives=names,
+    )
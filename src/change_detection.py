@@ -0,0 +1,345 @@
+"""Detección de cambios entre levantamientos repetidos de un mismo frente.
+
+La comparación no vuelve a analizar píxeles a resolución completa:
+
+1. **Registro** sobre proxies reducidos: ORB + emparejamiento con prueba de
+   razón y homografía RANSAC en un proxy de ``proxy_px``; después se refina
+   con ECC (``cv2.findTransformECC``) en un proxy de ``refine_px``. La
+   homografía se lleva a resolución completa cambiando de escala.
+2. **Diferencia** sobre las polilíneas de :mod:`src.polylines` (vértices,
+   no rasters): las del levantamiento anterior se transforman al marco del
+   actual, ambas se muestrean cada ``step`` px a lo largo de los segmentos y
+   un ``cKDTree`` decide qué tramos de cada grieta tienen contraparte a menos
+   de ``tolerance``.
+
+Cada grieta actual se clasifica como *nueva* (casi sin contraparte),
+*extendida* (tiene contraparte y además un tramo sin ella de al menos
+``min_extension``) o *sin cambio*; cada grieta anterior sin contraparte se
+informa como *cerrada* (ya no visible).
+"""
+from __future__ import annotations
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+__all__ = [
+    "Registration",
+    "register_images",
+    "diff_polylines",
+    "render_changes",
+    "compare_surveys",
+    "CHANGE_COLUMNS",
+]
+
+CHANGE_COLUMNS = [
+    "status",
+    "crack_after",
+    "cracks_before",
+    "length_before_m",
+    "length_after_m",
+    "delta_m",
+    "extension_m",
+    "centroid_x",
+    "centroid_y",
+]
+
+STATUS_COLORS = {
+    "nueva": (255, 0, 0),
+    "extendida": (255, 140, 0),
+    "sin cambio": (0, 200, 0),
+    "cerrada": (0, 120, 255),
+}
+
+
+class Registration:
+    """Homografía ``matrix`` (3×3) que lleva coordenadas del levantamiento anterior al actual."""
+
+    def __init__(self, matrix: np.ndarray, matches: int, inliers: int, ecc: Optional[float]):
+        self.matrix = matrix
+        self.matches = matches
+        self.inliers = inliers
+        self.ecc = ecc
+
+    def transform(self, points: np.ndarray) -> np.ndarray:
+        """Aplica la homografía a puntos ``(N, 2)``."""
+        pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        homogeneous = np.column_stack([pts, np.ones(len(pts))]) @ self.matrix.T
+        return homogeneous[:, :2] / homogeneous[:, 2:3]
+
+
+def _proxy(image: np.ndarray, max_side: int) -> Tuple[np.ndarray, float]:
+    """Proxy en escala de grises con el lado mayor ≤ ``max_side`` y su factor de escala."""
+    import cv2
+
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY) if image.ndim == 3 else image
+    factor = min(1.0, max_side / max(gray.shape[:2]))
+    if factor < 1.0:
+        gray = cv2.resize(
+            gray, (round(gray.shape[1] * factor), round(gray.shape[0] * factor)),
+            interpolation=cv2.INTER_AREA,
+        )
+    return gray, factor
+
+
+def register_images(
+    after: np.ndarray,
+    before: np.ndarray,
+    *,
+    proxy_px: int = 1000,
+    refine_px: int = 1600,
+    max_features: int = 4000,
+    ratio: float = 0.75,
+) -> Registration:
+    """
+    Registra ``before`` sobre ``after`` (imágenes del mismo frente).
+
+    Args:
+        after: Imagen del levantamiento actual (marco de referencia).
+        before: Imagen del levantamiento anterior.
+        proxy_px: Lado mayor del proxy para ORB.
+        refine_px: Lado mayor del proxy para el refinamiento ECC (0 lo omite).
+        max_features: Puntos ORB por imagen.
+        ratio: Umbral de la prueba de razón de Lowe.
+
+    Returns:
+        Registration con la homografía anterior → actual a resolución completa.
+
+    Raises:
+        ValueError: si no hay suficientes correspondencias.
+    """
+    import cv2
+
+    ref, f_ref = _proxy(after, proxy_px)
+    mov, f_mov = _proxy(before, proxy_px)
+    orb = cv2.ORB_create(nfeatures=max_features)
+    kp_ref, des_ref = orb.detectAndCompute(ref, None)
+    kp_mov, des_mov = orb.detectAndCompute(mov, None)
+    if des_ref is None or des_mov is None:
+        raise ValueError("No se encontraron rasgos para registrar las imágenes.")
+    pairs = cv2.BFMatcher(cv2.NORM_HAMMING).knnMatch(des_ref, des_mov, k=2)
+    good = [p[0] for p in pairs if len(p) == 2 and p[0].distance < ratio * p[1].distance]
+    if len(good) < 8:
+        raise ValueError(f"Correspondencias insuficientes para registrar ({len(good)}).")
+    src = np.float32([kp_ref[m.queryIdx].pt for m in good]) / f_ref
+    dst = np.float32([kp_mov[m.trainIdx].pt for m in good]) / f_mov
+    # Homografía actual → anterior a resolución completa (la que usa ECC)
+    warp, inlier_mask = cv2.findHomography(src, dst, cv2.RANSAC, 3.0 / min(f_ref, f_mov))
+    if warp is None:
+        raise ValueError("No se pudo estimar la homografía entre las imágenes.")
+
+    ecc = None
+    if refine_px:
+        ref_fine, g_ref = _proxy(after, refine_px)
+        mov_fine, g_mov = _proxy(before, refine_px)
+        s_ref, s_mov = np.diag([g_ref, g_ref, 1.0]), np.diag([g_mov, g_mov, 1.0])
+        init = (s_mov @ warp @ np.linalg.inv(s_ref)).astype(np.float32)
+        criteria = (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 50, 1e-5)
+        try:
+            ecc, refined = cv2.findTransformECC(
+                ref_fine, mov_fine, init, cv2.MOTION_HOMOGRAPHY, criteria, None, 5
+            )
+            warp = np.linalg.inv(s_mov) @ refined.astype(np.float64) @ s_ref
+        except cv2.error:
+            ecc = None  # sin convergencia: se conserva la homografía de ORB
+    matrix = np.linalg.inv(warp)
+    return Registration(matrix / matrix[2, 2], len(good), int(inlier_mask.sum()), ecc)
+
+
+def _sample(coords: np.ndarray, offsets: np.ndarray, crack_row: np.ndarray, step: float):
+    """Puntos cada ``step`` px a lo largo de los segmentos: (puntos, fila de grieta, longitud)."""
+    counts = np.diff(offsets)
+    keep = np.ones(max(len(coords) - 1, 0), dtype=bool)
+    ends = offsets[1:-1] - 1
+    keep[ends[ends < keep.size]] = False
+    p0, p1 = coords[:-1][keep], coords[1:][keep]
+    row = np.repeat(crack_row, counts)[:-1][keep] if len(coords) else np.zeros(0, np.int64)
+    length = np.hypot(*(p1 - p0).T)
+    n = np.maximum(np.ceil(length / step), 1).astype(np.int64)
+    seg = np.repeat(np.arange(len(length)), n)
+    t = (np.arange(seg.size) - np.repeat(np.cumsum(n) - n, n) + 0.5) / n[seg]
+    points = p0[seg] + (p1[seg] - p0[seg]) * t[:, None]
+    return points, row[seg], (length / n)[seg]
+
+
+def diff_polylines(
+    before,  # noqa: ANN001 - CrackPolylines
+    after,  # noqa: ANN001 - CrackPolylines
+    *,
+    registration: Optional[Registration] = None,
+    tolerance_px: float = 5.0,
+    min_extension_px: float = 10.0,
+    new_fraction: float = 0.2,
+    scale_px_per_m: float = 1.0,
+) -> Dict[str, object]:
+    """
+    Compara las polilíneas de dos levantamientos en el marco de ``after``.
+
+    Args:
+        before: Polilíneas del levantamiento anterior.
+        after: Polilíneas del levantamiento actual.
+        registration: Homografía anterior → actual (identidad si falta).
+        tolerance_px: Distancia máxima para considerar que un tramo tiene contraparte.
+        min_extension_px: Longitud mínima sin contraparte para "extendida".
+        new_fraction: Fracción máxima con contraparte para "nueva"/"cerrada".
+        scale_px_per_m: Escala de ``after`` para expresar longitudes en m.
+
+    Returns:
+        ``{"rows": [...], "summary": {...}, "before_coords": ...}`` con una fila
+        por grieta (columnas ``CHANGE_COLUMNS``).
+    """
+    from scipy.spatial import cKDTree
+
+    coords_b = before.coords.astype(np.float64)
+    if registration is not None and len(coords_b):
+        coords_b = registration.transform(coords_b)
+    coords_a = after.coords.astype(np.float64)
+    step = max(tolerance_px / 2.0, 0.5)
+    pts_b, row_b, w_b = _sample(coords_b, before.offsets, before.crack_row, step)
+    pts_a, row_a, w_a = _sample(coords_a, after.offsets, after.crack_row, step)
+    n_b, n_a = before.crack_ids.size, after.crack_ids.size
+    to_m = 1.0 / scale_px_per_m
+
+    def matched(points: np.ndarray, other: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if not len(points) or not len(other):
+            return np.zeros(len(points), bool), np.zeros(len(points), np.int64)
+        dist, idx = cKDTree(other).query(points, distance_upper_bound=tolerance_px)
+        hit = np.isfinite(dist)
+        return hit, np.where(hit, idx, 0)
+
+    hit_a, near_a = matched(pts_a, pts_b)
+    hit_b, _ = matched(pts_b, pts_a)
+    length_a = np.bincount(row_a, w_a, n_a)
+    length_b = np.bincount(row_b, w_b, n_b)
+    covered_a = np.bincount(row_a[hit_a], w_a[hit_a], n_a)
+    covered_b = np.bincount(row_b[hit_b], w_b[hit_b], n_b)
+
+    # Grietas anteriores tocadas por cada grieta actual (vía el punto más cercano)
+    pairs = np.unique(np.column_stack([row_a[hit_a], row_b[near_a[hit_a]]]), axis=0)
+    partners: Dict[int, List[int]] = {}
+    for a, b in pairs.tolist():
+        partners.setdefault(a, []).append(b)
+
+    centroid_a = np.column_stack([np.bincount(row_a, w_a * pts_a[:, k], n_a) for k in (0, 1)])
+    centroid_b = np.column_stack([np.bincount(row_b, w_b * pts_b[:, k], n_b) for k in (0, 1)])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        centroid_a /= length_a[:, None]
+        centroid_b /= length_b[:, None]
+
+    rows = []
+    for a in np.flatnonzero(length_a > 0):
+        olds = partners.get(int(a), [])
+        uncovered = length_a[a] - covered_a[a]
+        if covered_a[a] <= new_fraction * length_a[a]:
+            status, olds = "nueva", []
+        elif uncovered >= min_extension_px:
+            status = "extendida"
+        else:
+            status = "sin cambio"
+        before_len = float(length_b[olds].sum()) if olds else 0.0
+        rows.append(
+            {
+                "status": status,
+                "crack_after": int(after.crack_ids[a]),
+                "cracks_before": ",".join(str(int(before.crack_ids[b])) for b in olds),
+                "length_before_m": round(before_len * to_m, 4),
+                "length_after_m": round(float(length_a[a]) * to_m, 4),
+                "delta_m": round((float(length_a[a]) - before_len) * to_m, 4),
+                "extension_m": round(float(uncovered) * to_m, 4) if status != "sin cambio" else 0.0,
+                "centroid_x": int(round(centroid_a[a, 0])),
+                "centroid_y": int(round(centroid_a[a, 1])),
+            }
+        )
+    for b in np.flatnonzero((length_b > 0) & (covered_b <= new_fraction * length_b)):
+        rows.append(
+            {
+                "status": "cerrada",
+                "crack_after": None,
+                "cracks_before": str(int(before.crack_ids[b])),
+                "length_before_m": round(float(length_b[b]) * to_m, 4),
+                "length_after_m": 0.0,
+                "delta_m": round(-float(length_b[b]) * to_m, 4),
+                "extension_m": 0.0,
+                "centroid_x": int(round(centroid_b[b, 0])),
+                "centroid_y": int(round(centroid_b[b, 1])),
+            }
+        )
+
+    statuses = [r["status"] for r in rows]
+    summary = {status: statuses.count(status) for status in STATUS_COLORS}
+    summary["length_before_m"] = round(float(length_b.sum()) * to_m, 4)
+    summary["length_after_m"] = round(float(length_a.sum()) * to_m, 4)
+    summary["new_length_m"] = round(float((length_a - covered_a)[length_a > 0].sum()) * to_m, 4)
+    return {"rows": rows, "summary": summary, "before_coords": coords_b}
+
+
+def render_changes(image: np.ndarray, before, after, diff: dict, *, thickness: int = 2) -> np.ndarray:  # noqa: ANN001
+    """Dibuja las grietas actuales por estado y las cerradas (anteriores) sobre ``image``."""
+    import cv2
+
+    out = np.ascontiguousarray(image).copy()
+    status_of = {r["crack_after"]: r["status"] for r in diff["rows"] if r["crack_after"] is not None}
+    parts = np.split(after.coords.astype(np.int32), after.offsets[1:-1]) if len(after) else []
+    for part, row in zip(parts, after.crack_row):
+        status = status_of.get(int(after.crack_ids[row]), "sin cambio")
+        cv2.polylines(out, [part], False, STATUS_COLORS[status], thickness, cv2.LINE_AA)
+    closed = {int(r["cracks_before"]) for r in diff["rows"] if r["status"] == "cerrada"}
+    coords_b = np.rint(diff["before_coords"]).astype(np.int32)
+    parts = np.split(coords_b, before.offsets[1:-1]) if len(before) else []
+    for part, row in zip(parts, before.crack_row):
+        if int(before.crack_ids[row]) in closed:
+            cv2.polylines(out, [part], False, STATUS_COLORS["cerrada"], thickness, cv2.LINE_AA)
+    return out
+
+
+def compare_surveys(
+    before_image: np.ndarray,
+    after_image: np.ndarray,
+    *,
+    before_hash: str,
+    after_hash: str,
+    scale_px_per_m: float,
+    min_length_px: int = 50,
+    tolerance_m: float = 0.01,
+    min_extension_m: float = 0.02,
+    progress: Optional[Callable[[str, float], None]] = None,
+) -> dict:
+    """
+    Registro + diferencia de dos levantamientos usando resultados cacheados.
+
+    La detección y la vectorización de cada imagen salen de la caché de
+    resultados (:mod:`src.core.analysis`) si ya se analizaron; sólo el
+    registro recorre los proxies.
+
+    Returns:
+        Resultado de :func:`diff_polylines` con ``registration``, ``before`` y
+        ``after`` (polilíneas) añadidos.
+    """
+    from src.core import analysis
+
+    if scale_px_per_m <= 0:
+        raise ValueError("La escala debe ser positiva.")
+    report = progress or (lambda stage, fraction: None)
+    tolerance_px = tolerance_m * scale_px_per_m
+    simplify_px = max(1.0, tolerance_px / 4.0)
+    vectors = []
+    for k, (image, image_hash) in enumerate(((before_image, before_hash), (after_image, after_hash))):
+        report("Detección (caché)" if k == 0 else "Detección actual (caché)", 0.3 * k)
+        _, mask, info = analysis.detect_cracks(image, image_hash=image_hash, min_length_px=min_length_px)
+        vectors.append(
+            analysis.vectorize_cracks(
+                mask, info, image_hash=image_hash, min_length_px=min_length_px, tolerance_px=simplify_px
+            )
+        )
+    report("Registro (ORB + ECC)", 0.6)
+    registration = register_images(after_image, before_image)
+    report("Diferencia de polilíneas", 0.9)
+    diff = diff_polylines(
+        vectors[0], vectors[1],
+        registration=registration,
+        tolerance_px=tolerance_px,
+        min_extension_px=min_extension_m * scale_px_per_m,
+        scale_px_per_m=scale_px_per_m,
+    )
+    report("Completado", 1.0)
+    return {**diff, "registration": registration, "before": vectors[0], "after": vectors[1]}
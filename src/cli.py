@@ -0,0 +1,308 @@
+"""Interfaz de línea de comandos para análisis por lotes (sin navegador).
+
+Ejecuta ``detect_cracks``, ``metrics.crack_frequency`` y
+``metrics.rqd_from_frequency`` sobre una carpeta de imágenes o un manifiesto
+CSV, en paralelo con varios procesos y con un checkpoint JSONL que permite
+reanudar una ejecución interrumpida.
+
+Uso::
+
+    python -m src.cli batch CARPETA --output grietas.csv
+    python -m src.cli batch manifiesto.csv --output grietas.parquet \\
+        --summary resumen.csv --workers 4
+    python -m src.cli watch CARPETA --store resultados.jsonl
+    python -m src.cli serve --port 8765
+
+El manifiesto es un CSV con columna ``path`` y, opcionalmente,
+``scale_px_per_m`` y ``min_length_px`` por imagen (las rutas relativas se
+resuelven respecto al manifiesto).
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import multiprocessing
+import sys
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from src.core.jsonl_store import JsonlStore
+from src.utils.constants import ALLOWED_IMAGE_TYPES, APP_VERSION, DEFAULT_VALUES
+
+__all__ = ["analyze_image_file", "crack_summary", "collect_tasks", "run_batch", "main"]
+
+SUMMARY_COLUMNS = [
+    "image_path",
+    "image_hash",
+    "timestamp_utc",
+    "scale_px_per_m",
+    "width_px",
+    "height_px",
+    "min_length_px",
+    "min_length_filter_m",
+    "crack_count",
+    "included_count",
+    "frequency_per_m",
+    "rqd_percent",
+    "app_version",
+]
+
+
+def collect_tasks(
+    source: Path,
+    *,
+    scale_px_per_m: float,
+    min_length_px: int,
+    min_length_filter_m: float = 0.0,
+) -> List[dict]:
+    """Construye la lista de tareas desde una carpeta o un manifiesto CSV."""
+    source = Path(source)
+    rows: List[dict] = []
+    if source.is_dir():
+        suffixes = {f".{ext}" for ext in ALLOWED_IMAGE_TYPES}
+        for path in sorted(source.iterdir()):
+            if path.suffix.lower() in suffixes:
+                rows.append({"path": path})
+    elif source.suffix.lower() == ".csv":
+        with source.open(newline="", encoding="utf-8") as fh:
+            for row in csv.DictReader(fh):
+                path = Path(row["path"])
+                if not path.is_absolute():
+                    path = source.parent / path
+                rows.append({**row, "path": path})
+    else:
+        raise ValueError(f"Entrada no válida (carpeta o manifiesto .csv): {source}")
+
+    tasks = []
+    for row in rows:
+        path = row["path"].resolve()
+        scale = float(row.get("scale_px_per_m") or scale_px_per_m)
+        min_len = int(row.get("min_length_px") or min_length_px)
+        stat = path.stat()
+        tasks.append(
+            {
+                "key": f"{path}|{stat.st_size}|{stat.st_mtime_ns}|{scale}|{min_len}|{min_length_filter_m}",
+                "path": str(path),
+                "scale_px_per_m": scale,
+                "min_length_px": min_len,
+                "min_length_filter_m": float(min_length_filter_m),
+            }
+        )
+    return tasks
+
+
+def crack_summary(image, crack_info: list, *, image_hash: str, path, task: dict) -> Tuple[dict, list]:  # noqa: ANN001
+    """Resumen por imagen y filas por grieta a partir de una detección ya hecha.
+
+    Returns:
+        (resumen, filas por grieta)
+    """
+    from src import export, metrics
+
+    timestamp = export.utc_timestamp()
+    cracks = export.crack_records(
+        crack_info,
+        image_hash=image_hash,
+        scale_px_per_m=task["scale_px_per_m"],
+        min_length_filter_m=task["min_length_filter_m"],
+        timestamp_utc=timestamp,
+    )
+    included = sum(1 for c in cracks if c["included"])
+    frequency = metrics.crack_frequency(
+        included, image.shape[1], scale_px_per_meter=task["scale_px_per_m"]
+    )
+    summary = {
+        "image_path": str(path),
+        "image_hash": image_hash,
+        "timestamp_utc": timestamp,
+        "scale_px_per_m": task["scale_px_per_m"],
+        "width_px": int(image.shape[1]),
+        "height_px": int(image.shape[0]),
+        "min_length_px": task["min_length_px"],
+        "min_length_filter_m": task["min_length_filter_m"],
+        "crack_count": len(cracks),
+        "included_count": included,
+        "frequency_per_m": frequency,
+        "rqd_percent": metrics.rqd_from_frequency(frequency),
+        "app_version": APP_VERSION,
+    }
+    return summary, cracks
+
+
+def analyze_image_file(task: dict) -> dict:
+    """Analiza una imagen (función de nivel de módulo para ``multiprocessing``).
+
+    Devuelve un registro con el resumen por imagen y las filas por grieta, o
+    con la clave ``error`` si la imagen no pudo procesarse.
+    """
+    from src import crack_detection, image_io
+    from src.core import image_identity
+
+    path = Path(task["path"])
+    try:
+        image = image_io.load_image(path)
+        image_hash = image_identity.source_hash(path)
+        _, _, crack_info = crack_detection.detect_cracks(
+            image, min_length_px=task["min_length_px"]
+        )
+        summary, cracks = crack_summary(image, crack_info, image_hash=image_hash, path=path, task=task)
+    except Exception as exc:  # noqa: BLE001 - se registra y el lote continúa
+        return {"key": task["key"], "path": str(path), "error": repr(exc)}
+    return {"key": task["key"], "path": str(path), "summary": summary, "cracks": cracks}
+
+
+def run_batch(
+    tasks: Sequence[dict],
+    checkpoint: JsonlStore,
+    *,
+    workers: int = 1,
+    log=print,  # noqa: ANN001
+) -> List[dict]:
+    """Procesa las tareas pendientes y devuelve todos los registros exitosos.
+
+    Las tareas cuya clave ya figura en el checkpoint se omiten; cada resultado
+    nuevo se anexa al checkpoint en cuanto termina.
+    """
+    done = {r["key"] for r in checkpoint if "error" not in r}
+    pending = [t for t in tasks if t["key"] not in done]
+    log(f"{len(tasks)} imágenes, {len(tasks) - len(pending)} ya procesadas, {len(pending)} pendientes.")
+
+    def consume(results: Iterable[dict]) -> None:
+        for n, record in enumerate(results, start=1):
+            checkpoint.append(record)
+            status = f"ERROR {record['error']}" if "error" in record else (
+                f"{record['summary']['included_count']} grietas"
+            )
+            log(f"[{n}/{len(pending)}] {record['path']}: {status}")
+
+    if pending:
+        if workers > 1:
+            ctx = multiprocessing.get_context("spawn")
+            with ctx.Pool(processes=workers) as pool:
+                consume(pool.imap_unordered(analyze_image_file, pending))
+        else:
+            consume(map(analyze_image_file, pending))
+
+    wanted = {t["key"] for t in tasks}
+    latest = {}
+    for record in checkpoint:
+        if record.get("key") in wanted and "error" not in record:
+            latest[record["key"]] = record
+    return [latest[t["key"]] for t in tasks if t["key"] in latest]
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.cli",
+        description="Análisis por lotes de frecuencia de fracturas y RQD.",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    batch = sub.add_parser("batch", help="Procesa una carpeta o un manifiesto CSV.")
+    batch.add_argument("input", type=Path, help="Carpeta de imágenes o manifiesto .csv")
+    batch.add_argument("--output", "-o", type=Path, required=True,
+                       help="Tabla de grietas (.csv o .parquet)")
+    batch.add_argument("--summary", type=Path, default=None,
+                       help="Tabla resumen por imagen (.csv o .parquet)")
+    batch.add_argument("--scale", type=float, default=float(DEFAULT_VALUES["scale_px_per_meter"]),
+                       help="Escala px/m por defecto (el manifiesto puede sobrescribirla)")
+    batch.add_argument("--min-length-px", type=int, default=DEFAULT_VALUES["min_crack_length_px"],
+                       help="Longitud mínima de grieta en píxeles")
+    batch.add_argument("--min-length-m", type=float, default=0.0,
+                       help="Longitud mínima (m) para considerar una grieta incluida")
+    batch.add_argument("--workers", "-j", type=int, default=1,
+                       help="Procesos de trabajo")
+    batch.add_argument("--checkpoint", type=Path, default=None,
+                       help="Checkpoint JSONL (por defecto: <output>.checkpoint.jsonl)")
+
+    serve = sub.add_parser("serve", help="Servicio HTTP local de análisis.")
+    serve.add_argument("--host", default="127.0.0.1", help="Interfaz de escucha")
+    serve.add_argument("--port", type=int, default=8765, help="Puerto TCP")
+    serve.add_argument("--workers", "-j", type=int, default=2,
+                       help="Hilos de análisis")
+
+    watch = sub.add_parser("watch", help="Vigila una carpeta y procesa imágenes nuevas.")
+    watch.add_argument("directory", type=Path, help="Carpeta a vigilar")
+    watch.add_argument("--store", type=Path, required=True,
+                       help="Archivo JSONL de resultados (sólo anexado)")
+    watch.add_argument("--scale", type=float, default=float(DEFAULT_VALUES["scale_px_per_meter"]),
+                       help="Escala px/m")
+    watch.add_argument("--min-length-px", type=int, default=DEFAULT_VALUES["min_crack_length_px"],
+                       help="Longitud mínima de grieta en píxeles")
+    watch.add_argument("--min-area-px", type=int, default=DEFAULT_VALUES["min_area_px"],
+                       help="Área mínima de partícula en píxeles")
+    watch.add_argument("--debounce", type=float, default=2.0,
+                       help="Segundos sin cambios antes de procesar un archivo")
+    watch.add_argument("--workers", "-j", type=int, default=2,
+                       help="Hilos de análisis")
+    return parser
+
+
+def _watch(args: argparse.Namespace) -> int:
+    import threading
+    import time
+
+    from src.watcher import FolderWatcher
+
+    watcher = FolderWatcher(
+        args.directory,
+        JsonlStore(args.store),
+        scale_px_per_m=args.scale,
+        min_length_px=args.min_length_px,
+        min_area_px=args.min_area_px,
+        debounce_s=args.debounce,
+        workers=max(1, args.workers),
+    )
+    stop = threading.Event()
+    thread = threading.Thread(target=watcher.run, args=(stop,), daemon=True)
+    thread.start()
+    print(f"Vigilando {args.directory} (Ctrl+C para detener)...")
+    try:
+        while thread.is_alive():
+            time.sleep(10)
+            print(watcher.counters())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        thread.join()
+        watcher.shutdown()
+    return 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Punto de entrada de la CLI; devuelve el código de salida."""
+    from src import export
+
+    args = _build_parser().parse_args(argv)
+    if args.command == "batch":
+        tasks = collect_tasks(
+            args.input,
+            scale_px_per_m=args.scale,
+            min_length_px=args.min_length_px,
+            min_length_filter_m=args.min_length_m,
+        )
+        checkpoint = JsonlStore(
+            args.checkpoint or args.output.with_name(args.output.name + ".checkpoint.jsonl")
+        )
+        records = run_batch(tasks, checkpoint, workers=max(1, args.workers))
+        export.write_table(
+            [row for r in records for row in r["cracks"]], args.output, export.CRACK_COLUMNS
+        )
+        if args.summary is not None:
+            export.write_table([r["summary"] for r in records], args.summary, SUMMARY_COLUMNS)
+        failed = len(tasks) - len(records)
+        print(f"Resultados: {args.output} ({len(records)} imágenes, {failed} con error).")
+        return 1 if failed else 0
+    if args.command == "watch":
+        return _watch(args)
+    if args.command == "serve":
+        from src.service import serve
+
+        serve(args.host, args.port, workers=max(1, args.workers))
+        return 0
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""Servicio de análisis con caché de resultados.
+
+Envuelve ``crack_detection.detect_cracks``, ``polylines.vectorize_cracks``,
+``fragmentation.particle_sizes`` y ``multi_roi.analyze_rois`` para que los resultados se indexen por el hash de la imagen/ROI (ver
+:mod:`src.core.image_identity`) y los parámetros. Los resultados devueltos se
+comparten y son de sólo lectura.
+
+Si varias sesiones piden el mismo análisis a la vez, sólo una lo calcula y el
+resto espera su resultado (ver :mod:`src.core.single_flight`).
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, List, Optional, Tuple
+
+import numpy as np
+
+from src.core.result_cache import ResultCache, get_result_cache
+from src.core.single_flight import get_single_flight
+
+__all__ = [
+    "detect_cracks",
+    "vectorize_cracks",
+    "particle_sizes",
+    "analyze_rois",
+    "ALGORITHM_VERSION",
+]
+
+# Incrementar cuando cambie un algoritmo para invalidar la caché en disco.
+ALGORITHM_VERSION = 3
+
+
+def _cached(cache: ResultCache, key: str, compute: Callable[[], Any]) -> Any:
+    """Consulta la caché y, si falla, calcula una sola vez por clave en curso."""
+    found, value = cache.get(key)
+    if found:
+        return value
+
+    def leader() -> Any:
+        # Otra sesión pudo terminar el mismo cálculo justo antes
+        found, value = cache.get(key, record=False)
+        return value if found else cache.put(key, compute())
+
+    return get_single_flight().do(key, leader)
+
+
+def detect_cracks(
+    image: np.ndarray,
+    *,
+    image_hash: str,
+    min_length_px: int = 50,
+    cache: Optional[ResultCache] = None,
+    progress: Optional[Callable[[str, float], None]] = None,
+) -> Tuple[np.ndarray, np.ndarray, list[dict]]:
+    """Versión cacheada de :func:`src.crack_detection.detect_cracks`.
+
+    ``progress`` no forma parte de la clave; sólo se invoca si el resultado
+    se calcula en esta llamada.
+    """
+    cache = cache or get_result_cache()
+    key = cache.make_key(
+        "detect_cracks",
+        image_hash,
+        {"min_length_px": int(min_length_px), "version": ALGORITHM_VERSION},
+    )
+
+    def compute():
+        from src import crack_detection
+
+        return crack_detection.detect_cracks(
+            image, min_length_px=min_length_px, progress=progress
+        )
+
+    return _cached(cache, key, compute)
+
+
+def vectorize_cracks(
+    crack_mask: np.ndarray,
+    crack_info: list[dict],
+    *,
+    image_hash: str,
+    min_length_px: int,
+    tolerance_px: float,
+    cache: Optional[ResultCache] = None,
+):
+    """Versión cacheada de :func:`src.polylines.vectorize_cracks`.
+
+    La clave incluye los parámetros de la detección de la que salen
+    ``crack_mask`` y ``crack_info``.
+    """
+    cache = cache or get_result_cache()
+    key = cache.make_key(
+        "vectorize_cracks",
+        image_hash,
+        {
+            "min_length_px": int(min_length_px),
+            "tolerance_px": round(float(tolerance_px), 3),
+            "version": ALGORITHM_VERSION,
+        },
+    )
+
+    def compute():
+        from src import polylines
+
+        return polylines.vectorize_cracks(crack_mask, crack_info, tolerance_px=tolerance_px)
+
+    return _cached(cache, key, compute)
+
+
+def particle_sizes(
+    image: np.ndarray,
+    *,
+    image_hash: str,
+    scale_px_per_meter: float,
+    min_area_px: int = 200,
+    cache: Optional[ResultCache] = None,
+    progress: Optional[Callable[[str, float], None]] = None,
+) -> Tuple[List[float], np.ndarray]:
+    """Versión cacheada de :func:`src.fragmentation.particle_sizes`."""
+    cache = cache or get_result_cache()
+    key = cache.make_key(
+        "particle_sizes",
+        image_hash,
+        {
+            "scale_px_per_meter": float(scale_px_per_meter),
+            "min_area_px": int(min_area_px),
+            "version": ALGORITHM_VERSION,
+        },
+    )
+
+    def compute():
+        from src import fragmentation
+
+        return fragmentation.particle_sizes(
+            image,
+            scale_px_per_meter=scale_px_per_meter,
+            min_area_px=min_area_px,
+            progress=progress,
+        )
+
+    return _cached(cache, key, compute)
+
+
+def analyze_rois(
+    image: np.ndarray,
+    *,
+    image_hash: str,
+    rois: List[dict],
+    scale_px_per_m: float,
+    min_length_px: int = 50,
+    min_area_px: int = 200,
+    cache: Optional[ResultCache] = None,
+    progress: Optional[Callable[[str, float], None]] = None,
+) -> dict:
+    """Versión cacheada de :func:`src.multi_roi.analyze_rois`.
+
+    ``image_hash`` identifica la imagen completa; la clave incluye las ROIs
+    en orden (nombre y caja).
+    """
+    cache = cache or get_result_cache()
+    key = cache.make_key(
+        "analyze_rois",
+        image_hash,
+        {
+            "rois": [
+                [str(r["name"]), *(int(r[k]) for k in ("left", "top", "width", "height"))]
+                for r in rois
+            ],
+            "scale_px_per_m": float(scale_px_per_m),
+            "min_length_px": int(min_length_px),
+            "min_area_px": int(min_area_px),
+            "version": ALGORITHM_VERSION,
+        },
+    )
+
+    def compute():
+        from src import multi_roi
+
+        return multi_roi.analyze_rois(
+            image,
+            rois,
+            scale_px_per_m=scale_px_per_m,
+            min_length_px=min_length_px,
+            min_area_px=min_area_px,
+            progress=progress,
+        )
+
+    return _cached(cache, key, compute)
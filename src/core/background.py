@@ -0,0 +1,154 @@
+"""Ejecución de análisis largos en segundo plano con reporte de progreso.
+
+Los análisis se ejecutan en un pool de hilos compartido por el proceso (OpenCV
+y NumPy liberan el GIL en las operaciones pesadas). Cada envío devuelve un
+:class:`AnalysisJob` que puede guardarse en ``st.session_state`` y consultarse
+en re-ejecuciones posteriores sin reiniciar el cálculo.
+
+Clases
+------
+    AnalysisJob
+        Futuro con etapa y fracción de progreso.
+    BackgroundExecutor
+        Pool acotado que inyecta ``progress=job.report`` en la función y
+        permite cancelar los trabajos aún en cola.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Hashable, Optional
+
+__all__ = [
+    "AnalysisJob",
+    "BackgroundExecutor",
+    "ExecutorBusy",
+    "get_background_executor",
+]
+
+
+class ExecutorBusy(RuntimeError):
+    """Se lanza cuando la cola de trabajos pendientes está llena."""
+
+
+class AnalysisJob:
+    """
+    Trabajo de análisis en segundo plano.
+
+    Args:
+        key: Identificador del trabajo (p. ej. hash de imagen + parámetros).
+        label: Descripción legible para la UI.
+    """
+
+    def __init__(self, key: Hashable, label: str = ""):
+        self.key = key
+        self.label = label
+        self.stage = "En cola"
+        self.fraction = 0.0
+        self.submitted_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.future: Optional[Future] = None
+
+    def report(self, stage: str, fraction: float) -> None:
+        """Callback de progreso invocado desde el hilo de trabajo."""
+        self.stage = stage
+        self.fraction = min(1.0, max(0.0, float(fraction)))
+
+    def done(self) -> bool:
+        return self.future is not None and self.future.done()
+
+    def result(self, timeout: Optional[float] = None) -> Any:
+        """Resultado del análisis (propaga la excepción si falló)."""
+        return self.future.result(timeout=timeout)
+
+    def error(self) -> Optional[BaseException]:
+        if not self.done():
+            return None
+        return self.future.exception()
+
+    @property
+    def elapsed(self) -> float:
+        end = self.finished_at if self.finished_at is not None else time.time()
+        return end - self.submitted_at
+
+
+class BackgroundExecutor:
+    """
+    Pool de hilos con límite de trabajos pendientes.
+
+    Args:
+        max_workers: Hilos de trabajo.
+        max_pending: Máximo de trabajos encolados o en ejecución.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 32):
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="analisis"
+        )
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.max_pending = max_pending
+
+    @property
+    def pending(self) -> int:
+        """Trabajos encolados o en ejecución."""
+        return self._pending
+
+    def submit(
+        self,
+        key: Hashable,
+        fn: Callable[..., Any],
+        *args: Any,
+        label: str = "",
+        **kwargs: Any,
+    ) -> AnalysisJob:
+        """Encola ``fn(*args, progress=job.report, **kwargs)``."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise ExecutorBusy("Demasiados análisis pendientes.")
+            self._pending += 1
+        job = AnalysisJob(key, label)
+
+        def run() -> Any:
+            try:
+                return fn(*args, progress=job.report, **kwargs)
+            finally:
+                job.finished_at = time.time()
+                with self._lock:
+                    self._pending -= 1
+
+        job.future = self._pool.submit(run)
+        return job
+
+    def cancel(self, job: AnalysisJob) -> bool:
+        """
+        Cancela ``job`` si sigue en cola y libera su plaza de pendientes.
+
+        Un trabajo ya en ejecución no se interrumpe: termina y su resultado
+        queda en la caché de resultados. Devuelve si se canceló.
+        """
+        with self._lock:
+            future = job.future
+            if future is None or future.cancelled() or not future.cancel():
+                return False
+            # ``run`` no llegará a ejecutarse: su ``finally`` no descuenta
+            self._pending -= 1
+        job.finished_at = time.time()
+        return True
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+
+_default_executor: Optional[BackgroundExecutor] = None
+_default_lock = threading.Lock()
+
+
+def get_background_executor() -> BackgroundExecutor:
+    """Pool compartido por todas las sesiones del servidor."""
+    global _default_executor
+    with _default_lock:
+        if _default_executor is None:
+            _default_executor = BackgroundExecutor()
+        return _default_executor
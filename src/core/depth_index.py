@@ -0,0 +1,244 @@
+"""Índice persistente de fracturas por profundidad (por sondaje).
+
+Cada sondaje guarda dos arrays ordenados:
+
+* ``runs``: tramos registrados ``[desde, hasta)`` sin solapes (m);
+* ``fractures``: profundidad de cada fractura (m), siempre dentro de un tramo.
+
+Las consultas por intervalos (frecuencia y RQD en bins de profundidad) se
+resuelven con ``np.searchsorted`` sobre esos arrays y sumas prefijas de la
+longitud registrada y de la longitud de piezas intactas ≥ ``min_piece_m``,
+en ``O(bins · log n)``. Las piezas no se unen entre tramos (las filas de una
+bandeja son tramos distintos).
+
+Insertar un tramo que se solapa con otros existentes lo *reemplaza*
+(reprocesar una bandeja no duplica fracturas). El índice se guarda como
+``.npz`` y se escribe de forma atómica.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.utils.constants import DEPTH_INDEX_SETTINGS
+
+__all__ = ["DepthIndex", "get_depth_index"]
+
+
+class _Hole:
+    """Arrays de un sondaje y sumas prefijas derivadas (se recalculan al consultar)."""
+
+    def __init__(self, runs: Optional[np.ndarray] = None, fractures: Optional[np.ndarray] = None):
+        self.runs = runs if runs is not None else np.zeros((0, 2))
+        self.fractures = fractures if fractures is not None else np.zeros(0)
+        self._pieces: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._intact: Dict[float, np.ndarray] = {}
+        self._logged: Optional[np.ndarray] = None
+
+    def insert(self, from_m: float, to_m: float, depths: np.ndarray) -> None:
+        runs, fractures = self.runs, self.fractures
+        # Recortar los tramos existentes que se solapan con [from_m, to_m)
+        overlap = (runs[:, 0] < to_m) & (runs[:, 1] > from_m)
+        if overlap.any():
+            kept = [runs[~overlap]]
+            hit = runs[overlap]
+            before = hit[hit[:, 0] < from_m]
+            after = hit[hit[:, 1] > to_m]
+            kept.append(np.column_stack([before[:, 0], np.full(len(before), from_m)]))
+            kept.append(np.column_stack([np.full(len(after), to_m), after[:, 1]]))
+            runs = np.concatenate(kept)
+        runs = np.concatenate([runs, [[from_m, to_m]]])
+        self.runs = runs[np.argsort(runs[:, 0], kind="stable")]
+
+        lo, hi = np.searchsorted(fractures, [from_m, to_m], side="left")
+        self.fractures = np.concatenate([fractures[:lo], depths, fractures[hi:]])
+        self._pieces, self._logged, self._intact = None, None, {}
+
+    def pieces(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(inicio, longitud) de las piezas entre fracturas y bordes de tramo, ordenadas."""
+        if self._pieces is None:
+            # Secuencia ya ordenada sin ordenar: [inicio_0, fracturas del tramo 0,
+            # fin_0, inicio_1, ...]; cada tramo desplaza a los siguientes en 2.
+            runs, fractures = self.runs, self.fractures
+            n_runs = len(runs)
+            before_start = np.searchsorted(fractures, runs[:, 0], side="left")
+            before_end = np.searchsorted(fractures, runs[:, 1], side="left")
+            run_of = np.searchsorted(runs[:, 0], fractures, side="right") - 1
+            start_at = 2 * np.arange(n_runs) + before_start
+            end_at = 2 * np.arange(n_runs) + 1 + before_end
+            pos = np.empty(2 * n_runs + fractures.size)
+            pos[start_at] = runs[:, 0]
+            pos[end_at] = runs[:, 1]
+            pos[np.arange(fractures.size) + 2 * run_of + 1] = fractures
+            inside = np.ones(max(pos.size - 1, 0), dtype=bool)
+            inside[end_at[:-1]] = False  # hueco entre el fin de un tramo y el siguiente
+            self._pieces = (pos[:-1][inside], np.diff(pos)[inside])
+        return self._pieces
+
+    def logged_prefix(self) -> np.ndarray:
+        if self._logged is None:
+            self._logged = np.concatenate([[0.0], np.cumsum(self.runs[:, 1] - self.runs[:, 0])])
+        return self._logged
+
+    def intact_prefix(self, min_piece_m: float) -> np.ndarray:
+        prefix = self._intact.get(min_piece_m)
+        if prefix is None:
+            _, lengths = self.pieces()
+            prefix = np.concatenate([[0.0], np.cumsum(np.where(lengths >= min_piece_m, lengths, 0.0))])
+            self._intact[min_piece_m] = prefix
+        return prefix
+
+
+def _cumulative(x: np.ndarray, starts: np.ndarray, lengths: np.ndarray, prefix: np.ndarray) -> np.ndarray:
+    """Longitud acumulada bajo ``x`` de intervalos ordenados y disjuntos.
+
+    ``prefix`` es la suma prefija de la longitud *contada* de cada intervalo
+    (0 para los que no cuentan), por eso el tramo parcial se escala.
+    """
+    if not len(starts):
+        return np.zeros(np.shape(x))
+    k = np.searchsorted(starts, x, side="right") - 1
+    kk = np.maximum(k, 0)
+    counted = prefix[kk + 1] - prefix[kk]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        share = np.where(lengths[kk] > 0, counted / lengths[kk], 0.0)
+    partial = np.clip(x - starts[kk], 0.0, lengths[kk]) * share
+    return np.where(k >= 0, prefix[kk] + partial, 0.0)
+
+
+class DepthIndex:
+    """
+    Índice de fracturas por profundidad para varios sondajes.
+
+    Args:
+        path: Archivo ``.npz`` para :meth:`save` / :meth:`load` (opcional).
+    """
+
+    def __init__(self, path: Optional[os.PathLike] = None):
+        self.path = Path(path) if path else None
+        self._holes: Dict[str, _Hole] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def holes(self) -> List[str]:
+        return sorted(self._holes)
+
+    def add_run(self, hole: str, from_m: float, to_m: float, fracture_depths_m: Iterable[float]) -> int:
+        """
+        Inserta (o reemplaza) el tramo ``[from_m, to_m)`` de ``hole``.
+
+        Returns:
+            Número de fracturas insertadas (las que caen fuera del tramo se descartan).
+        """
+        from_m, to_m = float(from_m), float(to_m)
+        if not to_m > from_m:
+            raise ValueError("El tramo debe cumplir desde < hasta.")
+        depths = np.sort(np.asarray(list(fracture_depths_m), dtype=np.float64))
+        depths = depths[(depths >= from_m) & (depths < to_m)]
+        with self._lock:
+            self._holes.setdefault(str(hole), _Hole()).insert(from_m, to_m, depths)
+        return int(depths.size)
+
+    def add_tray(self, hole: str, tray_result: dict) -> int:
+        """Inserta cada fila del registro de :func:`src.core_tray.analyze_core_tray`."""
+        return sum(
+            self.add_run(hole, row["from_m"], row["to_m"], row.get("fracture_depths_m", ()))
+            for row in tray_result["log"]
+        )
+
+    def query(
+        self,
+        hole: str,
+        from_m: float,
+        to_m: float,
+        bin_m: float = 1.0,
+        *,
+        min_piece_m: float = 0.1,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Frecuencia y RQD por bins de profundidad.
+
+        Args:
+            hole: Identificador del sondaje.
+            from_m, to_m: Intervalo consultado (m).
+            bin_m: Ancho de bin (m); el último bin puede ser más corto.
+            min_piece_m: Longitud mínima de pieza intacta para el RQD (m).
+
+        Returns:
+            dict con ``edges`` (bins + 1), ``fractures``, ``logged_m``,
+            ``frequency_per_m`` y ``rqd_percent`` (NaN donde no hay registro,
+            también en todos los bins si el sondaje no está en el índice).
+        """
+        if bin_m <= 0 or not to_m > from_m:
+            raise ValueError("Se requiere bin_m > 0 y desde < hasta.")
+        edges = np.arange(from_m, to_m, bin_m, dtype=np.float64)
+        edges = np.append(edges, to_m)
+        with self._lock:
+            data = self._holes.get(str(hole)) or _Hole()
+            runs = data.runs
+            logged = np.diff(
+                _cumulative(edges, runs[:, 0], runs[:, 1] - runs[:, 0], data.logged_prefix())
+            )
+            starts, lengths = data.pieces()
+            intact = np.diff(_cumulative(edges, starts, lengths, data.intact_prefix(min_piece_m)))
+            counts = np.diff(np.searchsorted(data.fractures, edges, side="left"))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return {
+                "edges": edges,
+                "fractures": counts,
+                "logged_m": logged,
+                "frequency_per_m": np.where(logged > 0, counts / logged, np.nan),
+                "rqd_percent": np.where(logged > 0, 100.0 * intact / logged, np.nan),
+            }
+
+    def runs(self, hole: str) -> np.ndarray:
+        """Tramos registrados ``(n, 2)`` de ``hole``."""
+        with self._lock:
+            data = self._holes.get(str(hole))
+            return data.runs.copy() if data else np.zeros((0, 2))
+
+    def save(self, path: Optional[os.PathLike] = None) -> Path:
+        """Guarda el índice en ``.npz`` (escritura atómica)."""
+        target = Path(path) if path else self.path
+        if target is None:
+            raise ValueError("No hay ruta para guardar el índice.")
+        with self._lock:
+            names = sorted(self._holes)
+            arrays = {"holes": np.array(names, dtype=np.str_)}
+            for i, name in enumerate(names):
+                arrays[f"runs_{i}"] = self._holes[name].runs
+                arrays[f"fractures_{i}"] = self._holes[name].fractures
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(target.name + ".tmp")
+        with tmp.open("wb") as fh:
+            np.savez(fh, **arrays)
+        os.replace(tmp, target)
+        return target
+
+    @classmethod
+    def load(cls, path: os.PathLike) -> "DepthIndex":
+        """Carga un índice guardado; si el archivo no existe devuelve uno vacío."""
+        index = cls(path)
+        if index.path.exists():
+            with np.load(index.path, allow_pickle=False) as data:
+                for i, name in enumerate(data["holes"]):
+                    index._holes[str(name)] = _Hole(data[f"runs_{i}"], data[f"fractures_{i}"])
+        return index
+
+
+_default_index: Optional[DepthIndex] = None
+_default_lock = threading.Lock()
+
+
+def get_depth_index() -> DepthIndex:
+    """Índice compartido por el proceso, cargado desde ``DEPTH_INDEX_SETTINGS``."""
+    global _default_index
+    with _default_lock:
+        if _default_index is None:
+            path = os.environ.get("FF_DEPTH_INDEX", DEPTH_INDEX_SETTINGS["path"])
+            _default_index = DepthIndex.load(path)
+        return _default_index
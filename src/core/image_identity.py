@@ -0,0 +1,92 @@
+"""Identidad de imágenes: hash rápido calculado una sola vez por imagen y ROI.
+
+El hash se obtiene con BLAKE2b sobre los bytes originales del archivo subido
+(o sobre un buffer sin copia del array) y se combina con la caja del ROI. El
+resultado es la clave única usada por el almacén de escala, las cachés de
+resultados y las exportaciones.
+
+Funciones
+---------
+    hash_bytes(data) -> str
+    hash_array(array) -> str
+    source_hash(source) -> str
+    roi_hash(image_hash, box) -> str
+    short_hash(image_hash) -> str
+"""
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from typing import Mapping, Optional
+
+import numpy as np
+
+__all__ = [
+    "hash_bytes",
+    "hash_array",
+    "source_hash",
+    "roi_hash",
+    "short_hash",
+]
+
+# 16 bytes (32 caracteres hex) son más que suficientes para distinguir imágenes.
+DIGEST_SIZE = 16
+
+
+def hash_bytes(data) -> str:  # noqa: ANN001
+    """Hash BLAKE2b de un objeto con protocolo buffer (``bytes``, ``memoryview``...)."""
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE).hexdigest()
+
+
+def hash_array(array: np.ndarray) -> str:
+    """Hash BLAKE2b de un array incluyendo forma y tipo.
+
+    Si el array ya es C-contiguo se lee directamente su buffer (sin la copia
+    que implica ``array.tobytes()``).
+    """
+    arr = np.ascontiguousarray(array)
+    hasher = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    hasher.update(f"{arr.dtype.str}{arr.shape}".encode())
+    hasher.update(memoryview(arr).cast("B"))
+    return hasher.hexdigest()
+
+
+def source_hash(source) -> str:  # noqa: ANN001
+    """Hash de una fuente de imagen usando sus bytes crudos cuando es posible.
+
+    Acepta los mismos tipos que :func:`src.image_io.load_image`.
+    """
+    # UploadedFile de Streamlit (BytesIO) expone el buffer sin copiarlo
+    if hasattr(source, "getbuffer"):
+        with source.getbuffer() as buffer:
+            return hash_bytes(buffer)
+    if hasattr(source, "read"):
+        data = source.read()
+        if hasattr(source, "seek"):
+            try:
+                source.seek(0)
+            except Exception:  # noqa: BLE001
+                pass
+        return hash_bytes(data)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return hash_bytes(source)
+    if isinstance(source, (str, Path)):
+        return hash_bytes(Path(source).read_bytes())
+    # PIL.Image.Image u otros objetos convertibles a array
+    return hash_array(np.asarray(source))
+
+
+def roi_hash(image_hash: str, box: Optional[Mapping[str, int]]) -> str:
+    """Combina el hash de la imagen con la caja del ROI (``left, top, width, height``).
+
+    Sin caja (imagen completa) se devuelve el hash de la imagen sin cambios.
+    """
+    if not box:
+        return image_hash
+    key = "{}:{left},{top},{width},{height}".format(image_hash, **box)
+    return hash_bytes(key.encode())
+
+
+def short_hash(image_hash: str) -> str:
+    """Versión corta (8 caracteres) para mostrar en la UI y en nombres de archivo."""
+    return image_hash[:8]
@@ -2,10 +2,11 @@
 
 import numpy as np
 from PIL import Image
-from streamlit_cropper import st_cropper
 import streamlit as st
 
 from src import image_io
+from src.core import image_identity
+from src.core.session_memory import get_session_memory
 
 
 class ImageProcessor:
@@ -17,18 +18,35 @@ class ImageProcessor:
         """Inicializa el procesador de imágenes."""
         self.original_image = None
         self.cropped_image = None
+        self.image_hash = None
+        self.roi_box = None
+        self.roi_hash = None
     
     def load_and_display_image(self, image_source) -> np.ndarray:
         """
         Carga y muestra la imagen original.
         
+        El hash de identidad se calcula una sola vez por archivo subido y se
+        conserva en ``st.session_state`` entre re-ejecuciones; la imagen
+        decodificada se retiene en la memoria de la sesión (ver
+        :mod:`src.core.session_memory`) mientras quepa en el presupuesto.
+        
         Args:
             image_source: Fuente de imagen (archivo o cámara)
             
         Returns:
             np.ndarray: Imagen original como array numpy
         """
-        self.original_image = image_io.load_image(image_source)
+        self.image_hash = self._identify_source(image_source)
+        memory = get_session_memory()
+        self.original_image = memory.get("original", tag=self.image_hash)
+        if self.original_image is None:
+            self.original_image = memory.put(
+                "original",
+                image_io.load_image(image_source),
+                tag=self.image_hash,
+                derived=False,
+            )
         st.image(
             self.original_image, 
             caption="Imagen original", 
@@ -40,19 +58,39 @@ class ImageProcessor:
         """
         Permite al usuario seleccionar una región de interés (ROI) de la imagen.
         
+        El ROI se obtiene como caja (``return_type="box"``) y se recorta por
+        slicing, de modo que ``roi_hash`` combina el hash de la imagen con la
+        caja sin volver a recorrer los píxeles.
+        
         Args:
             image: Imagen original
             
         Returns:
             np.ndarray: Imagen recortada
         """
+        from streamlit_cropper import st_cropper
+        
         st.subheader("✂️ Seleccionar muestra (ROI)")
-        cropped_pil = st_cropper(
+        box = st_cropper(
             Image.fromarray(image), 
             realtime_update=False, 
-            box_color='red'
+            box_color='red',
+            return_type='box'
         )
-        self.cropped_image = np.array(cropped_pil)
+        left, top = int(box["left"]), int(box["top"])
+        width, height = int(box["width"]), int(box["height"])
+        self.roi_box = {"left": left, "top": top, "width": width, "height": height}
+        if self.image_hash is None:
+            self.image_hash = image_identity.hash_array(image)
+        self.roi_hash = image_identity.roi_hash(self.image_hash, self.roi_box)
+        memory = get_session_memory()
+        self.cropped_image = memory.get("roi", tag=self.roi_hash)
+        if self.cropped_image is None:
+            self.cropped_image = memory.put(
+                "roi",
+                np.ascontiguousarray(image[top:top + height, left:left + width]),
+                tag=self.roi_hash,
+            )
         st.image(
             self.cropped_image, 
             caption="Muestra seleccionada", 
@@ -68,3 +106,25 @@ class ImageProcessor:
             np.ndarray: Imagen procesada
         """
         return self.cropped_image if self.cropped_image is not None else self.original_image
+
+    
+    def get_image_hash(self) -> str:
+        """
+        Retorna la clave de identidad de la imagen procesada (ROI si existe).
+        
+        Returns:
+            str: Hash de la imagen/ROI
+        """
+        return self.roi_hash if self.roi_hash is not None else self.image_hash
+    
+    @staticmethod
+    def _identify_source(image_source) -> str:
+        """Calcula (o reutiliza) el hash de la fuente de imagen para la sesión."""
+        file_id = getattr(image_source, "file_id", None)
+        cached = st.session_state.get("_image_identity")
+        if file_id is not None and cached and cached[0] == file_id:
+            return cached[1]
+        image_hash = image_identity.source_hash(image_source)
+        if file_id is not None:
+            st.session_state["_image_identity"] = (file_id, image_hash)
+        return image_hash
@@ -0,0 +1,59 @@
+"""Almacén de registros *append-only* en formato JSON Lines.
+
+Cada registro es una línea JSON. Las escrituras se serializan con un lock y se
+vacían a disco inmediatamente, de modo que un proceso interrumpido conserva
+todos los registros completos (útil como checkpoint reanudable).
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, Set
+
+__all__ = ["JsonlStore"]
+
+
+class JsonlStore:
+    """
+    Archivo JSONL de sólo anexado.
+
+    Args:
+        path: Ruta del archivo (se crea al primer registro).
+    """
+
+    def __init__(self, path: os.PathLike):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Anexa un registro y lo vacía a disco."""
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as fh:
+                fh.write(line + "\n")
+                fh.flush()
+                os.fsync(fh.fileno())
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Itera los registros completos (ignora una última línea truncada)."""
+        if not self.path.exists():
+            return
+        with self.path.open("r", encoding="utf-8") as fh:
+            for line in fh:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    def keys(self, field: str = "key") -> Set[Any]:
+        """Conjunto de valores de ``field`` ya registrados."""
+        return {record.get(field) for record in self}
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
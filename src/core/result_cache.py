@@ -0,0 +1,296 @@
+"""Caché de resultados de análisis en dos niveles (memoria LRU + disco).
+
+Los resultados de ``detect_cracks`` y ``particle_sizes`` se indexan por el hash
+de la imagen/ROI y los parámetros del análisis. El primer nivel es un LRU en
+memoria limitado por bytes; al desalojar o almacenar, los resultados se
+serializan comprimidos (pickle + zlib) en un directorio local cuyo tamaño
+también está acotado (se borran primero los archivos usados hace más tiempo).
+La serialización, la compresión y la escritura a un archivo temporal se hacen
+fuera del candado, igual que la lectura y deserialización desde disco; éste
+sólo protege los índices (LRU en memoria y tamaños en disco), así que un
+resultado grande no bloquea las lecturas de otras sesiones.
+
+Los arrays almacenados se marcan como sólo lectura, porque el mismo objeto se
+comparte entre re-ejecuciones y sesiones.
+
+Clases
+------
+    CacheStats
+        Contadores de aciertos, fallos y desalojos.
+    ResultCache
+        Caché de dos niveles con ``get``, ``put`` y ``get_or_compute``.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from src.utils.constants import CACHE_SETTINGS
+
+__all__ = ["CacheStats", "ResultCache", "get_result_cache", "nbytes"]
+
+_DISK_SUFFIX = ".pkl.z"
+
+
+def nbytes(value: Any) -> int:
+    """Estimación del tamaño en bytes de un resultado (arrays, listas, dicts)."""
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(nbytes(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(nbytes(v) for v in value.values())
+    size = getattr(value, "nbytes", None)  # objetos que informan su tamaño
+    return int(size) if isinstance(size, (int, np.integer)) else sys.getsizeof(value)
+
+
+def _freeze(value: Any) -> Any:
+    """Marca como sólo lectura todos los arrays contenidos en ``value``."""
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _freeze(item)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _freeze(item)
+    return value
+
+
+class CacheStats:
+    """Contadores de uso de la caché."""
+
+    def __init__(self):
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.memory_evictions = 0
+        self.disk_evictions = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float:
+        """Fracción de consultas resueltas por la caché (0-1)."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_evictions": self.memory_evictions,
+            "disk_evictions": self.disk_evictions,
+            "hit_rate": round(self.hit_rate, 4),
+        }
+
+
+class ResultCache:
+    """
+    Caché de resultados en dos niveles.
+
+    Args:
+        max_memory_bytes: Presupuesto del LRU en memoria.
+        cache_dir: Directorio para el nivel en disco (``None`` lo desactiva).
+        max_disk_bytes: Tamaño máximo del directorio en disco.
+        compress_level: Nivel de compresión zlib (1 = rápido).
+    """
+
+    def __init__(
+        self,
+        *,
+        max_memory_bytes: int = 256 * 1024**2,
+        cache_dir: Optional[os.PathLike] = None,
+        max_disk_bytes: int = 1024**3,
+        compress_level: int = 1,
+    ):
+        self.max_memory_bytes = int(max_memory_bytes)
+        self.max_disk_bytes = int(max_disk_bytes)
+        self.compress_level = compress_level
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.stats = CacheStats()
+        self._lock = threading.RLock()
+        self._memory: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_sizes: "OrderedDict[str, int]" = OrderedDict()
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._scan_disk()
+
+    # --- Claves -------------------------------------------------------------
+    @staticmethod
+    def make_key(namespace: str, image_hash: str, params: Dict[str, Any]) -> str:
+        """Clave determinista a partir del análisis, la imagen y los parámetros."""
+        payload = json.dumps(
+            [namespace, image_hash, params], sort_keys=True, default=str
+        )
+        return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+    # --- API pública --------------------------------------------------------
+    def get(self, key: str, *, record: bool = True) -> Tuple[bool, Any]:
+        """Devuelve ``(encontrado, valor)`` buscando en memoria y luego en disco.
+
+        Con ``record=False`` la consulta no altera las estadísticas (útil para
+        re-verificar una clave ya contabilizada).
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                if record:
+                    self.stats.memory_hits += 1
+                return True, entry[0]
+            on_disk = self.cache_dir is not None and key in self._disk_sizes
+        # La lectura, descompresión y deserialización se hacen sin el candado
+        value = self._read_disk(key) if on_disk else None
+        with self._lock:
+            if value is not None:
+                if record:
+                    self.stats.disk_hits += 1
+                self._put_memory(key, value)
+                if key in self._disk_sizes:
+                    self._disk_sizes.move_to_end(key)
+                return True, value
+            if record:
+                self.stats.misses += 1
+            return False, None
+
+    def put(self, key: str, value: Any) -> Any:
+        """Almacena ``value`` en ambos niveles y lo devuelve congelado."""
+        _freeze(value)
+        with self._lock:
+            self._put_memory(key, value)
+            to_disk = self.cache_dir is not None and key not in self._disk_sizes
+        if to_disk:
+            self._write_disk(key, value)
+        return value
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Devuelve el valor cacheado o lo calcula y almacena."""
+        found, value = self.get(key)
+        if found:
+            return value
+        return self.put(key, compute())
+
+    def clear(self) -> None:
+        """Vacía ambos niveles (no reinicia las estadísticas)."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            for key in list(self._disk_sizes):
+                self._remove_disk(key)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._memory_bytes
+
+    @property
+    def disk_bytes(self) -> int:
+        return sum(self._disk_sizes.values())
+
+    # --- Nivel en memoria ---------------------------------------------------
+    def _put_memory(self, key: str, value: Any) -> None:
+        size = nbytes(value)
+        if key in self._memory:
+            self._memory_bytes -= self._memory.pop(key)[1]
+        if size > self.max_memory_bytes:
+            return  # demasiado grande: sólo queda en disco
+        self._memory[key] = (value, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_memory_bytes:
+            _, (_, evicted_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+            self.stats.memory_evictions += 1
+
+    # --- Nivel en disco -----------------------------------------------------
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{_DISK_SUFFIX}"
+
+    def _scan_disk(self) -> None:
+        entries = []
+        for path in self.cache_dir.glob(f"*{_DISK_SUFFIX}"):
+            stat = path.stat()
+            entries.append((stat.st_mtime, path.name[: -len(_DISK_SUFFIX)], stat.st_size))
+        for _, key, size in sorted(entries):  # más antiguo primero
+            self._disk_sizes[key] = size
+
+    def _read_disk(self, key: str) -> Any:
+        """Lee sin el candado; sólo lo toma para borrar una entrada ilegible."""
+        path = self._path(key)
+        try:
+            value = pickle.loads(zlib.decompress(path.read_bytes()))
+            os.utime(path)  # conserva el orden LRU entre reinicios del proceso
+        except (OSError, zlib.error, pickle.UnpicklingError, EOFError):
+            with self._lock:
+                self._remove_disk(key)
+            return None
+        return _freeze(value)
+
+    def _write_disk(self, key: str, value: Any) -> None:
+        """Serializa y escribe sin el candado; sólo la publicación lo toma."""
+        data = zlib.compress(
+            pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), self.compress_level
+        )
+        if len(data) > self.max_disk_bytes:
+            return
+        # Nombre temporal único: dos hilos pueden escribir la misma clave
+        fd, tmp_name = tempfile.mkstemp(dir=self.cache_dir, prefix=f"{key}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            with self._lock:
+                if key in self._disk_sizes:
+                    return  # otro hilo ya la publicó
+                os.replace(tmp_name, self._path(key))
+                self._disk_sizes[key] = len(data)
+                self._evict_disk()
+        finally:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+
+    def _evict_disk(self) -> None:
+        total = self.disk_bytes
+        while total > self.max_disk_bytes and self._disk_sizes:
+            key = next(iter(self._disk_sizes))  # el usado hace más tiempo
+            total -= self._disk_sizes[key]
+            self._remove_disk(key)
+            self.stats.disk_evictions += 1
+
+    def _remove_disk(self, key: str) -> None:
+        self._disk_sizes.pop(key, None)
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+
+_default_cache: Optional[ResultCache] = None
+_default_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """Instancia de caché compartida por todo el proceso (todas las sesiones)."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            cache_dir = os.environ.get("FF_CACHE_DIR", CACHE_SETTINGS["disk_dir"])
+            _default_cache = ResultCache(
+                max_memory_bytes=CACHE_SETTINGS["memory_mb"] * 1024**2,
+                cache_dir=cache_dir or None,
+                max_disk_bytes=CACHE_SETTINGS["disk_mb"] * 1024**2,
+            )
+        return _default_cache
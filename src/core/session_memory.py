@@ -0,0 +1,127 @@
+"""Presupuesto de memoria por sesión para los arrays que conserva la UI.
+
+Cada sesión de Streamlit guarda la imagen original, el ROI y los resultados de
+los análisis (esqueleto, máscara, imagen anotada, etiquetas de fragmentos).
+:class:`SessionMemory` registra el tamaño en bytes de cada artefacto y, si se
+supera el presupuesto, desaloja primero los artefactos *derivados* (que pueden
+recuperarse de la caché de resultados) y sólo después las fuentes, siempre en
+orden LRU.
+
+Cada artefacto ocupa un nombre fijo (``"original"``, ``"grietas"``...) y lleva
+una etiqueta (p. ej. el hash de la imagen); al guardar una versión nueva se
+reemplaza la anterior.
+"""
+from __future__ import annotations
+
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from src.core.result_cache import nbytes
+from src.utils.constants import SESSION_MEMORY_SETTINGS
+
+__all__ = ["SessionMemory", "default_budget_bytes", "get_session_memory"]
+
+_SESSION_KEY = "_session_memory"
+
+
+class _Entry:
+    __slots__ = ("value", "tag", "nbytes", "derived", "stored_at")
+
+    def __init__(self, value: Any, tag: Hashable, derived: bool):
+        self.value = value
+        self.tag = tag
+        self.nbytes = nbytes(value)
+        self.derived = derived
+        self.stored_at = time.time()
+
+
+class SessionMemory:
+    """
+    Registro de artefactos de una sesión con presupuesto en bytes.
+
+    Args:
+        budget_bytes: Máximo de bytes retenidos por la sesión.
+    """
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = int(budget_bytes)
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.evictions = 0
+        self.evicted_bytes = 0
+
+    def put(self, name: str, value: Any, *, tag: Hashable = None, derived: bool = True) -> Any:
+        """Guarda ``value`` bajo ``name`` (reemplaza la versión anterior) y lo devuelve."""
+        self._entries.pop(name, None)
+        self._entries[name] = _Entry(value, tag, derived)
+        self._enforce(keep=name)
+        return value
+
+    def get(self, name: str, tag: Hashable = None, default: Any = None) -> Any:
+        """Artefacto ``name`` si existe y su etiqueta coincide (``tag=None``: cualquiera)."""
+        entry = self._entries.get(name)
+        if entry is None or (tag is not None and entry.tag != tag):
+            return default
+        self._entries.move_to_end(name)
+        return entry.value
+
+    def tag(self, name: str) -> Optional[Hashable]:
+        """Etiqueta del artefacto ``name`` (``None`` si no está)."""
+        entry = self._entries.get(name)
+        return entry.tag if entry is not None else None
+
+    def discard(self, name: str) -> None:
+        self._entries.pop(name, None)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    @property
+    def used_bytes(self) -> int:
+        return sum(e.nbytes for e in self._entries.values())
+
+    def _enforce(self, keep: str) -> None:
+        """Desaloja en orden LRU, derivados primero, hasta cumplir el presupuesto."""
+        for derived in (True, False):
+            for name in [n for n, e in self._entries.items() if e.derived is derived]:
+                if self.used_bytes <= self.budget_bytes:
+                    return
+                if name == keep:
+                    continue
+                entry = self._entries.pop(name)
+                self.evictions += 1
+                self.evicted_bytes += entry.nbytes
+
+    def usage(self) -> Dict[str, Any]:
+        """Resumen de uso para el panel de diagnóstico."""
+        derived = sum(e.nbytes for e in self._entries.values() if e.derived)
+        total = self.used_bytes
+        return {
+            "budget_bytes": self.budget_bytes,
+            "used_bytes": total,
+            "source_bytes": total - derived,
+            "derived_bytes": derived,
+            "evictions": self.evictions,
+            "evicted_bytes": self.evicted_bytes,
+            "entries": {
+                name: {"bytes": e.nbytes, "derived": e.derived}
+                for name, e in self._entries.items()
+            },
+        }
+
+
+def default_budget_bytes() -> int:
+    """Presupuesto configurado (``FF_SESSION_MEMORY_MB`` o la constante)."""
+    mb = os.environ.get("FF_SESSION_MEMORY_MB") or SESSION_MEMORY_SETTINGS["budget_mb"]
+    return int(float(mb) * 1024**2)
+
+
+def get_session_memory() -> SessionMemory:
+    """Registro de memoria de la sesión de Streamlit actual."""
+    import streamlit as st
+
+    memory = st.session_state.get(_SESSION_KEY)
+    if memory is None:
+        memory = st.session_state[_SESSION_KEY] = SessionMemory(default_budget_bytes())
+    return memory
@@ -0,0 +1,95 @@
+"""Coordinación *single-flight* de cálculos entre sesiones del mismo proceso.
+
+Cuando varias sesiones de Streamlit (hilos del mismo servidor) solicitan el
+mismo análisis (hash de imagen + parámetros) a la vez, sólo la primera lo
+ejecuta; las demás esperan a que termine y reciben el mismo resultado, que se
+comparte en modo sólo lectura. La tabla de cálculos en curso sólo contiene
+entradas mientras se calculan, y un semáforo limita cuántos cálculos distintos
+pueden ejecutarse simultáneamente.
+
+Clases
+------
+    SingleFlight
+        ``do(key, fn)`` ejecuta ``fn`` una sola vez por clave en curso.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Dict, Optional
+
+__all__ = ["SingleFlight", "get_single_flight"]
+
+
+class _Call:
+    """Cálculo en curso para una clave."""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Deduplica cálculos concurrentes con la misma clave.
+
+    Args:
+        max_in_flight: Máximo de claves distintas calculándose a la vez; el
+            resto de líderes espera turno (acota CPU y memoria de trabajo).
+    """
+
+    def __init__(self, max_in_flight: int = 4):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self.executions = 0
+        self.shared = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Ejecuta ``fn`` para ``key`` o espera el resultado del cálculo en curso."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            with self._lock:
+                self.shared += 1
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            with self._slots:
+                call.result = fn()
+        except BaseException as exc:  # noqa: BLE001
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self.executions += 1
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self) -> int:
+        """Número de claves calculándose en este momento."""
+        with self._lock:
+            return len(self._calls)
+
+
+_default_flight: Optional[SingleFlight] = None
+_default_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """Coordinador compartido por todo el proceso."""
+    global _default_flight
+    with _default_lock:
+        if _default_flight is None:
+            _default_flight = SingleFlight()
+        return _default_flight
@@ -0,0 +1,253 @@
+"""Segmentación de bandejas de testigos en filas y registro continuo por profundidad.
+
+Una fotografía de bandeja contiene 4–6 filas (canales) de testigo separadas
+por divisores lisos. :func:`detect_core_rows` localiza las filas con perfiles
+de proyección:
+
+1. Perfil de textura por fila de píxeles (media de ``|∂I/∂x|``): el testigo es
+   texturado y los divisores son uniformes. Un umbral de Otsu sobre el perfil
+   suavizado separa filas de divisores.
+2. Cada límite se ajusta al máximo del perfil de bordes horizontales
+   (``|∂I/∂y|``) en un entorno cercano.
+3. Dentro de cada fila, el perfil de textura por columna recorta los tramos
+   vacíos del canal.
+
+:func:`analyze_core_tray` ejecuta la detección de grietas y las scanlines en
+cada fila en paralelo y encadena las filas (de arriba hacia abajo) en un
+registro continuo de profundidad ``desde``/``hasta``.
+"""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+__all__ = ["detect_core_rows", "analyze_core_tray", "RUN_LOG_COLUMNS"]
+
+RUN_LOG_COLUMNS = [
+    "row",
+    "from_m",
+    "to_m",
+    "length_m",
+    "crack_count",
+    "intersections",
+    "frequency_per_m",
+    "rqd_percent",
+]
+
+
+def _smooth(profile: np.ndarray, window: int) -> np.ndarray:
+    window = max(1, int(window))
+    kernel = np.ones(window) / window
+    return np.convolve(np.pad(profile, window // 2, mode="edge"), kernel, mode="valid")[: profile.size]
+
+
+def _otsu_threshold(values: np.ndarray) -> float:
+    """Umbral de Otsu sobre valores continuos (histograma de 256 intervalos)."""
+    hist, edges = np.histogram(values, bins=256)
+    centers = (edges[:-1] + edges[1:]) / 2
+    weight = np.cumsum(hist)
+    total = weight[-1]
+    mean_low = np.cumsum(hist * centers) / np.maximum(weight, 1)
+    mean_high = (np.sum(hist * centers) - np.cumsum(hist * centers)) / np.maximum(total - weight, 1)
+    between = weight * (total - weight) * (mean_low - mean_high) ** 2
+    return float(centers[np.argmax(between)])
+
+
+def _bands(active: np.ndarray) -> List[List[int]]:
+    """Intervalos ``[inicio, fin)`` de valores ``True`` consecutivos."""
+    edges = np.diff(np.concatenate([[0], active.astype(np.int8), [0]]))
+    return [list(b) for b in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1))]
+
+
+def detect_core_rows(
+    image: np.ndarray,
+    *,
+    expected_rows: Optional[int] = None,
+    min_row_fraction: float = 0.05,
+) -> List[Dict[str, int]]:
+    """
+    Detecta las filas de testigo de una bandeja.
+
+    Args:
+        image: Imagen RGB (H, W, 3) o en escala de grises.
+        expected_rows: Número de filas conocido; se conservan las más altas.
+        min_row_fraction: Altura mínima de fila como fracción de la imagen.
+
+    Returns:
+        Lista (de arriba hacia abajo) de cajas ``{"row", "top", "bottom",
+        "left", "right"}`` con límites exclusivos en ``bottom``/``right``.
+    """
+    gray = image.mean(axis=2) if image.ndim == 3 else image.astype(np.float64)
+    h, w = gray.shape
+    grad_x = np.abs(np.diff(gray, axis=1))
+    grad_y = np.abs(np.diff(gray, axis=0))
+
+    texture = _smooth(grad_x.mean(axis=1), h // 100 + 3)
+    active = texture > _otsu_threshold(texture)
+    min_height = max(3, int(min_row_fraction * h))
+    # Cerrar huecos cortos dentro de una fila (grietas horizontales, sombras)
+    for start, end in _bands(~active):
+        if 0 < start and end < h and end - start < min_height // 2:
+            active[start:end] = True
+    bands = [b for b in _bands(active) if b[1] - b[0] >= min_height]
+    if expected_rows is not None and len(bands) > expected_rows:
+        tallest = sorted(bands, key=lambda b: b[1] - b[0], reverse=True)[:expected_rows]
+        bands = sorted(tallest)
+
+    # Ajuste de límites al borde horizontal más fuerte en un entorno cercano
+    edge_profile = grad_y.mean(axis=1)
+    margin = max(2, min_height // 4)
+    for band in bands:
+        for side in (0, 1):
+            lo = max(0, band[side] - margin)
+            hi = min(edge_profile.size, band[side] + margin)
+            if hi > lo:
+                band[side] = lo + int(np.argmax(edge_profile[lo:hi])) + 1
+    bands = [b for b in bands if b[1] - b[0] >= min_height]
+
+    rows = []
+    window = w // 100 + 3
+    for i, (top, bottom) in enumerate(bands):
+        column_edges = grad_x[top:bottom].mean(axis=0)
+        column_texture = _smooth(column_edges, window)
+        filled = np.flatnonzero(column_texture > 0.5 * np.median(column_texture))
+        left, right = (int(filled[0]), int(filled[-1]) + 1) if filled.size else (0, w)
+        # Extremos del canal: borde vertical más fuerte dentro de la ventana
+        lo, hi = left, min(left + window, w - 1)
+        left = lo + int(np.argmax(column_edges[lo:hi])) + 1 if hi > lo else left
+        lo, hi = max(right - window, 0), right
+        right = lo + int(np.argmax(column_edges[lo:hi])) + 1 if hi > lo else w
+        rows.append({"row": i + 1, "top": int(top), "bottom": int(bottom), "left": left, "right": right})
+    return rows
+
+
+def _analyze_row(
+    crop: np.ndarray,
+    *,
+    scale_px_per_m: float,
+    min_length_px: int,
+    image_hash: Optional[str],
+    box: Dict[str, int],
+) -> dict:
+    from src.scanlines import scanline_survey
+
+    if image_hash is not None:
+        from src.core import analysis, image_identity
+
+        _, crack_mask, crack_info = analysis.detect_cracks(
+            crop,
+            image_hash=image_identity.roi_hash(
+                image_hash,
+                {"left": box["left"], "top": box["top"],
+                 "width": box["right"] - box["left"], "height": box["bottom"] - box["top"]},
+            ),
+            min_length_px=min_length_px,
+        )
+    else:
+        from src import crack_detection
+
+        _, crack_mask, crack_info = crack_detection.detect_cracks(crop, min_length_px=min_length_px)
+    # Scanlines a lo largo del eje del testigo (horizontal en la bandeja)
+    survey = scanline_survey(
+        crack_mask,
+        scale_px_per_m=scale_px_per_m,
+        angles_deg=(0.0,),
+        line_spacing_px=max(2.0, crop.shape[0] / 8),
+    )
+    return {
+        "crack_count": len(crack_info),
+        "crack_x_px": [float(c["centroid"][0]) for c in crack_info],
+        "intersections_per_line": float(survey.intersections[0] / max(survey.lines[0], 1)),
+        "frequency_per_m": float(survey.frequency_per_m[0]),
+        "rqd_percent": float(survey.rqd_percent[0]),
+    }
+
+
+def analyze_core_tray(
+    image: np.ndarray,
+    *,
+    scale_px_per_m: float,
+    from_m: float = 0.0,
+    min_length_px: int = 50,
+    expected_rows: Optional[int] = None,
+    image_hash: Optional[str] = None,
+    workers: int = 4,
+    progress: Optional[Callable[[str, float], None]] = None,
+) -> dict:
+    """
+    Analiza cada fila de la bandeja en paralelo y arma el registro por profundidad.
+
+    Args:
+        image: Imagen RGB de la bandeja.
+        scale_px_per_m: Escala (px/m) a lo largo del testigo.
+        from_m: Profundidad del inicio de la primera fila.
+        min_length_px: Longitud mínima de grieta (px).
+        expected_rows: Número de filas conocido (``None`` = automático).
+        image_hash: Hash de la imagen; si se indica, cada fila usa la caché
+            de resultados con el hash de su caja.
+        workers: Hilos de análisis (OpenCV libera el GIL).
+        progress: ``progress(etapa, fraccion)``.
+
+    Returns:
+        dict con ``rows`` (cajas), ``log`` (filas de :data:`RUN_LOG_COLUMNS`
+        más ``fracture_depths_m``) y ``total`` (resumen del tramo completo).
+    """
+    report = progress or (lambda stage, fraction: None)
+    report("Detección de filas", 0.0)
+    rows = detect_core_rows(image, expected_rows=expected_rows)
+    if not rows:
+        return {"rows": [], "log": [], "total": None}
+
+    def run(box: Dict[str, int]) -> dict:
+        crop = np.ascontiguousarray(image[box["top"]:box["bottom"], box["left"]:box["right"]])
+        return _analyze_row(
+            crop, scale_px_per_m=scale_px_per_m, min_length_px=min_length_px,
+            image_hash=image_hash, box=box,
+        )
+
+    results: List[dict] = [None] * len(rows)  # type: ignore[list-item]
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="bandeja") as pool:
+        futures = {pool.submit(run, box): i for i, box in enumerate(rows)}
+        # Progreso en orden de finalización: una fila lenta no frena el avance
+        for done, future in enumerate(as_completed(futures), start=1):
+            results[futures[future]] = future.result()
+            report(f"Fila {done}/{len(rows)}", done / len(rows))
+
+    log = []
+    depth = float(from_m)
+    for box, res in zip(rows, results):
+        length = (box["right"] - box["left"]) / scale_px_per_m
+        log.append(
+            {
+                "row": box["row"],
+                "from_m": round(depth, 3),
+                "to_m": round(depth + length, 3),
+                "length_m": round(length, 3),
+                "crack_count": res["crack_count"],
+                "intersections": round(res["intersections_per_line"], 2),
+                "frequency_per_m": round(res["frequency_per_m"], 2),
+                "rqd_percent": round(res["rqd_percent"], 1),
+                # Profundidad de cada grieta (centro de su caja) para el índice por profundidad
+                "fracture_depths_m": [
+                    round(depth + x / scale_px_per_m, 4) for x in res["crack_x_px"]
+                ],
+            }
+        )
+        depth += length
+
+    lengths = np.array([r["length_m"] for r in log])
+    total_length = float(lengths.sum())
+    total = {
+        "from_m": log[0]["from_m"],
+        "to_m": log[-1]["to_m"],
+        "length_m": round(total_length, 3),
+        "rows": len(log),
+        "frequency_per_m": round(sum(r["intersections"] for r in log) / total_length, 2)
+        if total_length > 0 else None,
+        # RQD del tramo: ponderado por la longitud de cada fila
+        "rqd_percent": round(float(np.dot(lengths, [r["rqd_percent"] for r in log]) / total_length), 1)
+        if total_length > 0 else None,
+    }
+    return {"rows": rows, "log": log, "total": total}
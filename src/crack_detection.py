@@ -7,22 +7,81 @@ Funciones
 ---------
     detect_cracks(image: np.ndarray, min_length_px: int = 50)
         Devuelve bordes, máscara binaria de grietas y n.º de grietas.
+    crack_skeleton(image)
+        Esqueleto de bordes (etapas 1–4 de ``detect_cracks``).
+    orientation_class(orientation_deg: float | None)
+        Clasifica una orientación en familias de 45° (E–W, NW–SE, N–S, NE–SW).
 """
 from __future__ import annotations
 
-from typing import Tuple
+from typing import Callable, Optional, Tuple
 
 import cv2
 import numpy as np
 from skimage.morphology import skeletonize
 
-__all__ = ["detect_cracks"]
+__all__ = ["crack_skeleton", "detect_cracks", "orientation_class"]
+
+_SQRT2 = float(np.sqrt(2.0))
+
+# Familias de orientación (eje axial 0–180°, eje Y de la imagen hacia abajo)
+_ORIENTATION_CLASSES = ("E–W", "NW–SE", "N–S", "NE–SW")
+
+
+def orientation_class(orientation_deg: Optional[float]) -> Optional[str]:
+    """Clasifica una orientación (grados) en una de 4 familias de 45°."""
+    if orientation_deg is None:
+        return None
+    axial = (orientation_deg + 22.5) % 180.0
+    return _ORIENTATION_CLASSES[int(axial // 45.0) % 4]
+
+
+def _geodesic_length_px(mask: np.ndarray) -> float:
+    """Longitud de un esqueleto contando pasos 8-conectados (h/v = 1, diag = √2).
+
+    Los pasos diagonales sólo se cuentan si no existe un camino ortogonal
+    equivalente (evita duplicar las esquinas en L).
+    """
+    horizontal = np.count_nonzero(mask[:, 1:] & mask[:, :-1])
+    vertical = np.count_nonzero(mask[1:, :] & mask[:-1, :])
+    diag_main = mask[1:, 1:] & mask[:-1, :-1] & ~mask[:-1, 1:] & ~mask[1:, :-1]
+    diag_anti = mask[1:, :-1] & mask[:-1, 1:] & ~mask[:-1, :-1] & ~mask[1:, 1:]
+    diagonal = np.count_nonzero(diag_main) + np.count_nonzero(diag_anti)
+    return float(horizontal + vertical + _SQRT2 * diagonal)
+
+
+def crack_skeleton(
+    image: np.ndarray, report: Callable[[str, float], None] = lambda stage, fraction: None
+) -> np.ndarray:
+    """Preproceso, Canny, cierre morfológico y esqueletización (uint8 0/255).
+
+    Es la parte de :func:`detect_cracks` que recorre todos los píxeles; el
+    análisis multi-ROI la ejecuta una sola vez sobre la unión de las ROIs.
+    """
+    # 1. Pre-proceso: escala de grises y suavizado
+    report("Preproceso", 0.0)
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+
+    # 2. Detección de bordes (Canny)
+    report("Bordes (Canny)", 0.1)
+    edges = cv2.Canny(blurred, 50, 150)
+
+    # 3. Operaciones morfológicas para conectar bordes cercanos
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+    edges_closed = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, kernel, iterations=1)
+
+    # 4. Skeletonize para afinar las líneas (opcional)
+    report("Esqueletización", 0.25)
+    edges_bool = edges_closed > 0
+    return skeletonize(edges_bool).astype(np.uint8) * 255
 
 
 def detect_cracks(
     image: np.ndarray,
     *,
     min_length_px: int = 50,
+    progress: Optional[Callable[[str, float], None]] = None,
 ) -> Tuple[np.ndarray, np.ndarray, list[dict]]:
     """Detecta grietas y devuelve bordes, máscara y total de grietas.
 
@@ -32,6 +91,8 @@ def detect_cracks(
         Imagen RGB (H, W, 3) uint8.
     min_length_px : int, optional
         Longitud/área mínima en píxeles para considerar un segmento como grieta.
+    progress : callable, optional
+        ``progress(etapa, fraccion)`` se invoca al iniciar cada etapa.
 
     Returns
     -------
@@ -42,22 +103,11 @@ def detect_cracks(
     crack_count : int
         Número de grietas detectadas.
     """
-    # 1. Pre-proceso: escala de grises y suavizado
-    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-
-    # 2. Detección de bordes (Canny)
-    edges = cv2.Canny(blurred, 50, 150)
-
-    # 3. Operaciones morfológicas para conectar bordes cercanos
-    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
-    edges_closed = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, kernel, iterations=1)
-
-    # 4. Skeletonize para afinar las líneas (opcional)
-    edges_bool = edges_closed > 0
-    skeleton = skeletonize(edges_bool).astype(np.uint8) * 255
+    report = progress or (lambda stage, fraction: None)
+    skeleton = crack_skeleton(image, report)
 
     # 5. Etiquetado de componentes conectadas
+    report("Componentes", 0.6)
     num_labels, labels, stats, _ = cv2.connectedComponentsWithStats(skeleton, connectivity=8)
 
     crack_mask = np.zeros_like(skeleton, dtype=bool)
@@ -65,6 +115,8 @@ def detect_cracks(
 
     for i in range(1, num_labels):  # saltar fondo (0)
         area = stats[i, cv2.CC_STAT_AREA]
+        if i % 256 == 0:
+            report("Medición de grietas", 0.6 + 0.4 * i / num_labels)
         if area < min_length_px:
             continue
         component_mask = labels == i
@@ -74,6 +126,11 @@ def detect_cracks(
         cy = int(stats[i, cv2.CC_STAT_TOP] + stats[i, cv2.CC_STAT_HEIGHT] / 2)
         # Longitud aproximada (conteo de pixeles del esqueleto en el componente)
         length_px = int(np.count_nonzero(component_mask))
+        left, top = stats[i, cv2.CC_STAT_LEFT], stats[i, cv2.CC_STAT_TOP]
+        width, height = stats[i, cv2.CC_STAT_WIDTH], stats[i, cv2.CC_STAT_HEIGHT]
+        length_geodesic_px = _geodesic_length_px(
+            component_mask[top:top + height, left:left + width]
+        )
         # Orientación y longitud principal vía PCA (sobre coordenadas del componente)
         coords = np.column_stack(np.where(component_mask))  # (row, col)
         orientation_deg = None
@@ -99,9 +156,13 @@ def detect_cracks(
             "id": i,
             "area": int(area),
             "centroid": (cx, cy),
+            "bbox": (int(left), int(top), int(width), int(height)),
             "length_px": length_px,
+            "length_geodesic_px": round(length_geodesic_px, 2),
             "length_major_px": length_major_px if length_major_px is not None else length_px,
             "orientation_deg": orientation_deg,
+            "orientation_class": orientation_class(orientation_deg),
         })
 
+    report("Completado", 1.0)
     return skeleton, crack_mask, crack_info
@@ -0,0 +1,284 @@
+"""Overlay anotado y estadísticas de grietas con actualización incremental.
+
+:class:`CrackOverlay` pinta una sola vez el overlay completo (máscara + IDs,
+igual que :func:`src.image_io.overlay_mask` + :func:`src.image_io.annotate_cracks`)
+y después aplica los cambios de exclusión como deltas:
+
+* sólo se repinta la región de cada grieta alternada (su caja y la de su
+  etiqueta), con las etiquetas vecinas que la tocan (consulta al índice
+  espacial), de modo que alternar una grieta cuesta O(tamaño de la
+  componente) y no O(imagen);
+* el delta se calcula sólo con los IDs que cambiaron respecto del conjunto
+  excluido anterior (sin máscaras de tamaño ``n``);
+* el conteo y la suma de longitudes de las grietas incluidas se guardan en
+  dos árboles de Fenwick indexados por el rango de longitud, de modo que
+  alternar cuesta O(log n) y la media, la mediana y el máximo (con o sin
+  filtro de longitud mínima) se consultan en O(log² n) sin copiar arrays.
+
+Las grietas excluidas se pintan en gris, igual que su etiqueta.
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+__all__ = ["CrackOverlay"]
+
+INCLUDED_COLOR = (255, 0, 0)
+EXCLUDED_COLOR = (150, 150, 150)
+_LABEL_COLOR = (0, 255, 255)
+_ALPHA = 0.4
+
+
+class _Fenwick:
+    """Árbol de Fenwick (sumas prefijas con actualización puntual en O(log n))."""
+
+    def __init__(self, values: np.ndarray):
+        n = values.size
+        self.tree = np.zeros(n + 1, dtype=values.dtype)
+        if n:
+            i = np.arange(1, n + 1)
+            prefix = np.concatenate([[0], np.cumsum(values)])
+            self.tree[1:] = prefix[i] - prefix[i - (i & -i)]
+        self._top = 1 << max(n.bit_length() - 1, 0) if n else 0
+
+    def add(self, pos: int, delta: float) -> None:
+        tree, i = self.tree, pos + 1
+        while i < tree.size:
+            tree[i] += delta
+            i += i & -i
+
+    def prefix(self, pos: int) -> float:
+        """Suma de las posiciones ``[0, pos)``."""
+        tree, total, i = self.tree, 0, pos
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def find(self, k: int) -> int:
+        """Menor posición cuya suma prefija inclusiva supera ``k`` (conteos enteros)."""
+        tree, pos, step = self.tree, 0, self._top
+        while step:
+            nxt = pos + step
+            if nxt < tree.size and tree[nxt] <= k:
+                pos = nxt
+                k -= tree[nxt]
+            step >>= 1
+        return pos
+
+
+class CrackOverlay:
+    """
+    Overlay de grietas con exclusiones incrementales.
+
+    Args:
+        image: Imagen RGB analizada (H, W, 3).
+        crack_mask: Máscara de grietas detectadas.
+        crack_info: Información de las grietas (``id``, ``centroid``, ``bbox``,
+            ``area``, ``length_px``).
+    """
+
+    def __init__(self, image: np.ndarray, crack_mask: np.ndarray, crack_info: List[dict]):
+        import cv2
+
+        from src.spatial_index import build_crack_index
+
+        self._image = np.ascontiguousarray(image)
+        self.index = build_crack_index(crack_mask, crack_info)
+        self.crack_info = crack_info
+        n = len(crack_info)
+        self._row_of: Dict[int, int] = {int(c["id"]): i for i, c in enumerate(crack_info)}
+        self.included = np.ones(n, dtype=bool)
+        self._excluded: Set[int] = set()
+        # Color de cada grieta en la máscara; alternar sólo cambia su fila
+        self._palette = np.tile(np.array(INCLUDED_COLOR, dtype=np.uint8), (n, 1))
+        self.lengths_px = np.array([c.get("length_px", 0) for c in crack_info], dtype=np.float64)
+
+        # Etiquetas: mismos parámetros que image_io.annotate_cracks
+        h, w = image.shape[:2]
+        base_dim = max(h, w)
+        self._font = cv2.FONT_HERSHEY_SIMPLEX
+        self._font_scale = max(0.6, base_dim / 800)
+        self._thickness = int(max(1, base_dim / 500))
+        pad = self._thickness + 2
+        boxes = np.zeros((n, 4), dtype=np.int64)  # x0, y0, x1, y1 (exclusivos)
+        for i, c in enumerate(crack_info):
+            (tw, th), baseline = cv2.getTextSize(
+                str(c["id"]), self._font, self._font_scale, self._thickness + 2
+            )
+            cx, cy = c["centroid"]
+            boxes[i] = (cx - pad, cy - th - pad, cx + tw + pad + 1, cy + baseline + pad + 1)
+        self._text_boxes = boxes
+        self._text_extent = (
+            (int((boxes[:, 2] - boxes[:, 0]).max()), int((boxes[:, 3] - boxes[:, 1]).max()))
+            if n else (0, 0)
+        )
+
+        # Conteo y suma de longitudes incluidas por rango de longitud
+        order = np.argsort(self.lengths_px, kind="stable")
+        self._sorted_lengths = self.lengths_px[order]
+        self._rank = np.empty(n, dtype=np.int64)
+        self._rank[order] = np.arange(n)
+        self._counts = _Fenwick(np.ones(n, dtype=np.int64))
+        self._sums = _Fenwick(self._sorted_lengths.copy())
+        self._count = n
+        self.length_sum = float(self.lengths_px.sum())
+
+        self._table = None
+        self.image = np.empty_like(self._image)
+        self._repaint(0, 0, w, h)
+
+    @property
+    def nbytes(self) -> int:
+        # ``_image`` es la imagen analizada, que la sesión ya contabiliza aparte
+        return int(
+            self.image.nbytes + self.index.labels.nbytes + self._palette.nbytes
+            + self.included.nbytes + self._text_boxes.nbytes + self.lengths_px.nbytes + self._sorted_lengths.nbytes
+            + self._rank.nbytes + self._counts.tree.nbytes + self._sums.tree.nbytes
+        )
+
+    @property
+    def valid_count(self) -> int:
+        return self._count
+
+    @property
+    def excluded_ids(self) -> List[int]:
+        """IDs excluidos en el orden de ``crack_info`` (O(excluidas))."""
+        return [int(self.crack_info[row]["id"]) for row in sorted(self._excluded)]
+
+    def rows(self, crack_ids: Iterable[int]) -> List[int]:
+        """Filas de ``crack_info`` de los IDs dados (se ignoran los desconocidos)."""
+        return [self._row_of[int(cid)] for cid in crack_ids if int(cid) in self._row_of]
+
+    def update(self, excluded_ids: Iterable[int]) -> np.ndarray:
+        """
+        Aplica el conjunto de exclusiones como delta respecto del estado actual.
+
+        Returns:
+            La imagen anotada (se modifica en el lugar).
+        """
+        wanted = set(self.rows(excluded_ids))
+        for row in sorted(wanted ^ self._excluded):
+            self._toggle(row, row not in wanted)
+        return self.image
+
+    def _toggle(self, row: int, include: bool) -> None:
+        self.included[row] = include
+        self._palette[row] = INCLUDED_COLOR if include else EXCLUDED_COLOR
+        sign = 1 if include else -1
+        (self._excluded.discard if include else self._excluded.add)(row)
+        rank, length = int(self._rank[row]), float(self.lengths_px[row])
+        self._counts.add(rank, sign)
+        self._sums.add(rank, sign * length)
+        self._count += sign
+        self.length_sum += sign * length
+
+        left, top, width, height = self.crack_info[row].get("bbox", (0, 0, 0, 0))
+        tx0, ty0, tx1, ty1 = self._text_boxes[row]
+        self._repaint(min(left, tx0), min(top, ty0), max(left + width, tx1), max(top + height, ty1))
+
+    def _repaint(self, x0: int, y0: int, x1: int, y1: int) -> None:
+        """Repinta ``[y0, y1) × [x0, x1)`` (ampliada): máscara coloreada y etiquetas."""
+        import cv2
+
+        h, w = self._image.shape[:2]
+        # Ampliar la región hasta contener por completo las etiquetas que la
+        # tocan: así el orden de dibujo coincide con el del render completo.
+        tw, th = self._text_extent
+        while True:
+            x0, y0, x1, y1 = max(0, int(x0)), max(0, int(y0)), min(w, int(x1)), min(h, int(y1))
+            if x0 >= x1 or y0 >= y1:
+                return
+            rows = np.sort(self.index.in_rect(x0 - tw, y0 - th, x1 + tw, y1 + th))
+            boxes = self._text_boxes[rows]
+            hit = (boxes[:, 0] < x1) & (boxes[:, 2] > x0) & (boxes[:, 1] < y1) & (boxes[:, 3] > y0)
+            rows, boxes = rows[hit], boxes[hit]
+            if not rows.size:
+                break
+            gx0, gy0 = np.minimum(boxes[:, :2].min(axis=0), (x0, y0))
+            gx1, gy1 = np.maximum(boxes[:, 2:].max(axis=0), (x1, y1))
+            grown = (max(0, gx0), max(0, gy0), min(w, gx1), min(h, gy1))
+            if grown == (x0, y0, x1, y1):
+                break
+            x0, y0, x1, y1 = grown
+
+        src = self._image[y0:y1, x0:x1]
+        labels = self.index.labels[y0:y1, x0:x1]
+        colored = src.copy()
+        on = labels > 0
+        if on.any():
+            colored[on] = self._palette[labels[on] - 1]
+        self.image[y0:y1, x0:x1] = cv2.addWeighted(src, 1 - _ALPHA, colored, _ALPHA, 0)
+
+        # Etiquetas que tocan la región, en el orden de crack_info
+        for row in rows:
+            self._draw_label(int(row))
+
+    def _draw_label(self, row: int) -> None:
+        import cv2
+
+        crack = self.crack_info[row]
+        origin = tuple(int(v) for v in crack["centroid"])
+        color = _LABEL_COLOR if self.included[row] else EXCLUDED_COLOR
+        for fg, extra in (((0, 0, 0), 2), (color, 0)):
+            cv2.putText(
+                self.image, str(crack["id"]), origin, self._font, self._font_scale,
+                fg, self._thickness + extra, cv2.LINE_AA,
+            )
+
+    def length_stats(self, min_length_px: float = 0.0) -> Optional[Dict[str, float]]:
+        """
+        Estadísticas de longitud (px) de las grietas incluidas con ``length ≥ min_length_px``.
+
+        Conteo y suma salen de los árboles de Fenwick a partir del primer rango
+        que cumple el filtro; la mediana y el máximo son estadísticos de orden
+        que se buscan en el árbol de conteos. ``None`` si no queda ninguna grieta.
+        """
+        if min_length_px > 0:
+            start = int(np.searchsorted(self._sorted_lengths, min_length_px))
+            skipped = int(self._counts.prefix(start))
+            count = self._count - skipped
+            total = self.length_sum - float(self._sums.prefix(start))
+        else:
+            skipped, count, total = 0, self._count, self.length_sum
+        if count <= 0:
+            return None
+        nth = lambda k: float(self._sorted_lengths[self._counts.find(skipped + k)])  # noqa: E731
+        return {
+            "count": int(count),
+            "mean": total / count,
+            "median": 0.5 * (nth((count - 1) // 2) + nth(count // 2)),
+            "max": nth(count - 1),
+        }
+
+    def table_rows(self, scale_px_per_m: float) -> tuple:
+        """
+        Tabla completa de grietas (se construye una vez por escala) y máscara de incluidas.
+
+        Returns:
+            (incluidas, DataFrame): filtrar con ``df[incluidas & ...]``.
+        """
+        if self._table is None or self._table[0] != scale_px_per_m:
+            import pandas as pd
+
+            scale = scale_px_per_m if scale_px_per_m > 0 else np.nan
+            df = pd.DataFrame(
+                {
+                    "ID": [c["id"] for c in self.crack_info],
+                    "Longitud_px": self.lengths_px.astype(np.int64),
+                    "Longitud_m": np.round(self.lengths_px / scale, 4),
+                    "Longitud_eje_mayor_px": [round(c.get("length_major_px", 0), 1) for c in self.crack_info],
+                    "Longitud_eje_mayor_m": [
+                        round(c.get("length_major_px", 0) / scale, 4) for c in self.crack_info
+                    ],
+                    "Orientacion_deg": [
+                        None if c.get("orientation_deg") is None else round(c["orientation_deg"], 1)
+                        for c in self.crack_info
+                    ],
+                    "Area_px": [c.get("area") for c in self.crack_info],
+                }
+            )
+            self._table = (scale_px_per_m, df)
+        return self.included, self._table[1]
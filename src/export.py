@@ -0,0 +1,157 @@
+"""Exportación tabular de resultados de grietas.
+
+Construye registros con las columnas propuestas en PLAN_MEJORAS (sección 8) y
+los escribe en CSV o Parquet según la extensión del archivo de salida.
+
+Funciones
+---------
+    crack_records(crack_info, *, image_hash, scale_px_per_m, ...)
+        Lista de diccionarios (una fila por grieta).
+    fragmentation_summary(diameters_m)
+        Resumen granulométrico (número de partículas y percentiles).
+    write_table(records, path, columns=None)
+        Escribe los registros en ``.csv`` o ``.parquet``.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+from src.utils.constants import APP_VERSION
+
+__all__ = [
+    "CRACK_COLUMNS",
+    "crack_records",
+    "fragmentation_summary",
+    "utc_timestamp",
+    "write_table",
+]
+
+CRACK_COLUMNS = [
+    "image_hash",
+    "timestamp_utc",
+    "scale_px_per_m",
+    "crack_id",
+    "length_px",
+    "length_m",
+    "length_geodesic_px",
+    "length_geodesic_m",
+    "length_major_px",
+    "length_major_m",
+    "orientation_deg",
+    "orientation_class",
+    "area_px",
+    "included",
+    "min_length_filter_m",
+    "app_version",
+]
+
+
+def utc_timestamp() -> str:
+    """Marca de tiempo UTC en formato ISO 8601 (segundos)."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def crack_records(
+    crack_info: Iterable[dict],
+    *,
+    image_hash: str,
+    scale_px_per_m: float,
+    excluded_ids: Iterable[int] = (),
+    min_length_filter_m: float = 0.0,
+    timestamp_utc: Optional[str] = None,
+) -> list[dict]:
+    """Convierte ``crack_info`` de :func:`detect_cracks` en filas exportables.
+
+    Parameters
+    ----------
+    crack_info : iterable of dict
+        Información por grieta devuelta por ``detect_cracks``.
+    image_hash : str
+        Clave de identidad de la imagen/ROI.
+    scale_px_per_m : float
+        Escala usada para convertir longitudes a metros.
+    excluded_ids : iterable of int, optional
+        Grietas excluidas manualmente (``included = False``).
+    min_length_filter_m : float, optional
+        Longitud mínima (m); las grietas más cortas se marcan como no incluidas.
+    timestamp_utc : str, optional
+        Marca de tiempo común para todas las filas (por defecto, ahora).
+
+    Returns
+    -------
+    list[dict]
+        Una fila por grieta con las columnas de ``CRACK_COLUMNS``.
+    """
+    if scale_px_per_m <= 0:
+        raise ValueError("La escala debe ser positiva.")
+    excluded = set(excluded_ids)
+    timestamp_utc = timestamp_utc or utc_timestamp()
+
+    def to_m(value):  # noqa: ANN001, ANN202
+        return None if value is None else round(value / scale_px_per_m, 4)
+
+    records = []
+    for crack in crack_info:
+        length_m = to_m(crack.get("length_px"))
+        orientation = crack.get("orientation_deg")
+        included = crack["id"] not in excluded and (
+            min_length_filter_m <= 0 or (length_m is not None and length_m >= min_length_filter_m)
+        )
+        records.append(
+            {
+                "image_hash": image_hash,
+                "timestamp_utc": timestamp_utc,
+                "scale_px_per_m": float(scale_px_per_m),
+                "crack_id": crack["id"],
+                "length_px": crack.get("length_px"),
+                "length_m": length_m,
+                "length_geodesic_px": crack.get("length_geodesic_px"),
+                "length_geodesic_m": to_m(crack.get("length_geodesic_px")),
+                "length_major_px": crack.get("length_major_px"),
+                "length_major_m": to_m(crack.get("length_major_px")),
+                "orientation_deg": None if orientation is None else round(orientation, 1),
+                "orientation_class": crack.get("orientation_class"),
+                "area_px": crack.get("area"),
+                "included": included,
+                "min_length_filter_m": float(min_length_filter_m),
+                "app_version": APP_VERSION,
+            }
+        )
+    return records
+
+
+def fragmentation_summary(diameters_m: Sequence[float]) -> dict:
+    """Número de partículas y percentiles D10/D50/D80/D90 (m) de una granulometría."""
+    import numpy as np
+
+    summary = {"particle_count": len(diameters_m)}
+    if len(diameters_m):
+        values = np.percentile(diameters_m, [10, 50, 80, 90])
+        for p, v in zip((10, 50, 80, 90), values):
+            summary[f"D{p}_m"] = round(float(v), 4)
+    return summary
+
+
+def write_table(
+    records: Sequence[dict],
+    path,  # noqa: ANN001
+    columns: Optional[Sequence[str]] = None,
+) -> Path:
+    """Escribe registros en CSV o Parquet (según la extensión de ``path``).
+
+    Parquet requiere ``pyarrow`` (o ``fastparquet``) instalado.
+    """
+    import pandas as pd
+
+    path = Path(path)
+    df = pd.DataFrame.from_records(list(records), columns=columns)
+    suffix = path.suffix.lower()
+    if suffix == ".parquet":
+        df.to_parquet(path, index=False)
+    elif suffix == ".csv":
+        df.to_csv(path, index=False)
+    else:
+        raise ValueError(f"Formato de salida no soportado: {path.suffix}")
+    return path
@@ -7,12 +7,13 @@ por el usuario.
 from __future__ import annotations
 
 from math import pi, sqrt
-from typing import List, Tuple
+from typing import Callable, List, Optional, Tuple
 
 import cv2
 import numpy as np
 
 __all__ = [
+    "particle_mask",
     "particle_sizes",
 ]
 
@@ -27,11 +28,26 @@ def _preprocess(image: np.ndarray) -> np.ndarray:
     return gray
 
 
+def particle_mask(
+    image: np.ndarray, report: Callable[[str, float], None] = lambda stage, fraction: None
+) -> np.ndarray:
+    """Máscara de partículas (uint8 0/255): preproceso y umbral de Otsu invertido."""
+    report("Preproceso", 0.0)
+    gray = _preprocess(image)
+
+    report("Umbral de Otsu", 0.2)
+    # Umbral de Otsu para segmentar partículas (asumimos bloques más oscuros)
+    # Invertir para que las partículas sean foreground
+    _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return cv2.bitwise_not(thresh)
+
+
 def particle_sizes(
     image: np.ndarray,
     *,
     scale_px_per_meter: float,
     min_area_px: int = 200,
+    progress: Optional[Callable[[str, float], None]] = None,
 ) -> Tuple[List[float], np.ndarray]:
     """Detecta partículas y devuelve sus diámetros equivalentes.
 
@@ -43,6 +59,8 @@ def particle_sizes(
         Relación píxeles/metro para convertir áreas y diámetros.
     min_area_px : int, default 200
         Áreas menores se descartan como ruido.
+    progress : callable, optional
+        ``progress(etapa, fraccion)`` se invoca al iniciar cada etapa.
 
     Returns
     -------
@@ -51,14 +69,12 @@ def particle_sizes(
     labeled_rgb : np.ndarray
         Imagen RGB con partículas coloreadas para visualización.
     """
-    gray = _preprocess(image)
+    report = progress or (lambda stage, fraction: None)
 
-    # Umbral de Otsu para segmentar partículas (asumimos bloques más oscuros)
-    # Invertir para que las partículas sean foreground
-    _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-    thresh_inv = cv2.bitwise_not(thresh)
+    thresh_inv = particle_mask(image, report)
 
     # Etiquetado de componentes
+    report("Etiquetado de partículas", 0.35)
     num_labels, labels, stats, _ = cv2.connectedComponentsWithStats(
         thresh_inv, connectivity=8
     )
@@ -71,6 +87,8 @@ def particle_sizes(
     colors = rng.integers(0, 255, size=(num_labels, 3), dtype=np.uint8)
     for i in range(1, num_labels):  # saltar fondo
         area = stats[i, cv2.CC_STAT_AREA]
+        if i % 256 == 0:
+            report("Medición de partículas", 0.5 + 0.5 * i / num_labels)
         if area < min_area_px:
             continue
         # Calcular diámetro equivalente (m)
@@ -81,4 +99,5 @@ def particle_sizes(
         # Colorear partícula
         labeled_rgb[labels == i] = colors[i]
 
+    report("Completado", 1.0)
     return diameters_m, labeled_rgb
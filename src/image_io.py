@@ -12,7 +12,6 @@ import io
 from pathlib import Path
 from typing import Tuple
 
-import cv2
 import numpy as np
 from PIL import Image
 
@@ -90,6 +89,8 @@ def overlay_mask(
     np.ndarray
         Imagen RGB con la máscara coloreada.
     """
+    import cv2
+
     if mask.dtype != np.uint8:
         mask_uint8 = mask.astype(np.uint8) * 255
     else:
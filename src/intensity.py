@@ -0,0 +1,272 @@
+"""Mapas de intensidad de fracturas (P21 y P20) con imágenes integrales.
+
+* P21: longitud de traza por unidad de área (m/m²).
+* P20: número de grietas (centroides) por unidad de área (1/m²).
+
+Se construyen una sola vez dos tablas de áreas acumuladas (``cv2.integral``):
+una sobre el raster del esqueleto (cada píxel aporta su longitud) y otra
+sobre el raster de centroides. A partir de ellas, la suma de cualquier
+rectángulo cuesta cuatro lecturas, de modo que cualquier resolución de grilla
+o tamaño de ventana se consulta en O(1) por celda.
+
+Las grietas excluidas se restan al consultar, de P21 (sus píxeles de
+esqueleto, agrupados por grieta con :func:`src.spatial_index.crack_labels`)
+y de P20 (su centroide), sin reconstruir las tablas integrales.
+"""
+from __future__ import annotations
+
+import io
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+__all__ = ["IntensityMaps", "build_intensity_maps", "heatmap_overlay", "export_npz"]
+
+
+class IntensityMaps:
+    """Tablas integrales de longitud de traza y de centroides.
+
+    Args:
+        length_sat: Tabla integral ``(H+1, W+1)`` de la longitud de traza (px).
+        count_sat: Tabla integral ``(H+1, W+1)`` del número de centroides.
+        scale_px_per_m: Escala para convertir a m y m².
+        crack_ids: ID de cada grieta contada en las tablas (para excluir al consultar).
+        centroids: Centroide ``(x, y)`` de cada grieta de ``crack_ids``.
+        pixel_offsets: Inicio de los píxeles de cada grieta en ``pixel_yx`` (n + 1).
+        pixel_yx: Píxeles ``(y, x)`` de esqueleto agrupados por grieta.
+    """
+
+    def __init__(
+        self,
+        length_sat: np.ndarray,
+        count_sat: np.ndarray,
+        scale_px_per_m: float,
+        *,
+        crack_ids: Optional[np.ndarray] = None,
+        centroids: Optional[np.ndarray] = None,
+        pixel_offsets: Optional[np.ndarray] = None,
+        pixel_yx: Optional[np.ndarray] = None,
+    ):
+        self.length_sat = length_sat
+        self.count_sat = count_sat
+        self.scale_px_per_m = float(scale_px_per_m)
+        ids = np.zeros(0, np.int64) if crack_ids is None else np.asarray(crack_ids, dtype=np.int64)
+        self._row_of: Dict[int, int] = {int(cid): i for i, cid in enumerate(ids)}
+        self.centroids = (
+            np.zeros((0, 2), np.int64) if centroids is None else np.asarray(centroids, np.int64).reshape(-1, 2)
+        )
+        self.pixel_offsets = np.zeros(ids.size + 1, np.int64) if pixel_offsets is None else pixel_offsets
+        self.pixel_yx = np.zeros((0, 2), np.int32) if pixel_yx is None else pixel_yx
+
+    @property
+    def shape(self) -> tuple:
+        return (self.length_sat.shape[0] - 1, self.length_sat.shape[1] - 1)
+
+    @property
+    def nbytes(self) -> int:
+        return int(
+            self.length_sat.nbytes + self.count_sat.nbytes + self.centroids.nbytes
+            + self.pixel_offsets.nbytes + self.pixel_yx.nbytes
+        )
+
+    @staticmethod
+    def _box_sums(sat: np.ndarray, y0: np.ndarray, y1: np.ndarray, x0: np.ndarray, x1: np.ndarray) -> np.ndarray:
+        """Sumas de los rectángulos ``[y0, y1) × [x0, x1)`` (producto exterior filas × columnas)."""
+        return (
+            sat[y1[:, None], x1[None, :]]
+            - sat[y0[:, None], x1[None, :]]
+            - sat[y1[:, None], x0[None, :]]
+            + sat[y0[:, None], x0[None, :]]
+        )
+
+    @staticmethod
+    def _point_counts(y0, y1, x0, x1, ys: np.ndarray, xs: np.ndarray) -> np.ndarray:  # noqa: ANN001
+        """Cuántos puntos ``(xs, ys)`` caen en cada rectángulo, en O(puntos + celdas).
+
+        Los límites son monótonos, así que cada punto cae en un bloque contiguo
+        de filas y columnas; los bloques se acumulan en un arreglo de
+        diferencias 2D que se integra al final (sirve también para ventanas
+        solapadas).
+        """
+        r_lo, r_hi = np.searchsorted(y1, ys, "right"), np.searchsorted(y0, ys, "right")
+        c_lo, c_hi = np.searchsorted(x1, xs, "right"), np.searchsorted(x0, xs, "right")
+        ok = (r_lo < r_hi) & (c_lo < c_hi)
+        r_lo, r_hi, c_lo, c_hi = r_lo[ok], r_hi[ok], c_lo[ok], c_hi[ok]
+        diff = np.zeros((len(y0) + 1, len(x0) + 1))
+        np.add.at(diff, (r_lo, c_lo), 1.0)
+        np.add.at(diff, (r_hi, c_lo), -1.0)
+        np.add.at(diff, (r_lo, c_hi), -1.0)
+        np.add.at(diff, (r_hi, c_hi), 1.0)
+        return diff.cumsum(axis=0).cumsum(axis=1)[:-1, :-1]
+
+    def _excluded_rows(self, excluded_ids: Optional[Iterable[int]]) -> np.ndarray:
+        if not excluded_ids:
+            return np.zeros(0, np.int64)
+        rows = [self._row_of[int(cid)] for cid in excluded_ids if int(cid) in self._row_of]
+        return np.unique(np.asarray(rows, dtype=np.int64))
+
+    def _grid(self, y0, y1, x0, x1, excluded_ids=None) -> Dict[str, np.ndarray]:  # noqa: ANN001
+        area_m2 = ((y1 - y0)[:, None] * (x1 - x0)[None, :]) / self.scale_px_per_m**2
+        length_px = self._box_sums(self.length_sat, y0, y1, x0, x1)
+        count = self._box_sums(self.count_sat, y0, y1, x0, x1)
+        rows = self._excluded_rows(excluded_ids)
+        if rows.size:
+            # Sólo se recorren los píxeles y centroides de las grietas excluidas
+            starts, ends = self.pixel_offsets[rows], self.pixel_offsets[rows + 1]
+            sizes = ends - starts
+            idx = np.repeat(ends - np.cumsum(sizes), sizes) + np.arange(int(sizes.sum()))
+            pixels = self.pixel_yx[idx]
+            length_px = length_px - self._point_counts(y0, y1, x0, x1, pixels[:, 0], pixels[:, 1])
+            pts = self.centroids[rows]
+            count = count - self._point_counts(y0, y1, x0, x1, pts[:, 1], pts[:, 0])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return {
+                "p21": np.where(area_m2 > 0, length_px / self.scale_px_per_m / area_m2, np.nan),
+                "p20": np.where(area_m2 > 0, count / area_m2, np.nan),
+            }
+
+    def grid(self, cell_px: int, *, excluded_ids: Optional[Iterable[int]] = None) -> Dict[str, np.ndarray]:
+        """
+        P21/P20 en celdas disjuntas de ``cell_px`` (la última fila/columna puede ser menor).
+
+        ``excluded_ids`` son grietas que no cuentan ni en P21 ni en P20.
+
+        Returns:
+            dict con ``p21`` y ``p20`` de forma ``(ceil(H/cell), ceil(W/cell))``.
+        """
+        h, w = self.shape
+        ys = np.append(np.arange(0, h, cell_px), h)
+        xs = np.append(np.arange(0, w, cell_px), w)
+        return self._grid(ys[:-1], ys[1:], xs[:-1], xs[1:], excluded_ids)
+
+    def window(
+        self,
+        window_px: int,
+        stride_px: Optional[int] = None,
+        *,
+        excluded_ids: Optional[Iterable[int]] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        P21/P20 en ventanas deslizantes de ``window_px`` centradas cada ``stride_px``.
+
+        Las ventanas se recortan en los bordes de la imagen (el área se ajusta).
+        """
+        h, w = self.shape
+        stride = stride_px or max(1, window_px // 2)
+        half = window_px // 2
+        cy = np.arange(stride // 2, h, stride)
+        cx = np.arange(stride // 2, w, stride)
+        return self._grid(
+            np.clip(cy - half, 0, h), np.clip(cy - half + window_px, 0, h),
+            np.clip(cx - half, 0, w), np.clip(cx - half + window_px, 0, w),
+            excluded_ids,
+        )
+
+    def totals(self, *, excluded_ids: Optional[Iterable[int]] = None) -> Dict[str, float]:
+        """P21/P20 de la imagen completa."""
+        return {k: float(v[0, 0]) for k, v in self.grid(max(self.shape), excluded_ids=excluded_ids).items()}
+
+
+def build_intensity_maps(
+    crack_mask: np.ndarray,
+    crack_info: List[dict],
+    *,
+    scale_px_per_m: float,
+    excluded_ids: Optional[set] = None,
+) -> IntensityMaps:
+    """
+    Construye las tablas integrales a partir del esqueleto y los centroides.
+
+    Args:
+        crack_mask: Máscara/esqueleto de grietas (H, W).
+        crack_info: Grietas detectadas (se usan ``id``, ``centroid``, ``bbox`` y ``area``).
+        scale_px_per_m: Escala (px/m).
+        excluded_ids: Grietas que no cuentan en P21 ni en P20.
+
+    Returns:
+        IntensityMaps listo para consultas por grilla o ventana.
+    """
+    import cv2
+
+    from src.spatial_index import crack_labels
+
+    if scale_px_per_m <= 0:
+        raise ValueError("La escala debe ser positiva.")
+    excluded_ids = excluded_ids or set()
+    keep = [c for c in crack_info if c["id"] not in excluded_ids]
+    labels = crack_labels(crack_mask, crack_info)
+    skeleton = (np.asarray(crack_mask) > 0).astype(np.uint8)
+    if len(keep) < len(crack_info):
+        dropped = np.zeros(len(crack_info) + 1, dtype=bool)
+        dropped[[i + 1 for i, c in enumerate(crack_info) if c["id"] in excluded_ids]] = True
+        skeleton[dropped[labels]] = 0
+    h, w = skeleton.shape
+    # Cada píxel del esqueleto aporta 1 px de traza (aproximación por conteo,
+    # la misma que ``length_px`` en ``crack_info``).
+    length_sat = cv2.integral(skeleton, sdepth=cv2.CV_64F)
+
+    # Píxeles de cada grieta contada, agrupados por fila de ``keep``
+    row_of_label = np.full(len(crack_info) + 1, -1, dtype=np.int64)
+    row_of_label[[i + 1 for i, c in enumerate(crack_info) if c["id"] not in excluded_ids]] = np.arange(len(keep))
+    ys, xs = np.nonzero(labels)
+    rows = row_of_label[labels[ys, xs]]
+    valid = rows >= 0
+    order = np.argsort(rows[valid], kind="stable")
+    pixel_yx = np.column_stack([ys[valid], xs[valid]]).astype(np.int32)[order]
+    pixel_offsets = np.concatenate([[0], np.cumsum(np.bincount(rows[valid], minlength=len(keep)))])
+
+    centroids = np.zeros((h, w), dtype=np.float64)
+    pts = np.array([c["centroid"] for c in keep], dtype=np.int64).reshape(-1, 2)
+    pts = np.column_stack([np.clip(pts[:, 0], 0, w - 1), np.clip(pts[:, 1], 0, h - 1)])
+    if pts.size:
+        np.add.at(centroids, (pts[:, 1], pts[:, 0]), 1.0)
+    count_sat = cv2.integral(centroids, sdepth=cv2.CV_64F)
+    return IntensityMaps(
+        length_sat,
+        count_sat,
+        scale_px_per_m,
+        crack_ids=np.array([c["id"] for c in keep], dtype=np.int64),
+        centroids=pts,
+        pixel_offsets=pixel_offsets,
+        pixel_yx=pixel_yx,
+    )
+
+
+def heatmap_overlay(
+    image: np.ndarray,
+    values: np.ndarray,
+    *,
+    cell_px: Optional[int] = None,
+    alpha: float = 0.5,
+) -> np.ndarray:
+    """
+    Superpone un mapa como heatmap sobre la imagen RGB (escala 0–máximo).
+
+    Con ``cell_px`` cada celda de :meth:`IntensityMaps.grid` cubre exactamente
+    sus píxeles; sin él, el mapa se estira a la imagen (ventanas deslizantes).
+    """
+    import cv2
+
+    h, w = image.shape[:2]
+    finite = np.nan_to_num(values, nan=0.0)
+    peak = finite.max()
+    norm = (255 * finite / peak).astype(np.uint8) if peak > 0 else np.zeros_like(finite, np.uint8)
+    if cell_px:
+        resized = np.ascontiguousarray(norm.repeat(cell_px, axis=0).repeat(cell_px, axis=1)[:h, :w])
+    else:
+        resized = cv2.resize(norm, (w, h), interpolation=cv2.INTER_NEAREST)
+    colored = cv2.cvtColor(cv2.applyColorMap(resized, cv2.COLORMAP_JET), cv2.COLOR_BGR2RGB)
+    return cv2.addWeighted(image, 1 - alpha, colored, alpha, 0)
+
+
+def export_npz(grid: Dict[str, np.ndarray], *, cell_px: int, scale_px_per_m: float) -> bytes:
+    """Serializa una grilla P21/P20 como ``.npz`` comprimido (float32)."""
+    buffer = io.BytesIO()
+    np.savez_compressed(
+        buffer,
+        p21=grid["p21"].astype(np.float32),
+        p20=grid["p20"].astype(np.float32),
+        cell_px=np.int32(cell_px),
+        scale_px_per_m=np.float64(scale_px_per_m),
+    )
+    return buffer.getvalue()
@@ -0,0 +1,314 @@
+"""Agrupación de grietas en familias de juntas por orientación.
+
+Las orientaciones son datos *axiales* (θ y θ + 180° son la misma dirección),
+así que se trabaja con ángulos duplicados ``2θ`` sobre el círculo. El
+algoritmo es un k-means circular ponderado por longitud:
+
+1. Las orientaciones se agrupan en ``bins`` intervalos de ``180/bins`` grados
+   (suma de longitudes por intervalo); el k-means itera sobre los intervalos,
+   no sobre las grietas, por lo que 10⁵ grietas cuestan lo mismo que 100.
+2. Se prueba ``k = 1 … max_sets`` y se elige el menor ``k`` cuyas familias
+   alcanzan una longitud resultante media ``R̄ ≥ concentration``.
+3. Familias con menos de ``min_set_fraction`` de la longitud total se
+   consideran juntas aleatorias (etiqueta ``-1``).
+
+Para cada familia se informan la orientación media, la concentración, el
+espaciado (mediana de las distancias entre centroides consecutivos
+proyectados sobre la normal de la familia) y se sugiere Jn (Barton, 1974).
+
+Los ángulos siguen la convención de ``crack_info["orientation_deg"]``
+(coordenadas de imagen, eje Y hacia abajo), en el rango [0, 180).
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+__all__ = [
+    "JointSetResult",
+    "cluster_joint_sets",
+    "suggest_jn",
+    "rose_histogram",
+    "render_rose",
+]
+
+# Colores RGB por familia (la última entrada es para juntas aleatorias)
+SET_COLORS = [(230, 57, 70), (69, 123, 157), (42, 157, 143), (244, 162, 97), (131, 56, 236)]
+RANDOM_COLOR = (160, 160, 160)
+
+
+def suggest_jn(n_sets: int, random_joints: bool) -> float:
+    """Jn de Barton a partir del número de familias y de la presencia de juntas aleatorias."""
+    if n_sets == 0:
+        return 1.0 if random_joints else 0.75
+    table = {1: (2.0, 3.0), 2: (4.0, 6.0), 3: (9.0, 12.0)}
+    if n_sets in table:
+        return table[n_sets][1 if random_joints else 0]
+    return 15.0
+
+
+class JointSetResult:
+    """Familias de juntas encontradas (arrays alineados por familia)."""
+
+    def __init__(
+        self,
+        labels: np.ndarray,
+        mean_deg: np.ndarray,
+        concentration: np.ndarray,
+        weight_fraction: np.ndarray,
+        counts: np.ndarray,
+        spacing: np.ndarray,
+        random_fraction: float,
+        spacing_unit: str,
+    ):
+        self.labels = labels
+        self.mean_deg = mean_deg
+        self.concentration = concentration
+        self.weight_fraction = weight_fraction
+        self.counts = counts
+        self.spacing = spacing
+        self.random_fraction = random_fraction
+        self.spacing_unit = spacing_unit
+
+    @property
+    def n_sets(self) -> int:
+        return int(self.mean_deg.size)
+
+    def jn(self, random_threshold: float = 0.1) -> float:
+        """Jn sugerido; hay juntas aleatorias si superan ``random_threshold`` de la longitud."""
+        return suggest_jn(self.n_sets, self.random_fraction >= random_threshold)
+
+    def as_rows(self) -> List[Dict[str, float]]:
+        return [
+            {
+                "set": i + 1,
+                "mean_deg": round(float(self.mean_deg[i]), 1),
+                "concentration": round(float(self.concentration[i]), 3),
+                "length_fraction": round(float(self.weight_fraction[i]), 3),
+                "cracks": int(self.counts[i]),
+                f"spacing_{self.spacing_unit}": round(float(self.spacing[i]), 4),
+            }
+            for i in range(self.n_sets)
+        ]
+
+
+def _kmeans_bins(
+    vectors: np.ndarray, weights: np.ndarray, k: int, *, n_init: int, iterations: int, rng: np.random.Generator
+):
+    """k-means esférico ponderado sobre vectores unitarios (bins). Devuelve (centros, etiquetas, R̄)."""
+    best = None
+    total = weights.sum()
+    for _ in range(n_init):
+        # Inicialización k-means++ (distancia = 1 - coseno)
+        centers = [vectors[rng.choice(len(vectors), p=weights / total)]]
+        for _ in range(1, k):
+            dist = 1.0 - np.max(vectors @ np.array(centers).T, axis=1)
+            p = weights * np.maximum(dist, 0)
+            centers.append(vectors[rng.choice(len(vectors), p=p / p.sum())] if p.sum() > 0 else centers[-1])
+        centers = np.array(centers)
+        for _ in range(iterations):
+            labels = np.argmax(vectors @ centers.T, axis=1)
+            resultant = np.zeros((k, 2))
+            np.add.at(resultant, labels, vectors * weights[:, None])
+            norm = np.linalg.norm(resultant, axis=1)
+            new = np.where(norm[:, None] > 0, resultant / np.maximum(norm, 1e-12)[:, None], centers)
+            if np.allclose(new, centers):
+                break
+            centers = new
+        labels = np.argmax(vectors @ centers.T, axis=1)
+        resultant = np.zeros((k, 2))
+        np.add.at(resultant, labels, vectors * weights[:, None])
+        score = np.linalg.norm(resultant, axis=1).sum() / total
+        if best is None or score > best[2]:
+            best = (centers, labels, score)
+    return best
+
+
+def cluster_joint_sets(
+    orientation_deg: Sequence[float],
+    lengths: Optional[Sequence[float]] = None,
+    *,
+    centroids: Optional[np.ndarray] = None,
+    scale_px_per_m: Optional[float] = None,
+    max_sets: int = 4,
+    concentration: float = 0.85,
+    min_set_fraction: float = 0.1,
+    bins: int = 360,
+    n_init: int = 5,
+    seed: int = 0,
+) -> JointSetResult:
+    """
+    Agrupa orientaciones axiales en familias de juntas.
+
+    Args:
+        orientation_deg: Orientación de cada grieta (grados, cualquier rango).
+        lengths: Pesos (longitud de cada grieta); por defecto 1.
+        centroids: Centroides ``(x, y)`` en px para el espaciado por familia.
+        scale_px_per_m: Escala para expresar el espaciado en metros.
+        max_sets: Número máximo de familias a probar.
+        concentration: R̄ mínimo (sobre ángulos duplicados) para aceptar ``k``.
+        min_set_fraction: Fracción mínima de longitud para ser familia.
+        bins: Intervalos de orientación para el k-means.
+        n_init: Reinicios del k-means por cada ``k``.
+        seed: Semilla de la inicialización.
+
+    Returns:
+        JointSetResult con etiquetas por grieta (``-1`` = aleatoria), orientación
+        media, concentración, fracción de longitud, conteo y espaciado por familia.
+    """
+    theta = np.mod(np.asarray(orientation_deg, dtype=np.float64), 180.0)
+    weights = np.ones_like(theta) if lengths is None else np.asarray(lengths, dtype=np.float64)
+    n = theta.size
+    unit = "m" if scale_px_per_m else "px"
+    empty = JointSetResult(
+        np.full(n, -1), np.zeros(0), np.zeros(0), np.zeros(0), np.zeros(0, int), np.zeros(0), 1.0 if n else 0.0, unit
+    )
+    if n == 0 or weights.sum() <= 0:
+        return empty
+
+    # Histograma ponderado sobre ángulos duplicados
+    bin_of = np.minimum((theta / 180.0 * bins).astype(np.int64), bins - 1)
+    hist = np.bincount(bin_of, weights=weights, minlength=bins)
+    used = np.flatnonzero(hist > 0)
+    phi = np.deg2rad((used + 0.5) * 360.0 / bins)
+    vectors = np.column_stack([np.cos(phi), np.sin(phi)])
+    w = hist[used]
+
+    rng = np.random.default_rng(seed)
+    chosen = None
+    for k in range(1, min(max_sets, used.size) + 1):
+        chosen = _kmeans_bins(vectors, w, k, n_init=n_init, iterations=50, rng=rng)
+        if chosen[2] >= concentration:
+            break
+    centers, bin_labels, _ = chosen
+
+    # Familias con poco peso -> juntas aleatorias
+    total = w.sum()
+    set_weight = np.bincount(bin_labels, weights=w, minlength=len(centers))
+    keep = np.flatnonzero(set_weight / total >= min_set_fraction)
+    mean_double = np.degrees(np.arctan2(centers[keep, 1], centers[keep, 0])) % 360.0
+    order = np.argsort(mean_double)
+    keep, mean_double = keep[order], mean_double[order]
+    remap = np.full(len(centers), -1)
+    remap[keep] = np.arange(keep.size)
+
+    label_by_bin = np.full(bins, -1)
+    label_by_bin[used] = remap[bin_labels]
+    labels = label_by_bin[bin_of]
+
+    # Estadísticas por familia sobre las grietas (no sobre los bins)
+    doubled = np.deg2rad(2.0 * theta)
+    in_set = labels >= 0
+    resultant = np.zeros((keep.size, 2))
+    np.add.at(
+        resultant, labels[in_set],
+        np.column_stack([np.cos(doubled), np.sin(doubled)])[in_set] * weights[in_set, None],
+    )
+    set_w = np.bincount(labels[in_set], weights=weights[in_set], minlength=keep.size)
+    mean_deg = (np.degrees(np.arctan2(resultant[:, 1], resultant[:, 0])) % 360.0) / 2.0
+    r_bar = np.linalg.norm(resultant, axis=1) / np.maximum(set_w, 1e-12)
+    counts = np.bincount(labels[in_set], minlength=keep.size)
+
+    spacing = np.full(keep.size, np.nan)
+    if centroids is not None and keep.size:
+        pts = np.asarray(centroids, dtype=np.float64).reshape(-1, 2)
+        rad = np.deg2rad(mean_deg)
+        normals = np.column_stack([-np.sin(rad), np.cos(rad)])
+        # Proyección de cada grieta sobre la normal de su familia; se ordena por
+        # (familia, proyección) para tomar diferencias dentro de cada familia.
+        proj = np.einsum("ij,ij->i", pts[in_set], normals[labels[in_set]])
+        lab = labels[in_set]
+        idx = np.lexsort((proj, lab))
+        lab, proj = lab[idx], proj[idx]
+        same = lab[1:] == lab[:-1]
+        gaps, gap_set = np.diff(proj)[same], lab[1:][same]
+        for s in range(keep.size):
+            g = gaps[gap_set == s]
+            g = g[g > 0]
+            if g.size:
+                spacing[s] = np.median(g)
+        if scale_px_per_m:
+            spacing = spacing / scale_px_per_m
+
+    return JointSetResult(
+        labels=labels,
+        mean_deg=mean_deg,
+        concentration=r_bar,
+        weight_fraction=set_w / weights.sum(),
+        counts=counts,
+        spacing=spacing,
+        random_fraction=float(weights[~in_set].sum() / weights.sum()),
+        spacing_unit=unit,
+    )
+
+
+def rose_histogram(
+    orientation_deg: Sequence[float],
+    lengths: Optional[Sequence[float]] = None,
+    *,
+    bins: int = 36,
+    labels: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Conteos (o longitudes) por intervalo de orientación en [0, 180).
+
+    Con ``labels`` devuelve una matriz ``(familias + 1, bins)``: una fila por
+    familia y la última para las juntas aleatorias (``-1``).
+    """
+    theta = np.mod(np.asarray(orientation_deg, dtype=np.float64), 180.0)
+    weights = np.ones_like(theta) if lengths is None else np.asarray(lengths, dtype=np.float64)
+    bin_of = np.minimum((theta / 180.0 * bins).astype(np.int64), bins - 1)
+    if labels is None:
+        return np.bincount(bin_of, weights=weights, minlength=bins)
+    labels = np.asarray(labels)
+    n_rows = int(labels.max()) + 2 if labels.size else 1
+    row = np.where(labels >= 0, labels, n_rows - 1)
+    return np.bincount(row * bins + bin_of, weights=weights, minlength=n_rows * bins).reshape(n_rows, bins)
+
+
+def render_rose(histogram: np.ndarray, *, size: int = 360, mean_deg: Sequence[float] = ()) -> np.ndarray:
+    """
+    Dibuja un diagrama de rosa (simétrico, 360°) con OpenCV.
+
+    Args:
+        histogram: Salida de :func:`rose_histogram` (1-D o por familias, apiladas).
+        size: Lado de la imagen en px.
+        mean_deg: Orientaciones medias a marcar con una línea.
+
+    Returns:
+        Imagen RGB ``(size, size, 3)``. Los ángulos se dibujan como en la imagen
+        analizada (eje Y hacia abajo); el radio es proporcional a la raíz del
+        conteo (área proporcional a la frecuencia).
+    """
+    import cv2
+
+    stack = np.atleast_2d(np.asarray(histogram, dtype=np.float64))
+    n_rows, bins = stack.shape
+    img = np.full((size, size, 3), 255, dtype=np.uint8)
+    center = np.array([size / 2.0, size / 2.0])
+    radius = size / 2.0 - 10
+    cv2.circle(img, tuple(int(v) for v in center), int(radius), (220, 220, 220), 1, cv2.LINE_AA)
+    cumulative = np.cumsum(stack, axis=0)
+    peak = cumulative[-1].max()
+    if peak <= 0:
+        return img
+    step = 180.0 / bins
+    # De afuera hacia adentro: cada familia tapa la parte interior de la siguiente
+    for row in range(n_rows - 1, -1, -1):
+        color = RANDOM_COLOR if (n_rows > 1 and row == n_rows - 1) else SET_COLORS[row % len(SET_COLORS)]
+        r = radius * np.sqrt(cumulative[row] / peak)
+        for b in np.flatnonzero(r > 0):
+            for offset in (0.0, 180.0):
+                a = np.deg2rad(np.linspace(b * step, (b + 1) * step, 6) + offset)
+                arc = center + r[b] * np.column_stack([np.cos(a), np.sin(a)])
+                poly = np.vstack([center, arc]).round().astype(np.int32)
+                cv2.fillPoly(img, [poly], color, cv2.LINE_AA)
+    for deg in mean_deg:
+        a = np.deg2rad(deg)
+        d = radius * np.array([np.cos(a), np.sin(a)])
+        cv2.line(
+            img, tuple((center - d).round().astype(int)), tuple((center + d).round().astype(int)),
+            (0, 0, 0), 1, cv2.LINE_AA,
+        )
+    return img
@@ -3,25 +3,45 @@
 Funciones implementadas:
     crack_frequency(crack_count, img_width_px, scale_px_per_meter=1000)
     rqd_from_frequency(frequency)
-    gsi(...), rmr(...), q_system(...)
+    gsi(...), q_system(...)
+    rmr(ucs_mpa, rqd_percent, spacing_m, joint_condition, groundwater, orientation)
 
-Nota: Las funciones avanzadas (GSI, RMR, Q-System, etc.) se implementarán en
-versiones futuras. Por ahora devuelven ``None`` como marcador de posición.
+Cada función escalar tiene una versión vectorizada ``*_batch`` que acepta
+arrays (con *broadcasting* de NumPy) y devuelve ``(valores, invalidos)``: en
+lugar de lanzar una excepción, las entradas no válidas se marcan en la máscara
+y su valor es ``NaN``. Los valores válidos coinciden exactamente con los de la
+función escalar.
+
+El RMR sigue a Bieniawski (1989) con tablas de valoración e interpolación
+lineal por tramos (ver la sección RMR89 más abajo).
 """
 from __future__ import annotations
 
-from typing import Optional
+from typing import Dict, Tuple
+
+import numpy as np
 
 __all__ = [
     "crack_frequency",
     "rqd_from_frequency",
     "gsi_from_rmr",
-    "rmr",  # placeholder
+    "rmr",
+    "rmr_components",
+    "joint_condition_rating",
     "q_system",
     "blast_lk",
     "kuz_ram",
+    "crack_frequency_batch",
+    "rqd_from_frequency_batch",
+    "gsi_from_rmr_batch",
+    "q_system_batch",
+    "blast_lk_batch",
+    "kuz_ram_batch",
+    "rmr_batch",
 ]
 
+BatchResult = Tuple[np.ndarray, np.ndarray]
+
 
 def crack_frequency(
     crack_count: int,
@@ -89,11 +109,6 @@ def gsi_from_rmr(rmr_total: float) -> float:
     return max(0.0, round(rmr_total - 5.0, 2))
 
 
-def rmr(*args, **kwargs) -> Optional[float]:  # noqa: D401,E501 ANN001
-    """Placeholder: el cálculo detallado de RMR se implementará más adelante."""
-    return None
-
-
 def q_system(
     rqd_percent: float,
     jn: float,
@@ -150,3 +165,269 @@ def kuz_ram(A: float, V: float, Q_mass: float, RWS: float) -> float:
         * ((115.0 / RWS) ** (19.0 / 30.0))
     )
     return round(xm, 2)
+
+
+# --- Versiones vectorizadas -------------------------------------------------
+
+def _py_round(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """``round()`` de Python aplicado elemento a elemento.
+
+    ``np.round`` coincide con ``round`` salvo cuando ``values * 10**ndigits``
+    queda a menos de unos ulp de un empate (.5); esos pocos casos se resuelven
+    con ``round`` escalar.
+    """
+    flat = np.atleast_1d(values).ravel()
+    scaled = flat * 10.0**ndigits
+    out = np.round(flat, ndigits)
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) <= 1e-7 * np.maximum(1.0, np.abs(scaled))
+    for i in np.flatnonzero(near_tie & np.isfinite(flat)):
+        out[i] = round(float(flat[i]), ndigits)
+    return out.reshape(np.shape(values))
+
+
+def _as_arrays(*values) -> Tuple[np.ndarray, ...]:  # noqa: ANN002
+    return np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in values))
+
+
+def _finish(values: np.ndarray, invalid: np.ndarray) -> BatchResult:
+    invalid = invalid | ~np.isfinite(values)
+    return np.where(invalid, np.nan, values), invalid
+
+
+def crack_frequency_batch(
+    crack_count,  # noqa: ANN001
+    img_width_px,  # noqa: ANN001
+    *,
+    scale_px_per_meter=1000.0,  # noqa: ANN001
+) -> BatchResult:
+    """Versión vectorizada de :func:`crack_frequency`."""
+    count, width_px, scale = _as_arrays(crack_count, img_width_px, scale_px_per_meter)
+    invalid = ~((width_px > 0) & (scale > 0))
+    with np.errstate(all="ignore"):
+        width_m = width_px / scale
+        frequency = np.where(width_m == 0, 0.0, _py_round(count / width_m, 2))
+    return _finish(frequency, invalid)
+
+
+def rqd_from_frequency_batch(frequency) -> BatchResult:  # noqa: ANN001
+    """Versión vectorizada de :func:`rqd_from_frequency`."""
+    (frequency,) = _as_arrays(frequency)
+    with np.errstate(all="ignore"):
+        rqd = np.maximum(0.0, _py_round(100 - 3.3 * frequency, 2))
+    return _finish(rqd, ~np.isfinite(frequency))
+
+
+def gsi_from_rmr_batch(rmr_total) -> BatchResult:  # noqa: ANN001
+    """Versión vectorizada de :func:`gsi_from_rmr`."""
+    (rmr_total,) = _as_arrays(rmr_total)
+    with np.errstate(all="ignore"):
+        gsi = np.maximum(0.0, _py_round(rmr_total - 5.0, 2))
+    return _finish(gsi, ~np.isfinite(rmr_total))
+
+
+def q_system_batch(rqd_percent, jn, jr, ja, jw, srf) -> BatchResult:  # noqa: ANN001
+    """Versión vectorizada de :func:`q_system` (factores ≤ 0 → inválidos)."""
+    rqd_percent, jn, jr, ja, jw, srf = _as_arrays(rqd_percent, jn, jr, ja, jw, srf)
+    invalid = (jn <= 0) | (jr <= 0) | (ja <= 0) | (jw <= 0) | (srf <= 0)
+    invalid |= ~np.isfinite(rqd_percent)
+    with np.errstate(all="ignore"):
+        rqd = np.maximum(0.01, rqd_percent / 100.0)
+        q_val = _py_round((rqd / jn) * (jr / ja) * (jw / srf), 3)
+    return _finish(q_val, invalid)
+
+
+def blast_lk_batch(fe, S, B, c, E) -> BatchResult:  # noqa: ANN001
+    """Versión vectorizada de :func:`blast_lk` (raíces negativas o denominador nulo → inválidos)."""
+    fe, S, B, c, E = _as_arrays(fe, S, B, c, E)
+    with np.errstate(all="ignore"):
+        product = fe * S * B
+        denominator = c * np.sqrt(E)
+        invalid = (product < 0) | (E < 0) | (denominator == 0)
+        q_spec = _py_round((55.0 * np.sqrt(product)) / denominator, 3)
+    return _finish(q_spec, invalid)
+
+
+def kuz_ram_batch(A, V, Q_mass, RWS) -> BatchResult:  # noqa: ANN001
+    """Versión vectorizada de :func:`kuz_ram` (variables ≤ 0 → inválidas)."""
+    A, V, Q_mass, RWS = _as_arrays(A, V, Q_mass, RWS)
+    invalid = (A <= 0) | (V <= 0) | (Q_mass <= 0) | (RWS <= 0)
+    with np.errstate(all="ignore"):
+        xm = (
+            A
+            * (V / Q_mass) ** 0.8
+            * (Q_mass ** (-19.0 / 30.0))
+            * ((115.0 / RWS) ** (19.0 / 30.0))
+        )
+        xm = _py_round(xm, 2)
+    return _finish(xm, invalid)
+
+
+# --- RMR89 (Bieniawski, 1989) -----------------------------------------------
+#
+# Parámetros continuos: la valoración toma el valor de la tabla en el límite
+# inferior de cada clase y se interpola linealmente hasta la clase siguiente
+# (fuera del rango se mantiene el extremo). Así, p. ej., UCS = 100 MPa vale 12
+# y UCS = 75 MPa vale 9.5.
+
+# (límite inferior de clase, valoración)
+RMR_UCS_TABLE = ((0.0, 0.0), (1.0, 1.0), (5.0, 2.0), (25.0, 4.0), (50.0, 7.0), (100.0, 12.0), (250.0, 15.0))
+RMR_RQD_TABLE = ((0.0, 3.0), (25.0, 8.0), (50.0, 13.0), (75.0, 17.0), (90.0, 20.0))
+RMR_SPACING_TABLE = ((0.0, 5.0), (0.06, 8.0), (0.2, 10.0), (0.6, 15.0), (2.0, 20.0))
+
+# Condición de las juntas (0-30) por descripción general
+RMR_JOINT_CONDITION = {
+    "very_rough": 30.0,        # muy rugosas, discontinuas, cerradas, roca sana
+    "slightly_rough": 25.0,    # ligeramente rugosas, apertura < 1 mm, poco alteradas
+    "slightly_rough_weathered": 20.0,  # ídem, paredes muy alteradas
+    "slickensided": 10.0,      # espejos de falla o relleno < 5 mm o apertura 1-5 mm
+    "soft_gouge": 0.0,         # relleno blando > 5 mm o apertura > 5 mm, continuas
+}
+
+# Subvaloraciones de la condición de juntas (guía E de Bieniawski, 1989)
+RMR_PERSISTENCE_TABLE = ((1.0, 3.0, 10.0, 20.0), (6.0, 4.0, 2.0, 1.0, 0.0))
+RMR_APERTURE_TABLE = ((0.1, 1.0, 5.0), (5.0, 4.0, 1.0, 0.0))  # apertura nula: 6
+RMR_ROUGHNESS = {"very_rough": 6.0, "rough": 5.0, "slightly_rough": 3.0, "smooth": 1.0, "slickensided": 0.0}
+RMR_INFILLING = {"none": 6.0, "hard_lt5": 4.0, "hard_gt5": 2.0, "soft_lt5": 2.0, "soft_gt5": 0.0}
+RMR_WEATHERING = {"unweathered": 6.0, "slightly": 5.0, "moderately": 3.0, "highly": 1.0, "decomposed": 0.0}
+
+RMR_GROUNDWATER = {"dry": 15.0, "damp": 10.0, "wet": 7.0, "dripping": 4.0, "flowing": 0.0}
+
+# Ajuste por orientación de las discontinuidades según la obra
+RMR_ORIENTATION = {
+    "tunnels": {"very_favourable": 0.0, "favourable": -2.0, "fair": -5.0, "unfavourable": -10.0, "very_unfavourable": -12.0},
+    "foundations": {"very_favourable": 0.0, "favourable": -2.0, "fair": -7.0, "unfavourable": -15.0, "very_unfavourable": -25.0},
+    "slopes": {"very_favourable": 0.0, "favourable": -5.0, "fair": -25.0, "unfavourable": -50.0, "very_unfavourable": -60.0},
+}
+
+
+def _interp_table(values: np.ndarray, table) -> np.ndarray:  # noqa: ANN001
+    xp, fp = zip(*table)
+    return np.interp(values, xp, fp)
+
+
+def _step_table(values: np.ndarray, table) -> np.ndarray:  # noqa: ANN001
+    bounds, ratings = table
+    return np.asarray(ratings)[np.searchsorted(bounds, values, side="right")]
+
+
+def _lookup(values, table: Dict[str, float]) -> np.ndarray:  # noqa: ANN001
+    """Valoración por etiqueta (``NaN`` si es desconocida); los números pasan tal cual."""
+    arr = np.asarray(values)
+    if arr.dtype.kind not in "USO":
+        return arr.astype(np.float64)
+    labels, inverse = np.unique(arr.astype(str), return_inverse=True)
+    ratings = np.array([table.get(label, np.nan) for label in labels])
+    return ratings[inverse].reshape(arr.shape)
+
+
+def joint_condition_rating(persistence_m, aperture_mm, roughness, infilling, weathering) -> np.ndarray:  # noqa: ANN001,E501
+    """Condición de juntas (0-30) como suma de las cinco subvaloraciones (vectorizada)."""
+    persistence_m, aperture_mm = _as_arrays(persistence_m, aperture_mm)
+    aperture = np.where(aperture_mm == 0, 6.0, _step_table(aperture_mm, RMR_APERTURE_TABLE))
+    return (
+        _step_table(persistence_m, RMR_PERSISTENCE_TABLE)
+        + aperture
+        + _lookup(roughness, RMR_ROUGHNESS)
+        + _lookup(infilling, RMR_INFILLING)
+        + _lookup(weathering, RMR_WEATHERING)
+    )
+
+
+def rmr_components(
+    ucs_mpa,  # noqa: ANN001
+    rqd_percent,  # noqa: ANN001
+    spacing_m,  # noqa: ANN001
+    joint_condition,  # noqa: ANN001
+    groundwater="dry",  # noqa: ANN001
+    orientation="very_favourable",  # noqa: ANN001
+    *,
+    application: str = "tunnels",
+) -> Dict[str, np.ndarray]:
+    """Valoración de cada parámetro del RMR89 (arrays con *broadcasting*).
+
+    ``joint_condition``, ``groundwater`` y ``orientation`` aceptan etiquetas
+    (claves de ``RMR_JOINT_CONDITION``, ``RMR_GROUNDWATER``,
+    ``RMR_ORIENTATION[application]``) o directamente la valoración numérica.
+    """
+    if application not in RMR_ORIENTATION:
+        raise ValueError(f"Aplicación desconocida: {application}")
+    ucs, rqd, spacing = _as_arrays(ucs_mpa, rqd_percent, spacing_m)
+    return {
+        "ucs": _interp_table(ucs, RMR_UCS_TABLE),
+        "rqd": _interp_table(rqd, RMR_RQD_TABLE),
+        "spacing": _interp_table(spacing, RMR_SPACING_TABLE),
+        "joint_condition": _lookup(joint_condition, RMR_JOINT_CONDITION),
+        "groundwater": _lookup(groundwater, RMR_GROUNDWATER),
+        "orientation": _lookup(orientation, RMR_ORIENTATION[application]),
+    }
+
+
+def rmr_batch(
+    ucs_mpa,  # noqa: ANN001
+    rqd_percent,  # noqa: ANN001
+    spacing_m,  # noqa: ANN001
+    joint_condition,  # noqa: ANN001
+    groundwater="dry",  # noqa: ANN001
+    orientation="very_favourable",  # noqa: ANN001
+    *,
+    application: str = "tunnels",
+) -> BatchResult:
+    """RMR89 vectorizado: ``(valores, invalidos)`` para una base de tramos completa.
+
+    Son inválidas las entradas con UCS < 0, RQD fuera de [0, 100],
+    espaciado < 0, condición de juntas fuera de [0, 30], agua fuera de [0, 15]
+    o etiquetas desconocidas.
+    """
+    parts = rmr_components(
+        ucs_mpa, rqd_percent, spacing_m, joint_condition, groundwater, orientation,
+        application=application,
+    )
+    ucs, rqd, spacing = _as_arrays(ucs_mpa, rqd_percent, spacing_m)
+    total = sum(np.broadcast_arrays(*parts.values()))
+    invalid = (
+        np.isnan(ucs) | (ucs < 0)
+        | np.isnan(rqd) | (rqd < 0) | (rqd > 100)
+        | np.isnan(spacing) | (spacing < 0)
+        | ~((parts["joint_condition"] >= 0) & (parts["joint_condition"] <= 30))
+        | ~((parts["groundwater"] >= 0) & (parts["groundwater"] <= 15))
+        | np.isnan(parts["orientation"])
+    )
+    with np.errstate(all="ignore"):
+        total = _py_round(np.clip(total, 0.0, 100.0), 2)
+    return _finish(total, invalid)
+
+
+def rmr(
+    ucs_mpa: float,
+    rqd_percent: float,
+    spacing_m: float,
+    joint_condition,  # noqa: ANN001
+    groundwater="dry",  # noqa: ANN001
+    orientation="very_favourable",  # noqa: ANN001
+    *,
+    application: str = "tunnels",
+) -> float:
+    """Calcula el RMR89 (0-100) de un tramo; ver :func:`rmr_batch`.
+
+    Parameters
+    ----------
+    ucs_mpa : float
+        Resistencia a compresión uniaxial de la roca intacta (MPa).
+    rqd_percent : float
+        RQD (%).
+    spacing_m : float
+        Espaciado medio de discontinuidades (m).
+    joint_condition : str or float
+        Condición de juntas (etiqueta o valoración 0-30).
+    groundwater : str or float
+        Condición de agua (etiqueta o valoración 0-15).
+    orientation : str or float
+        Orientación de las discontinuidades respecto a la obra.
+    """
+    value, invalid = rmr_batch(
+        ucs_mpa, rqd_percent, spacing_m, joint_condition, groundwater, orientation,
+        application=application,
+    )
+    if invalid.any():
+        raise ValueError("Parámetros de RMR fuera de rango o no reconocidos.")
+    return float(value)
@@ -0,0 +1,274 @@
+"""Análisis de varias ROIs con nombre sobre una misma imagen en una sola pasada.
+
+En lugar de recortar y analizar cada ventana por separado, el preproceso, los
+bordes, la esqueletización y el umbral de partículas se ejecutan una sola vez
+sobre la caja que une todas las ROIs, y se etiquetan las componentes una vez.
+Cada ROI lee después sus estadísticas de los mapas de etiquetas compartidos:
+
+* grietas: conteo de píxeles, longitud geodésica, caja, centroide y
+  orientación por etiqueta con ``np.bincount`` sobre la ventana; el centroide
+  (centro de la caja) y la orientación (PCA con ``np.linalg.eigh`` sobre la
+  covarianza armada desde los momentos) siguen las definiciones de
+  :func:`src.crack_detection.detect_cracks`;
+* frecuencia, RQD y P21 por ROI;
+* granulometría: área de cada partícula dentro de la ROI.
+
+Una grieta que cruza el borde de una ROI cuenta en ella con el tramo que cae
+dentro (``min_length_px`` se aplica a ese tramo); a diferencia del recorte,
+los bordes de la ROI no introducen artefactos de Canny.
+"""
+from __future__ import annotations
+
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+__all__ = ["analyze_rois", "clip_rois", "union_box", "CRACK_COLUMNS", "SUMMARY_COLUMNS"]
+
+CRACK_COLUMNS = [
+    "roi",
+    "crack",
+    "centroid_x",
+    "centroid_y",
+    "length_px",
+    "length_m",
+    "length_geodesic_m",
+    "length_major_m",
+    "orientation_deg",
+]
+
+SUMMARY_COLUMNS = [
+    "roi",
+    "left",
+    "top",
+    "width",
+    "height",
+    "area_m2",
+    "crack_count",
+    "total_length_m",
+    "p21_per_m",
+    "frequency_per_m",
+    "rqd_percent",
+    "dominant_orientation_deg",
+    "particle_count",
+    "D50_m",
+    "D80_m",
+    "frequency_vs_mean",
+]
+
+_SQRT2 = float(np.sqrt(2.0))
+
+
+def clip_rois(rois: Sequence[dict], shape) -> List[dict]:  # noqa: ANN001
+    """Recorta las cajas a la imagen y valida nombres únicos y áreas no vacías."""
+    h, w = shape[:2]
+    out, names = [], set()
+    for i, roi in enumerate(rois):
+        name = str(roi.get("name") or f"ROI {i + 1}")
+        if name in names:
+            raise ValueError(f"Nombre de ROI repetido: {name}")
+        names.add(name)
+        left, top = max(0, int(roi["left"])), max(0, int(roi["top"]))
+        right = min(w, int(roi["left"]) + int(roi["width"]))
+        bottom = min(h, int(roi["top"]) + int(roi["height"]))
+        if right <= left or bottom <= top:
+            raise ValueError(f"La ROI '{name}' queda fuera de la imagen.")
+        out.append({"name": name, "left": left, "top": top, "width": right - left, "height": bottom - top})
+    return out
+
+
+def union_box(rois: Sequence[dict]) -> Dict[str, int]:
+    """Caja mínima que contiene todas las ROIs."""
+    left = min(r["left"] for r in rois)
+    top = min(r["top"] for r in rois)
+    right = max(r["left"] + r["width"] for r in rois)
+    bottom = max(r["top"] + r["height"] for r in rois)
+    return {"left": left, "top": top, "width": right - left, "height": bottom - top}
+
+
+def _pair_counts(a: np.ndarray, b: np.ndarray, n: int, extra: Optional[np.ndarray] = None) -> np.ndarray:
+    """Pares de píxeles vecinos con la misma etiqueta, contados por etiqueta."""
+    same = (a > 0) & (a == b)
+    if extra is not None:
+        same &= extra
+    return np.bincount(a[same], minlength=n)
+
+
+def _crack_stats(labels: np.ndarray, n_labels: int) -> Dict[str, np.ndarray]:
+    """Estadísticas por etiqueta dentro de una ventana del mapa de etiquetas."""
+    ys, xs = np.nonzero(labels)
+    lab = labels[ys, xs]
+    # Caja de cada etiqueta dentro de la ventana (el centroide es su centro)
+    x0 = np.full(n_labels, labels.shape[1], dtype=np.int64)
+    y0 = np.full(n_labels, labels.shape[0], dtype=np.int64)
+    x1, y1 = np.full(n_labels, -1, dtype=np.int64), np.full(n_labels, -1, dtype=np.int64)
+    np.minimum.at(x0, lab, xs)
+    np.minimum.at(y0, lab, ys)
+    np.maximum.at(x1, lab, xs)
+    np.maximum.at(y1, lab, ys)
+
+    # Momentos en coma flotante (una sola conversión)
+    xs, ys = xs.astype(np.float64), ys.astype(np.float64)
+    n = np.bincount(lab, minlength=n_labels).astype(np.float64)
+    sx = np.bincount(lab, xs, n_labels)
+    sy = np.bincount(lab, ys, n_labels)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mx, my = sx / n, sy / n
+        # Matriz de dispersión (covarianza × (n - 1)) a partir de momentos
+        sxx = np.bincount(lab, xs * xs, n_labels) - n * mx * mx
+        syy = np.bincount(lab, ys * ys, n_labels) - n * my * my
+        sxy = np.bincount(lab, xs * ys, n_labels) - n * mx * my
+        # Misma covarianza (fila, columna) que np.cov en detect_cracks
+        cov = np.stack([np.stack([syy, sxy], -1), np.stack([sxy, sxx], -1)], -2) / (n - 1)[:, None, None]
+    valid = n >= 2
+    eigvals = np.zeros((n_labels, 2))
+    eigvecs = np.zeros((n_labels, 2, 2))
+    if valid.any():
+        eigvals[valid], eigvecs[valid] = np.linalg.eigh(cov[valid])
+    # Autovector del mayor autovalor (columna 1: eigh los devuelve ascendentes)
+    dy, dx = eigvecs[:, 0, 1], eigvecs[:, 1, 1]
+    orientation = np.where(valid, np.degrees(np.arctan2(dy, dx)), np.nan)
+    major = np.where(
+        valid & (eigvals[:, 1] > 0), 2.0 * np.sqrt(np.maximum(eigvals[:, 1], 0.0) * (n - 1)), n
+    )
+
+    # Longitud geodésica: mismos pasos que crack_detection._geodesic_length_px
+    horizontal = _pair_counts(labels[:, :-1], labels[:, 1:], n_labels)
+    vertical = _pair_counts(labels[:-1, :], labels[1:, :], n_labels)
+    diag_main = _pair_counts(
+        labels[:-1, :-1], labels[1:, 1:], n_labels, (labels[:-1, 1:] == 0) & (labels[1:, :-1] == 0)
+    )
+    diag_anti = _pair_counts(
+        labels[:-1, 1:], labels[1:, :-1], n_labels, (labels[:-1, :-1] == 0) & (labels[1:, 1:] == 0)
+    )
+    return {
+        "count": n,
+        "left": x0,
+        "top": y0,
+        "width": x1 - x0 + 1,
+        "height": y1 - y0 + 1,
+        "geodesic": horizontal + vertical + _SQRT2 * (diag_main + diag_anti),
+        "major": major,
+        "orientation": orientation,
+    }
+
+
+def analyze_rois(
+    image: np.ndarray,
+    rois: Sequence[dict],
+    *,
+    scale_px_per_m: float,
+    min_length_px: int = 50,
+    min_area_px: int = 200,
+    progress: Optional[Callable[[str, float], None]] = None,
+) -> dict:
+    """
+    Analiza grietas y granulometría en varias ROIs con una sola pasada de imagen.
+
+    Args:
+        image: Imagen RGB completa (H, W, 3).
+        rois: Lista de ``{"name", "left", "top", "width", "height"}`` en px.
+        scale_px_per_m: Escala px/m.
+        min_length_px: Píxeles mínimos de esqueleto dentro de la ROI por grieta.
+        min_area_px: Área mínima de partícula dentro de la ROI.
+        progress: ``progress(etapa, fraccion)``.
+
+    Returns:
+        Diccionario con ``union`` (caja procesada), ``skeleton`` (esqueleto de
+        la unión), ``rois`` (por ROI: caja, filas de grietas según
+        ``CRACK_COLUMNS`` y diámetros de partículas) y ``summary`` (una fila
+        por ROI según ``SUMMARY_COLUMNS``).
+    """
+    import cv2
+
+    from src import crack_detection, export, fragmentation, metrics
+
+    if scale_px_per_m <= 0:
+        raise ValueError("La escala debe ser positiva.")
+    if not rois:
+        raise ValueError("Se requiere al menos una ROI.")
+    report = progress or (lambda stage, fraction: None)
+    boxes = clip_rois(rois, image.shape)
+    union = union_box(boxes)
+    ux, uy = union["left"], union["top"]
+    crop = np.ascontiguousarray(image[uy:uy + union["height"], ux:ux + union["width"]])
+
+    # Una sola pasada de píxeles sobre la unión
+    skeleton = crack_detection.crack_skeleton(crop, lambda stage, f: report(stage, 0.6 * f))
+    n_cracks, crack_labels = cv2.connectedComponents(skeleton, connectivity=8)
+    particles = fragmentation.particle_mask(crop, lambda stage, f: report(stage, 0.6 + 0.2 * f))
+    n_particles, particle_labels = cv2.connectedComponents(particles, connectivity=8)
+
+    results = []
+    for k, box in enumerate(boxes):
+        report(f"ROI {box['name']}", 0.8 + 0.2 * k / len(boxes))
+        window = (
+            slice(box["top"] - uy, box["top"] - uy + box["height"]),
+            slice(box["left"] - ux, box["left"] - ux + box["width"]),
+        )
+        stats = _crack_stats(crack_labels[window], n_cracks)
+        keep = np.flatnonzero(stats["count"] >= max(min_length_px, 1))
+        keep = keep[keep > 0]
+        to_m = 1.0 / scale_px_per_m
+        cracks = [
+            {
+                "roi": box["name"],
+                "crack": int(i),
+                "centroid_x": int(box["left"] + stats["left"][i] + stats["width"][i] / 2),
+                "centroid_y": int(box["top"] + stats["top"][i] + stats["height"][i] / 2),
+                "length_px": int(stats["count"][i]),
+                "length_m": round(float(stats["count"][i]) * to_m, 4),
+                "length_geodesic_m": round(float(stats["geodesic"][i]) * to_m, 4),
+                "length_major_m": round(float(stats["major"][i]) * to_m, 4),
+                "orientation_deg": (
+                    None if np.isnan(stats["orientation"][i]) else round(float(stats["orientation"][i]), 1)
+                ),
+            }
+            for i in keep
+        ]
+
+        areas = np.bincount(particle_labels[window].ravel(), minlength=n_particles)[1:]
+        areas = areas[areas >= min_area_px]
+        diameters_m = (2.0 * np.sqrt(areas / np.pi) * to_m).tolist()
+        granulometry = export.fragmentation_summary(diameters_m)
+
+        lengths = stats["count"][keep]
+        oriented = np.isfinite(stats["orientation"][keep])
+        doubled = np.deg2rad(2.0 * stats["orientation"][keep][oriented])
+        weights = lengths[oriented]
+        dominant = (
+            round(float(np.degrees(np.arctan2(weights @ np.sin(doubled), weights @ np.cos(doubled))) % 360.0 / 2.0), 1)
+            if oriented.any() else None
+        )
+        area_m2 = box["width"] * box["height"] * to_m * to_m
+        total_length_m = float(lengths.sum()) * to_m
+        frequency = metrics.crack_frequency(len(cracks), box["width"], scale_px_per_meter=scale_px_per_m)
+        summary = {
+            "roi": box["name"],
+            **{key: box[key] for key in ("left", "top", "width", "height")},
+            "area_m2": round(area_m2, 4),
+            "crack_count": len(cracks),
+            "total_length_m": round(total_length_m, 4),
+            "p21_per_m": round(total_length_m / area_m2, 4),
+            "frequency_per_m": frequency,
+            "rqd_percent": metrics.rqd_from_frequency(frequency),
+            "dominant_orientation_deg": dominant,
+            "particle_count": granulometry["particle_count"],
+            "D50_m": granulometry.get("D50_m"),
+            "D80_m": granulometry.get("D80_m"),
+        }
+        results.append({"box": box, "cracks": cracks, "diameters_m": diameters_m, "summary": summary})
+
+    # Comparación: frecuencia de cada ROI respecto de la media de todas
+    mean_frequency = float(np.mean([r["summary"]["frequency_per_m"] for r in results]))
+    for r in results:
+        r["summary"]["frequency_vs_mean"] = (
+            round(r["summary"]["frequency_per_m"] / mean_frequency, 3) if mean_frequency > 0 else None
+        )
+    report("Completado", 1.0)
+    return {
+        "union": union,
+        "skeleton": skeleton,
+        "rois": results,
+        "summary": [r["summary"] for r in results],
+    }
@@ -0,0 +1,300 @@
+"""Vectorización de esqueletos de grietas en polilíneas simplificadas.
+
+Cada componente de ``crack_mask`` se convierte en un grafo de píxeles
+(8-vecindad; los pasos diagonales sólo se conectan si no hay un camino
+ortogonal equivalente, igual que ``length_geodesic_px``). El grafo se parte
+en tramos entre extremos y bifurcaciones, y cada tramo se simplifica con
+Douglas-Peucker (``cv2.approxPolyDP``) con una tolerancia en metros.
+
+El resultado se guarda en forma plana: ``coords`` (vértices ``x, y``) y
+``offsets`` (la polilínea ``i`` es ``coords[offsets[i]:offsets[i + 1]]``),
+más la fila de ``crack_info`` de cada polilínea. Longitudes, orientaciones,
+intersecciones con scanlines y el dibujo se calculan sobre los segmentos, sin
+volver a recorrer el raster.
+"""
+from __future__ import annotations
+
+import io
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+__all__ = ["CrackPolylines", "vectorize_cracks"]
+
+
+class CrackPolylines:
+    """
+    Polilíneas de grietas en arrays planos.
+
+    Args:
+        coords: Vértices ``(N, 2)`` en px (``x, y``; eje Y hacia abajo).
+        offsets: Inicio de cada polilínea en ``coords`` (``M + 1`` valores).
+        crack_row: Fila de ``crack_info`` de cada polilínea (``M``).
+        crack_ids: IDs de grieta por fila de ``crack_info``.
+        shape: Forma ``(alto, ancho)`` de la imagen de origen.
+        tolerance_px: Tolerancia de Douglas-Peucker usada.
+    """
+
+    def __init__(
+        self,
+        coords: np.ndarray,
+        offsets: np.ndarray,
+        crack_row: np.ndarray,
+        crack_ids: np.ndarray,
+        shape: Tuple[int, int],
+        tolerance_px: float,
+    ):
+        self.coords = coords
+        self.offsets = offsets
+        self.crack_row = crack_row
+        self.crack_ids = crack_ids
+        self.shape = tuple(int(v) for v in shape)
+        self.tolerance_px = float(tolerance_px)
+
+    def __len__(self) -> int:
+        return int(self.offsets.size - 1)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.coords.nbytes + self.offsets.nbytes + self.crack_row.nbytes + self.crack_ids.nbytes)
+
+    def segments(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Extremos ``(p0, p1)`` de cada segmento y la fila de grieta a la que pertenece."""
+        pts = self.coords.astype(np.float64)
+        counts = np.diff(self.offsets)
+        keep = np.ones(max(pts.shape[0] - 1, 0), dtype=bool)
+        ends = self.offsets[1:-1] - 1  # el último vértice de una polilínea no une con la siguiente
+        keep[ends[ends < keep.size]] = False
+        row = np.repeat(self.crack_row, counts)[:-1][keep] if pts.shape[0] else np.zeros(0, np.int64)
+        return pts[:-1][keep], pts[1:][keep], row
+
+    def lengths_px(self) -> np.ndarray:
+        """Longitud de cada grieta (suma de sus segmentos), alineada con ``crack_ids``."""
+        p0, p1, row = self.segments()
+        return np.bincount(row, weights=np.hypot(*(p1 - p0).T), minlength=self.crack_ids.size)
+
+    def orientations_deg(self) -> np.ndarray:
+        """
+        Orientación axial media de cada grieta en [0, 180), ponderada por longitud.
+
+        Misma convención que ``crack_info["orientation_deg"]`` (eje Y hacia
+        abajo); ``nan`` si la grieta no tiene segmentos.
+        """
+        p0, p1, row = self.segments()
+        d = p1 - p0
+        length = np.hypot(d[:, 0], d[:, 1])
+        doubled = 2.0 * np.arctan2(d[:, 1], d[:, 0])
+        n = self.crack_ids.size
+        c = np.bincount(row, weights=length * np.cos(doubled), minlength=n)
+        s = np.bincount(row, weights=length * np.sin(doubled), minlength=n)
+        with np.errstate(invalid="ignore"):
+            out = np.degrees(np.arctan2(s, c)) % 360.0 / 2.0
+        out[(c == 0) & (s == 0)] = np.nan
+        return out
+
+    def scanline_intersections(
+        self, angles_deg: Sequence[float] = tuple(range(0, 180, 5)), *, line_spacing_px: float = 10.0
+    ) -> np.ndarray:
+        """
+        Cruces de los segmentos con familias de scanlines paralelas.
+
+        Usa la misma geometría que :func:`src.scanlines.scanline_survey`
+        (ángulos antihorarios, familias centradas en la imagen): un segmento
+        cruza las líneas cuyo desplazamiento normal cae entre las proyecciones
+        de sus extremos, así que el conteo es analítico.
+
+        Returns:
+            Intersecciones por dirección (alineadas con ``angles_deg``).
+        """
+        p0, p1, _ = self.segments()
+        h, w = self.shape
+        theta = np.deg2rad(np.asarray(angles_deg, dtype=np.float64))
+        normals = np.column_stack([np.sin(theta), np.cos(theta)])  # (-dy, dx) con dy = -sin
+        radius = 0.5 * float(np.hypot(w, h))
+        offsets = np.arange(-radius, radius + 1e-9, line_spacing_px)
+        first = offsets[0] - offsets.mean()
+        center = np.array([(w - 1) / 2.0, (h - 1) / 2.0])
+        q0 = (p0 - center) @ normals.T
+        q1 = (p1 - center) @ normals.T
+        lo = np.ceil((np.minimum(q0, q1) - first) / line_spacing_px)
+        hi = np.ceil((np.maximum(q0, q1) - first) / line_spacing_px)
+        return (hi - lo).sum(axis=0).astype(np.int64)
+
+    def frequency_per_m(
+        self,
+        angles_deg: Sequence[float] = tuple(range(0, 180, 5)),
+        *,
+        scale_px_per_m: float,
+        line_spacing_px: float = 10.0,
+    ) -> np.ndarray:
+        """Frecuencia lineal por dirección; la longitud total de scanlines es ``área / separación``."""
+        h, w = self.shape
+        total_m = h * w / line_spacing_px / scale_px_per_m
+        counts = self.scanline_intersections(angles_deg, line_spacing_px=line_spacing_px)
+        return counts / total_m
+
+    def render(self, *, thickness: int = 1, shape: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """Rasteriza las polilíneas en una máscara ``uint8`` (0/255)."""
+        import cv2
+
+        out = np.zeros(shape or self.shape, dtype=np.uint8)
+        if len(self):
+            parts = np.split(self.coords.astype(np.int32), self.offsets[1:-1])
+            cv2.polylines(out, parts, False, 255, thickness)
+        return out
+
+    def to_npz(self) -> bytes:
+        """Serializa a ``.npz`` comprimido (vértices, desplazamientos e IDs)."""
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            coords=self.coords,
+            offsets=self.offsets,
+            crack_id=self.crack_ids[self.crack_row],
+            crack_row=self.crack_row,
+            crack_ids=self.crack_ids,
+            shape=np.array(self.shape),
+            tolerance_px=np.array(self.tolerance_px),
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def from_npz(cls, data: bytes) -> "CrackPolylines":
+        with np.load(io.BytesIO(data)) as npz:
+            return cls(
+                npz["coords"], npz["offsets"], npz["crack_row"], npz["crack_ids"],
+                tuple(npz["shape"]), float(npz["tolerance_px"]),
+            )
+
+
+def _pixel_graph(mask: np.ndarray):
+    """Nodos (índices planos en la máscara con borde) y aristas del grafo de píxeles."""
+    pad = np.pad(mask, 1)
+    width = pad.shape[1]
+    flat = pad.ravel()
+    nodes = np.flatnonzero(flat)
+    core = (slice(1, -1), slice(1, -1))
+    right = pad[core] & pad[1:-1, 2:]
+    down = pad[core] & pad[2:, 1:-1]
+    diag_r = pad[core] & pad[2:, 2:] & ~pad[1:-1, 2:] & ~pad[2:, 1:-1]
+    diag_l = pad[core] & pad[2:, :-2] & ~pad[1:-1, :-2] & ~pad[2:, 1:-1]
+
+    def start(cond: np.ndarray) -> np.ndarray:
+        rows, cols = np.nonzero(cond)
+        return (rows + 1) * width + cols + 1
+
+    u_parts, v_parts = [], []
+    for cond, step in ((right, 1), (down, width), (diag_r, width + 1), (diag_l, width - 1)):
+        u = start(cond)
+        u_parts.append(u)
+        v_parts.append(u + step)
+    u = np.searchsorted(nodes, np.concatenate(u_parts))
+    v = np.searchsorted(nodes, np.concatenate(v_parts))
+    return nodes, width, u, v
+
+
+def _trace(n_nodes: int, u: np.ndarray, v: np.ndarray) -> Tuple[List[List[int]], List[bool]]:
+    """Parte el grafo en tramos entre nodos de grado ≠ 2 (y ciclos aislados)."""
+    n_edges = u.size
+    src = np.concatenate([u, v])
+    dst = np.concatenate([v, u])
+    eid = np.concatenate([np.arange(n_edges), np.arange(n_edges)])
+    order = np.argsort(src, kind="stable")
+    degree = np.bincount(src, minlength=n_nodes)
+    indptr = np.concatenate([[0], np.cumsum(degree)]).tolist()
+    nbr, eid = dst[order].tolist(), eid[order].tolist()
+    deg = degree.tolist()
+    used = bytearray(n_edges)
+    paths: List[List[int]] = []
+    closed: List[bool] = []
+
+    def walk(start: int, k: int) -> None:
+        path = [start]
+        while True:
+            used[eid[k]] = 1
+            cur = nbr[k]
+            path.append(cur)
+            if cur == start or deg[cur] != 2:
+                break
+            a = indptr[cur]
+            k = a + 1 if used[eid[a]] else a
+            if used[eid[k]]:
+                break
+        paths.append(path)
+        closed.append(path[0] == path[-1])
+
+    for node in np.flatnonzero((degree != 2) & (degree > 0)).tolist():
+        for k in range(indptr[node], indptr[node + 1]):
+            if not used[eid[k]]:
+                walk(node, k)
+    # Lo que queda son ciclos en los que todos los nodos tienen grado 2
+    for node in np.flatnonzero(degree == 2).tolist():
+        k = indptr[node]
+        if not used[eid[k]]:
+            walk(node, k)
+    return paths, closed
+
+
+def vectorize_cracks(
+    crack_mask: np.ndarray,
+    crack_info: List[dict],
+    *,
+    tolerance_m: float = 0.005,
+    scale_px_per_m: Optional[float] = None,
+    tolerance_px: Optional[float] = None,
+) -> CrackPolylines:
+    """
+    Convierte el esqueleto de cada grieta en polilíneas simplificadas.
+
+    Args:
+        crack_mask: Máscara/esqueleto de grietas filtradas de ``detect_cracks``.
+        crack_info: Información de las grietas (asocia cada tramo a su ``id``).
+        tolerance_m: Distancia máxima (m) entre el esqueleto y la polilínea.
+        scale_px_per_m: Escala para convertir ``tolerance_m`` a píxeles.
+        tolerance_px: Tolerancia directa en px (tiene prioridad sobre ``tolerance_m``).
+
+    Returns:
+        CrackPolylines con vértices, desplazamientos y fila de grieta por polilínea.
+    """
+    import cv2
+
+    from src.spatial_index import crack_labels
+
+    if tolerance_px is None:
+        if not scale_px_per_m or scale_px_per_m <= 0:
+            raise ValueError("Se requiere una escala positiva para la tolerancia en metros.")
+        tolerance_px = tolerance_m * scale_px_per_m
+    mask = np.asarray(crack_mask) > 0
+    crack_ids = np.array([c["id"] for c in crack_info], dtype=np.int64)
+    labels = crack_labels(mask, crack_info)
+
+    nodes, width, u, v = _pixel_graph(mask)
+    paths, closed = _trace(nodes.size, u, v)
+    lengths = np.fromiter((len(p) for p in paths), dtype=np.int64, count=len(paths))
+    pixel = nodes[np.fromiter((i for p in paths for i in p), dtype=np.int64, count=int(lengths.sum()))]
+    xy = np.column_stack([pixel % width - 1, pixel // width - 1]).astype(np.int32)
+    starts = np.concatenate([[0], np.cumsum(lengths)])
+
+    parts: List[np.ndarray] = []
+    for i, is_closed in enumerate(closed):
+        pts = xy[starts[i]:starts[i + 1]]
+        if is_closed:
+            simplified = cv2.approxPolyDP(pts[:-1].reshape(-1, 1, 2), tolerance_px, True).reshape(-1, 2)
+            simplified = np.vstack([simplified, simplified[:1]])
+        else:
+            simplified = cv2.approxPolyDP(pts.reshape(-1, 1, 2), tolerance_px, False).reshape(-1, 2)
+        parts.append(simplified)
+
+    row = labels[xy[starts[:-1], 1], xy[starts[:-1], 0]].astype(np.int64) - 1
+    valid = row >= 0
+    order = np.argsort(np.where(valid, row, crack_ids.size), kind="stable")[: int(valid.sum())]
+    parts = [parts[i] for i in order]
+    counts = np.fromiter((p.shape[0] for p in parts), dtype=np.int64, count=len(parts))
+    return CrackPolylines(
+        coords=np.concatenate(parts).astype(np.int32) if parts else np.zeros((0, 2), np.int32),
+        offsets=np.concatenate([[0], np.cumsum(counts)]).astype(np.int64),
+        crack_row=row[order],
+        crack_ids=crack_ids,
+        shape=mask.shape,
+        tolerance_px=tolerance_px,
+    )
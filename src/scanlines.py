@@ -0,0 +1,194 @@
+"""Scanlines virtuales: frecuencia lineal, espaciados y RQD por dirección.
+
+En lugar de dividir el número de grietas por el ancho de la imagen
+(:func:`src.metrics.crack_frequency`), se trazan familias de líneas paralelas
+a varios ángulos sobre la máscara/esqueleto de grietas y se localizan sus
+intersecciones. Todas las líneas se muestrean juntas, como una matriz
+``(líneas × muestras)`` procesada por bloques:
+
+* frecuencia lineal real por dirección (intersecciones / longitud);
+* distribución de espaciados entre intersecciones consecutivas;
+* RQD a partir de las longitudes intactas reales (piezas ≥ ``min_piece_m``).
+
+Los ángulos se miden en grados desde el eje X de la imagen, en sentido
+antihorario (0° = horizontal, 90° = vertical).
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+__all__ = ["ScanlineSurvey", "scanline_survey"]
+
+
+class ScanlineSurvey:
+    """Resultado por dirección (arrays alineados con ``angles_deg``)."""
+
+    def __init__(
+        self,
+        angles_deg: np.ndarray,
+        lines: np.ndarray,
+        length_m: np.ndarray,
+        intersections: np.ndarray,
+        intact_m: np.ndarray,
+        spacings_m: List[np.ndarray],
+    ):
+        self.angles_deg = angles_deg
+        self.lines = lines
+        self.length_m = length_m
+        self.intersections = intersections
+        self.intact_m = intact_m
+        self.spacings_m = spacings_m
+
+    @property
+    def frequency_per_m(self) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.length_m > 0, self.intersections / self.length_m, np.nan)
+
+    @property
+    def rqd_percent(self) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.length_m > 0, 100.0 * self.intact_m / self.length_m, np.nan)
+
+    def at(self, angle_deg: float) -> int:
+        """Índice de la dirección más cercana a ``angle_deg`` (eje axial)."""
+        diff = np.abs((self.angles_deg - angle_deg + 90.0) % 180.0 - 90.0)
+        return int(np.argmin(diff))
+
+    def as_rows(self) -> List[Dict[str, float]]:
+        rows = []
+        for i, angle in enumerate(self.angles_deg):
+            spacings = self.spacings_m[i]
+            rows.append(
+                {
+                    "angle_deg": float(angle),
+                    "lines": int(self.lines[i]),
+                    "length_m": float(self.length_m[i]),
+                    "intersections": int(self.intersections[i]),
+                    "frequency_per_m": float(self.frequency_per_m[i]),
+                    "mean_spacing_m": float(spacings.mean()) if spacings.size else float("nan"),
+                    "rqd_percent": float(self.rqd_percent[i]),
+                }
+            )
+        return rows
+
+
+def _dilate(mask: np.ndarray) -> np.ndarray:
+    """Dilatación 3×3: ninguna línea de 1 px se cuela entre dos muestras."""
+    out = mask.copy()
+    out[1:, :] |= mask[:-1, :]
+    out[:-1, :] |= mask[1:, :]
+    grown = out.copy()
+    grown[:, 1:] |= out[:, :-1]
+    grown[:, :-1] |= out[:, 1:]
+    return grown
+
+
+def scanline_survey(
+    crack_mask: np.ndarray,
+    *,
+    scale_px_per_m: float,
+    angles_deg: Sequence[float] = tuple(range(0, 180, 5)),
+    line_spacing_px: float = 10.0,
+    step_px: float = 1.0,
+    min_piece_m: float = 0.1,
+    chunk_lines: int = 512,
+) -> ScanlineSurvey:
+    """
+    Intersecta familias de scanlines con la máscara de grietas.
+
+    Args:
+        crack_mask: Máscara binaria de grietas o esqueleto (H, W).
+        scale_px_per_m: Escala para convertir longitudes a metros.
+        angles_deg: Direcciones de las familias de scanlines.
+        line_spacing_px: Separación entre scanlines paralelas (px).
+        step_px: Paso de muestreo a lo largo de cada línea (px).
+        min_piece_m: Longitud mínima de pieza intacta para el RQD (m).
+        chunk_lines: Líneas muestreadas por bloque (acota la memoria).
+
+    Returns:
+        ScanlineSurvey con longitud, intersecciones, longitud intacta y
+        espaciados por dirección.
+    """
+    if scale_px_per_m <= 0:
+        raise ValueError("La escala debe ser positiva.")
+    mask = _dilate(np.asarray(crack_mask) > 0)
+    h, w = mask.shape
+    angles = np.asarray(angles_deg, dtype=np.float64)
+    theta = np.deg2rad(angles)
+    dx, dy = np.cos(theta), -np.sin(theta)  # eje Y de la imagen hacia abajo
+    nx, ny = -dy, dx
+
+    radius = 0.5 * float(np.hypot(w, h))
+    offsets = np.arange(-radius, radius + 1e-9, line_spacing_px)
+    offsets -= offsets.mean()  # familias centradas en la imagen
+    t = np.arange(-radius, radius + 1e-9, step_px)
+    line_angle = np.repeat(np.arange(angles.size), offsets.size)
+    line_offset = np.tile(offsets, angles.size)
+    cx, cy = (w - 1) / 2.0, (h - 1) / 2.0
+    origin_x = cx + line_offset * nx[line_angle]
+    origin_y = cy + line_offset * ny[line_angle]
+
+    n_lines = line_angle.size
+    length_px = np.zeros(n_lines)
+    counts = np.zeros(n_lines, dtype=np.int64)
+    intact_px = np.zeros(n_lines)
+    spacing_parts: List[np.ndarray] = []
+    spacing_angle_parts: List[np.ndarray] = []
+    piece_threshold = min_piece_m * scale_px_per_m
+
+    for start in range(0, n_lines, chunk_lines):
+        sl = slice(start, min(start + chunk_lines, n_lines))
+        a = line_angle[sl]
+        xs = np.rint(origin_x[sl, None] + t[None, :] * dx[a, None]).astype(np.int32)
+        ys = np.rint(origin_y[sl, None] + t[None, :] * dy[a, None]).astype(np.int32)
+        valid = (xs >= 0) & (xs < w) & (ys >= 0) & (ys < h)
+        hits = np.zeros(valid.shape, dtype=bool)
+        hits[valid] = mask[ys[valid], xs[valid]]
+
+        n_valid = valid.sum(axis=1)
+        length_px[sl] = n_valid * step_px
+        first = np.argmax(valid, axis=1)
+        last = valid.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+
+        # Intersección = centro de cada tramo consecutivo de muestras con grieta
+        edges = np.diff(np.pad(hits, ((0, 0), (1, 1))).astype(np.int8), axis=1)
+        run_line, run_start = np.nonzero(edges == 1)
+        _, run_end = np.nonzero(edges == -1)
+        centers = (run_start + run_end - 1) / 2.0
+        counts[sl] = np.bincount(run_line, minlength=hits.shape[0])
+
+        # Piezas intactas: de extremo a extremo pasando por cada intersección
+        has_length = n_valid > 0
+        rows = np.flatnonzero(has_length)
+        bounds_line = np.concatenate([rows, run_line, rows])
+        bounds_pos = np.concatenate([first[rows] - 0.5, centers, last[rows] + 0.5])
+        order = np.lexsort((bounds_pos, bounds_line))
+        bounds_line, bounds_pos = bounds_line[order], bounds_pos[order]
+        same = bounds_line[1:] == bounds_line[:-1]
+        pieces = np.diff(bounds_pos)[same] * step_px
+        piece_line = bounds_line[1:][same]
+        long_pieces = pieces >= piece_threshold
+        intact_px[sl] = np.bincount(
+            piece_line[long_pieces], weights=pieces[long_pieces], minlength=hits.shape[0]
+        )
+
+        # Espaciados: sólo entre intersecciones consecutivas de la misma línea
+        same_run = run_line[1:] == run_line[:-1]
+        spacing_parts.append(np.diff(centers)[same_run] * step_px)
+        spacing_angle_parts.append(a[run_line[1:][same_run]])
+
+    to_m = 1.0 / scale_px_per_m
+    used = length_px > 0
+    n_angles = angles.size
+    spacings = np.concatenate(spacing_parts) * to_m if spacing_parts else np.zeros(0)
+    spacing_angle = np.concatenate(spacing_angle_parts) if spacing_angle_parts else np.zeros(0, int)
+    return ScanlineSurvey(
+        angles_deg=angles,
+        lines=np.bincount(line_angle[used], minlength=n_angles),
+        length_m=np.bincount(line_angle, weights=length_px, minlength=n_angles) * to_m,
+        intersections=np.bincount(line_angle, weights=counts, minlength=n_angles).astype(np.int64),
+        intact_m=np.bincount(line_angle, weights=intact_px, minlength=n_angles) * to_m,
+        spacings_m=[spacings[spacing_angle == i] for i in range(n_angles)],
+    )
@@ -0,0 +1,363 @@
+"""Servicio HTTP local de análisis con cola de trabajos.
+
+Permite que tabletas de terreno envíen fotografías sin usar la UI de
+Streamlit. Se basa sólo en la biblioteca estándar (``http.server``) y reutiliza
+el pool acotado de :mod:`src.core.background` y la caché de
+:mod:`src.core.analysis`.
+
+Endpoints
+---------
+    POST /jobs?analysis=cracks&scale_px_per_m=1000&min_length_px=50
+    POST /jobs?analysis=fragmentation&scale_px_per_m=1000&min_area_px=200
+        Cuerpo: bytes de la imagen (JPG/PNG). Devuelve ``202`` con ``job_id``
+        (o ``200`` si el mismo análisis ya terminó).
+    GET /jobs/<job_id>
+        Estado, progreso y resultado (JSON).
+    POST /metrics/<funcion>
+        Cuerpo JSON con los argumentos de una función de ``src.metrics``.
+    GET /health
+        Estado del pool y estadísticas de caché.
+
+Uso::
+
+    python -m src.cli serve --port 8765 --workers 2
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from src import metrics
+from src.core import analysis
+from src.core.background import AnalysisJob, BackgroundExecutor, ExecutorBusy
+from src.core.image_identity import DIGEST_SIZE
+from src.core.result_cache import ResultCache, get_result_cache
+
+__all__ = ["AnalysisService", "make_server", "serve"]
+
+# Funciones de métricas expuestas en /metrics/<nombre>
+_METRICS = {
+    "crack_frequency": metrics.crack_frequency,
+    "rqd_from_frequency": metrics.rqd_from_frequency,
+    "gsi_from_rmr": metrics.gsi_from_rmr,
+    "q_system": metrics.q_system,
+    "blast_lk": metrics.blast_lk,
+    "kuz_ram": metrics.kuz_ram,
+}
+
+_CHUNK_SIZE = 1 << 16
+
+
+class ServiceError(Exception):
+    """Error con código HTTP asociado."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _decode_image(buffer: memoryview) -> np.ndarray:
+    """Decodifica JPG/PNG desde el buffer recibido (sin copiarlo) a RGB."""
+    import cv2
+
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    bgr = cv2.imdecode(data, cv2.IMREAD_COLOR)
+    if bgr is None:
+        raise ServiceError(HTTPStatus.UNSUPPORTED_MEDIA_TYPE, "Imagen no válida.")
+    return cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+
+
+def _crack_summary(result: Tuple, image_hash: str, shape: Tuple[int, ...], params: dict) -> dict:
+    from src import export
+
+    _, _, crack_info = result
+    scale = params["scale_px_per_m"]
+    frequency = metrics.crack_frequency(len(crack_info), shape[1], scale_px_per_meter=scale)
+    return {
+        "image_hash": image_hash,
+        "width_px": int(shape[1]),
+        "height_px": int(shape[0]),
+        "crack_count": len(crack_info),
+        "frequency_per_m": frequency,
+        "rqd_percent": metrics.rqd_from_frequency(frequency),
+        "cracks": export.crack_records(crack_info, image_hash=image_hash, scale_px_per_m=scale),
+    }
+
+
+def _fragmentation_summary(result: Tuple, image_hash: str, shape: Tuple[int, ...], params: dict) -> dict:
+    from src import export
+
+    diameters_m, _ = result
+    summary = {"image_hash": image_hash, **export.fragmentation_summary(diameters_m)}
+    summary["diameters_m"] = [round(d, 5) for d in diameters_m]
+    return summary
+
+
+class AnalysisService:
+    """
+    Estado del servicio: pool de trabajo, tabla de trabajos y caché.
+
+    Args:
+        workers: Hilos de análisis.
+        max_pending: Trabajos encolados máximos (``503`` al superarlo).
+        max_jobs: Trabajos recordados (los terminados más antiguos se olvidan).
+        max_upload_bytes: Tamaño máximo de imagen aceptado.
+        cache: Caché de resultados (por defecto la del proceso).
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int = 2,
+        max_pending: int = 16,
+        max_jobs: int = 1000,
+        max_upload_bytes: int = 64 * 1024**2,
+        cache: Optional[ResultCache] = None,
+    ):
+        self.executor = BackgroundExecutor(max_workers=workers, max_pending=max_pending)
+        self.cache = cache or get_result_cache()
+        self.max_jobs = max_jobs
+        self.max_upload_bytes = max_upload_bytes
+        self._jobs: "OrderedDict[str, AnalysisJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # --- Trabajos -----------------------------------------------------------
+    def submit(self, query: Dict[str, str], buffer: memoryview, image_hash: str) -> Tuple[AnalysisJob, bool]:
+        """Encola un análisis o reutiliza el trabajo existente para la misma clave."""
+        kind = query.get("analysis", "cracks")
+        try:
+            if kind == "cracks":
+                params = {
+                    "scale_px_per_m": float(query.get("scale_px_per_m", 1000.0)),
+                    "min_length_px": int(query.get("min_length_px", 50)),
+                }
+            elif kind == "fragmentation":
+                params = {
+                    "scale_px_per_m": float(query.get("scale_px_per_m", 1000.0)),
+                    "min_area_px": int(query.get("min_area_px", 200)),
+                }
+            else:
+                raise ServiceError(HTTPStatus.BAD_REQUEST, f"Análisis desconocido: {kind}")
+        except ValueError as exc:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, f"Parámetro no válido: {exc}") from exc
+        if params["scale_px_per_m"] <= 0:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "La escala debe ser positiva.")
+
+        job_id = self.cache.make_key(f"service:{kind}", image_hash, params)
+        existing = self._reusable_job(job_id)
+        if existing is not None:
+            return existing, True
+        image = _decode_image(buffer)  # fuera del lock: puede tardar
+        with self._lock:
+            existing = self._reusable_job(job_id, locked=True)
+            if existing is not None:
+                return existing, True
+            try:
+                job = self.executor.submit(
+                    job_id, self._run, kind, image, image_hash, params, label=kind
+                )
+            except ExecutorBusy as exc:
+                raise ServiceError(HTTPStatus.SERVICE_UNAVAILABLE, str(exc)) from exc
+            self._jobs[job_id] = job
+            self._forget_old_jobs()
+        return job, False
+
+    def _reusable_job(self, job_id: str, *, locked: bool = False) -> Optional[AnalysisJob]:
+        """Trabajo existente (en curso o terminado sin error) para ``job_id``."""
+        if not locked:
+            with self._lock:
+                return self._reusable_job(job_id, locked=True)
+        job = self._jobs.get(job_id)
+        if job is None or job.error() is not None:
+            return None
+        self._jobs.move_to_end(job_id)
+        return job
+
+    def _run(self, kind: str, image: np.ndarray, image_hash: str, params: dict, *, progress) -> dict:  # noqa: ANN001
+        if kind == "cracks":
+            result = analysis.detect_cracks(
+                image,
+                image_hash=image_hash,
+                min_length_px=params["min_length_px"],
+                cache=self.cache,
+                progress=progress,
+            )
+            return _crack_summary(result, image_hash, image.shape, params)
+        result = analysis.particle_sizes(
+            image,
+            image_hash=image_hash,
+            scale_px_per_meter=params["scale_px_per_m"],
+            min_area_px=params["min_area_px"],
+            cache=self.cache,
+            progress=progress,
+        )
+        return _fragmentation_summary(result, image_hash, image.shape, params)
+
+    def _forget_old_jobs(self) -> None:
+        while len(self._jobs) > self.max_jobs:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if not oldest.done():
+                break
+            del self._jobs[oldest_id]
+
+    def job(self, job_id: str) -> Optional[AnalysisJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    @staticmethod
+    def describe(job: AnalysisJob) -> dict:
+        """Representación JSON de un trabajo."""
+        body: Dict[str, Any] = {
+            "job_id": job.key,
+            "analysis": job.label,
+            "stage": job.stage,
+            "progress": round(job.fraction, 3),
+            "elapsed_s": round(job.elapsed, 3),
+        }
+        if not job.done():
+            body["status"] = "running" if job.fraction > 0 else "queued"
+        elif job.error() is not None:
+            body["status"] = "error"
+            body["error"] = repr(job.error())
+        else:
+            body["status"] = "done"
+            body["result"] = job.result()
+        return body
+
+    def health(self) -> dict:
+        return {
+            "status": "ok",
+            "pending": self.executor.pending,
+            "jobs": len(self._jobs),
+            "cache": self.cache.stats.as_dict(),
+        }
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Manejador HTTP; la instancia del servicio vive en ``self.server.service``."""
+
+    server_version = "FracturasService/1.0"
+
+    @property
+    def service(self) -> AnalysisService:
+        return self.server.service  # type: ignore[attr-defined]
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        if getattr(self.server, "verbose", False):
+            super().log_message(format, *args)
+
+    # --- Utilidades ---------------------------------------------------------
+    def _send_json(self, status: HTTPStatus, body: dict) -> None:
+        data = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self) -> Tuple[memoryview, str]:
+        """Lee el cuerpo por bloques en un único buffer y calcula su hash al vuelo."""
+        length = self.headers.get("Content-Length")
+        if length is None:
+            raise ServiceError(HTTPStatus.LENGTH_REQUIRED, "Se requiere Content-Length.")
+        try:
+            length = int(length)
+        except ValueError as exc:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "Content-Length no válido.") from exc
+        if length <= 0:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "Cuerpo vacío.")
+        if length > self.service.max_upload_bytes:
+            raise ServiceError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Imagen demasiado grande.")
+        buffer = bytearray(length)
+        view = memoryview(buffer)
+        hasher = hashlib.blake2b(digest_size=DIGEST_SIZE)
+        received = 0
+        while received < length:
+            n = self.rfile.readinto(view[received:received + _CHUNK_SIZE])
+            if not n:
+                raise ServiceError(HTTPStatus.BAD_REQUEST, "Cuerpo incompleto.")
+            hasher.update(view[received:received + n])
+            received += n
+        return view, hasher.hexdigest()
+
+    def _dispatch(self, method: str) -> None:
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        try:
+            if method == "GET" and parts == ["health"]:
+                return self._send_json(HTTPStatus.OK, self.service.health())
+            if method == "GET" and len(parts) == 2 and parts[0] == "jobs":
+                job = self.service.job(parts[1])
+                if job is None:
+                    raise ServiceError(HTTPStatus.NOT_FOUND, "Trabajo no encontrado.")
+                return self._send_json(HTTPStatus.OK, self.service.describe(job))
+            if method == "POST" and parts == ["jobs"]:
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                buffer, image_hash = self._read_body()
+                job, reused = self.service.submit(query, buffer, image_hash)
+                body = self.service.describe(job)
+                body["cached"] = reused
+                status = HTTPStatus.OK if body["status"] == "done" else HTTPStatus.ACCEPTED
+                return self._send_json(status, body)
+            if method == "POST" and len(parts) == 2 and parts[0] == "metrics":
+                func = _METRICS.get(parts[1])
+                if func is None:
+                    raise ServiceError(HTTPStatus.NOT_FOUND, f"Métrica desconocida: {parts[1]}")
+                buffer, _ = self._read_body()
+                try:
+                    kwargs = json.loads(bytes(buffer))
+                    value = func(**kwargs)
+                except (TypeError, ValueError) as exc:
+                    raise ServiceError(HTTPStatus.BAD_REQUEST, str(exc)) from exc
+                return self._send_json(HTTPStatus.OK, {"metric": parts[1], "value": value})
+            raise ServiceError(HTTPStatus.NOT_FOUND, "Ruta no encontrada.")
+        except ServiceError as exc:
+            self._send_json(exc.status, {"error": str(exc)})
+        except Exception as exc:  # noqa: BLE001 - el cliente siempre recibe una respuesta
+            self.log_error("Error no controlado en %s %s: %r", method, self.path, exc)
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Error interno del servicio."})
+
+    def do_GET(self) -> None:  # noqa: N802
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:  # noqa: N802
+        self._dispatch("POST")
+
+
+def make_server(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    service: Optional[AnalysisService] = None,
+    *,
+    verbose: bool = False,
+) -> ThreadingHTTPServer:
+    """Crea el servidor (``port=0`` elige un puerto libre)."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.service = service or AnalysisService()  # type: ignore[attr-defined]
+    server.verbose = verbose  # type: ignore[attr-defined]
+    return server
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, *, workers: int = 2) -> None:
+    """Ejecuta el servicio hasta Ctrl+C."""
+    server = make_server(host, port, AnalysisService(workers=workers), verbose=True)
+    print(f"Servicio de análisis en http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.shutdown()  # type: ignore[attr-defined]
@@ -0,0 +1,170 @@
+"""Índice espacial de grietas para selección interactiva y consultas de vecindad.
+
+Se construye una vez al terminar la detección y combina:
+
+* un raster de etiquetas (id de grieta por píxel del esqueleto) para resolver
+  un clic mirando sólo una ventana de ``radius`` píxeles;
+* buckets de grilla sobre los centroides (índice CSR: celdas ordenadas y
+  desplazamientos) para selección por lazo y por rectángulo;
+* un ``cKDTree`` sobre los centroides para vecino más cercano y espaciados.
+
+Ninguna consulta recorre ``crack_info`` completo.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+__all__ = ["CrackIndex", "build_crack_index", "crack_labels", "points_in_polygon"]
+
+
+def points_in_polygon(points: np.ndarray, polygon: Sequence[Tuple[float, float]]) -> np.ndarray:
+    """Máscara de ``points`` (N, 2) dentro del polígono (regla par-impar, vectorizada)."""
+    poly = np.asarray(polygon, dtype=np.float64)
+    x, y = points[:, 0][:, None], points[:, 1][:, None]
+    x0, y0 = poly[:, 0][None, :], poly[:, 1][None, :]
+    x1, y1 = np.roll(poly[:, 0], -1)[None, :], np.roll(poly[:, 1], -1)[None, :]
+    crosses = (y0 > y) != (y1 > y)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_at = x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+    return np.count_nonzero(crosses & (x < x_at), axis=1) % 2 == 1
+
+
+class CrackIndex:
+    """
+    Índice espacial de las grietas detectadas.
+
+    Args:
+        ids: Id de cada grieta (N,).
+        centroids: Centroides ``(x, y)`` en px (N, 2).
+        bboxes: Cajas ``(left, top, width, height)`` en px (N, 4).
+        labels: Raster (H, W) con el índice de fila + 1 de cada píxel del
+            esqueleto (0 = fondo).
+        cell_px: Lado de las celdas de la grilla de buckets.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        centroids: np.ndarray,
+        bboxes: np.ndarray,
+        labels: np.ndarray,
+        cell_px: int = 64,
+    ):
+        from scipy.spatial import cKDTree
+
+        self.ids = ids
+        self.centroids = centroids
+        self.bboxes = bboxes
+        self.labels = labels
+        self.cell_px = int(cell_px)
+        self._row_of = {int(cid): i for i, cid in enumerate(ids)}
+        self._tree = cKDTree(centroids) if len(ids) else None
+
+        h, w = labels.shape
+        self._cols = -(-w // self.cell_px)
+        cells = self._cell(centroids[:, 0], centroids[:, 1])
+        self._order = np.argsort(cells, kind="stable")
+        self._starts = np.searchsorted(
+            cells[self._order], np.arange(-(-h // self.cell_px) * self._cols + 1)
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _cell(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        return (np.asarray(y, dtype=np.int64) // self.cell_px) * self._cols + (
+            np.asarray(x, dtype=np.int64) // self.cell_px
+        )
+
+    def pick(self, x: float, y: float, radius: int = 6) -> Optional[int]:
+        """Id de la grieta cuyo esqueleto está más cerca del clic (``None`` si no hay)."""
+        h, w = self.labels.shape
+        x, y = int(round(x)), int(round(y))
+        x0, x1 = max(0, x - radius), min(w, x + radius + 1)
+        y0, y1 = max(0, y - radius), min(h, y + radius + 1)
+        if x0 >= x1 or y0 >= y1:
+            return None
+        window = self.labels[y0:y1, x0:x1]
+        yy, xx = np.nonzero(window)
+        if not yy.size:
+            return None
+        nearest = np.argmin((yy + y0 - y) ** 2 + (xx + x0 - x) ** 2)
+        return int(self.ids[window[yy[nearest], xx[nearest]] - 1])
+
+    def in_rect(self, x0: float, y0: float, x1: float, y1: float) -> np.ndarray:
+        """Filas (posiciones en ``ids``) con centroide dentro del rectángulo."""
+        h, w = self.labels.shape
+        cx0, cx1 = int(max(0, x0)) // self.cell_px, int(min(w - 1, x1)) // self.cell_px
+        cy0, cy1 = int(max(0, y0)) // self.cell_px, int(min(h - 1, y1)) // self.cell_px
+        if cx1 < cx0 or cy1 < cy0:
+            return np.zeros(0, dtype=np.int64)
+        # Las celdas de una fila de la grilla son contiguas en el índice CSR
+        first = np.arange(cy0, cy1 + 1) * self._cols + cx0
+        spans = [self._order[self._starts[c]:self._starts[c + cx1 - cx0 + 1]] for c in first]
+        rows = np.concatenate(spans) if spans else np.zeros(0, dtype=np.int64)
+        pts = self.centroids[rows]
+        inside = (pts[:, 0] >= x0) & (pts[:, 0] <= x1) & (pts[:, 1] >= y0) & (pts[:, 1] <= y1)
+        return rows[inside]
+
+    def in_polygon(self, polygon: Sequence[Tuple[float, float]]) -> List[int]:
+        """Ids de las grietas con centroide dentro del polígono (lazo)."""
+        if len(polygon) < 3:
+            return []
+        poly = np.asarray(polygon, dtype=np.float64)
+        rows = self.in_rect(*poly.min(axis=0), *poly.max(axis=0))
+        return [int(i) for i in self.ids[rows[points_in_polygon(self.centroids[rows], poly)]]]
+
+    def nearest(self, x: float, y: float, k: int = 1) -> List[Tuple[int, float]]:
+        """``k`` grietas de centroide más cercano a ``(x, y)``: ``[(id, distancia_px)]``."""
+        if self._tree is None:
+            return []
+        k = min(k, len(self.ids))
+        dist, rows = self._tree.query([x, y], k=k)
+        dist, rows = np.atleast_1d(dist), np.atleast_1d(rows)
+        return [(int(self.ids[r]), float(d)) for r, d in zip(rows, dist)]
+
+    def neighbour_spacing(self, crack_id: Optional[int] = None) -> np.ndarray:
+        """
+        Distancia (px) de cada centroide a su vecino más cercano.
+
+        Con ``crack_id`` devuelve sólo la de esa grieta (array de un elemento).
+        """
+        if self._tree is None or len(self.ids) < 2:
+            return np.full(len(self.ids) if crack_id is None else 1, np.nan)
+        pts = self.centroids if crack_id is None else self.centroids[[self._row_of[int(crack_id)]]]
+        dist, _ = self._tree.query(pts, k=2)
+        return dist[:, 1]
+
+
+def crack_labels(crack_mask: np.ndarray, crack_info: List[dict]) -> np.ndarray:
+    """
+    Raster de filas de ``crack_info`` (+1) por píxel de ``crack_mask`` (0 = fondo).
+
+    Las componentes de ``crack_mask`` son las mismas que las de la detección,
+    así que cada una se asocia a su grieta por la caja (y el área) de
+    ``crack_info``.
+    """
+    import cv2
+
+    mask = (np.asarray(crack_mask) > 0).astype(np.uint8)
+    n_labels, labels, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    row_by_box: Dict[tuple, int] = {
+        (*map(int, c.get("bbox", ())), int(c["area"])): i for i, c in enumerate(crack_info)
+    }
+    lut = np.zeros(n_labels, dtype=np.int32)
+    for label in range(1, n_labels):
+        left, top, width, height, area = (int(v) for v in stats[label])
+        row = row_by_box.get((left, top, width, height, area))
+        if row is not None:
+            lut[label] = row + 1
+    return lut[labels]
+
+
+def build_crack_index(crack_mask: np.ndarray, crack_info: List[dict], *, cell_px: int = 64) -> CrackIndex:
+    """Construye el índice a partir de la máscara y la información de grietas."""
+    ids = np.array([c["id"] for c in crack_info], dtype=np.int64)
+    centroids = np.array([c["centroid"] for c in crack_info], dtype=np.float64).reshape(-1, 2)
+    bboxes = np.array([c.get("bbox", (0, 0, 0, 0)) for c in crack_info], dtype=np.int64).reshape(-1, 4)
+    return CrackIndex(ids, centroids, bboxes, crack_labels(crack_mask, crack_info), cell_px=cell_px)
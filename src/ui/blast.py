@@ -0,0 +1,112 @@
+"""Panel del optimizador de voladura (grillas L–K / Kuz–Ram)."""
+
+import time
+
+import streamlit as st
+
+from src import blast_optimizer
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _optimizar(params: dict) -> dict:
+    """Ejecuta la optimización; el caché se indexa por los parámetros del formulario."""
+    import numpy as np
+
+    t0 = time.perf_counter()
+    result = blast_optimizer.optimize_blast(
+        np.linspace(*params["S"]),
+        np.linspace(*params["B"]),
+        np.linspace(*params["Q"]),
+        explosives={n: blast_optimizer.DEFAULT_EXPLOSIVES[n] for n in params["explosivos"]},
+        bench_height_m=params["H"],
+        rock_factor=params["A"],
+        rock_constant=params["c"],
+        fe=params["fe"],
+        target_p80_cm=params["p80"],
+        hole_diameter_mm=params["d"],
+        spacing_burden_ratio=params["ratio"],
+    )
+    return {
+        "top": result.top_rows(),
+        "pareto": result.pareto_rows(),
+        "evaluated": result.evaluated,
+        "feasible": result.feasible,
+        "elapsed": time.perf_counter() - t0,
+    }
+
+
+def _rango(label: str, lo: float, hi: float, n: int, key: str) -> tuple:
+    col1, col2, col3 = st.columns(3)
+    vmin = col1.number_input(f"{label} mín", min_value=0.1, value=lo, key=f"{key}_min")
+    vmax = col2.number_input(f"{label} máx", min_value=0.1, value=hi, key=f"{key}_max")
+    pasos = col3.number_input(f"{label} pasos", min_value=1, max_value=2000, value=n, key=f"{key}_n")
+    return (float(vmin), float(max(vmin, vmax)), int(pasos))
+
+
+def panel_optimizador_voladura() -> None:
+    """
+    Muestra el formulario del optimizador y los mejores diseños encontrados.
+    """
+    import pandas as pd
+
+    with st.form("optimizador_voladura"):
+        S = _rango("Espaciamiento S (m)", 2.0, 8.0, 60, "opt_S")
+        B = _rango("Burden B (m)", 1.5, 6.0, 60, "opt_B")
+        Q = _rango("Carga por pozo Q (kg)", 10.0, 1000.0, 100, "opt_Q")
+        explosivos = st.multiselect(
+            "Explosivos",
+            list(blast_optimizer.DEFAULT_EXPLOSIVES),
+            default=list(blast_optimizer.DEFAULT_EXPLOSIVES),
+            key="opt_explosivos",
+        )
+        col1, col2, col3 = st.columns(3)
+        H = col1.number_input("Altura de banco H (m)", min_value=0.5, value=10.0, key="opt_H")
+        A = col2.number_input("Factor de roca A", min_value=0.1, value=5.0, key="opt_A")
+        c = col3.number_input("Constante de roca c", min_value=0.1, value=1.0, key="opt_c")
+        fe = col1.number_input("Eficiencia fe", min_value=0.1, value=1.0, key="opt_fe")
+        d = col2.number_input("Diámetro de pozo (mm)", min_value=20.0, value=165.0, key="opt_d")
+        p80 = col3.number_input("P80 objetivo (cm)", min_value=0.0, value=5.0, key="opt_p80")
+        limitar_ratio = st.checkbox("Limitar S/B a [1.0, 1.5]", value=True, key="opt_ratio")
+        enviado = st.form_submit_button("Optimizar")
+
+    if not enviado or not explosivos:
+        return
+
+    params = {
+        "S": S, "B": B, "Q": Q, "explosivos": tuple(explosivos),
+        "H": H, "A": A, "c": c, "fe": fe, "d": d,
+        "p80": p80 if p80 > 0 else None,
+        "ratio": (1.0, 1.5) if limitar_ratio else None,
+    }
+    with st.spinner("Evaluando combinaciones..."):
+        result = _optimizar(params)
+
+    st.caption(
+        f"{result['evaluated']:,} combinaciones evaluadas en {result['elapsed']:.2f} s · "
+        f"{result['feasible']:,} cumplen el objetivo"
+    )
+    if not result["top"]:
+        st.warning("Ningún diseño cumple el P80 objetivo con los rangos indicados.")
+    else:
+        columnas = {
+            "explosive": "Explosivo", "S": "S (m)", "B": "B (m)", "Q": "Q (kg)",
+            "K": "K (kg/m³)", "q_lk": "q L–K", "Xm": "Xm (cm)", "n": "n", "P80": "P80 (cm)",
+        }
+        top = pd.DataFrame(result["top"])[list(columnas)].rename(columns=columnas)
+        st.markdown("**Mejores diseños (menor carga específica que cumple el P80)**")
+        st.dataframe(top.round(3), use_container_width=True, hide_index=True)
+
+        mejor = result["top"][0]
+        sizes = [mejor["P80"] * f for f in (0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0)]
+        passing = blast_optimizer.rosin_rammler_passing(sizes, mejor["Xm"], mejor["n"])
+        st.markdown("**Curva Rosin–Rammler del mejor diseño**")
+        st.line_chart(
+            pd.DataFrame(
+                {"Pasante (%)": passing},
+                index=pd.Index([round(x, 3) for x in sizes], name="Tamaño (cm)"),
+            )
+        )
+
+    if result["pareto"]:
+        st.markdown("**Frente de Pareto: carga específica vs. Xm**")
+        st.scatter_chart(pd.DataFrame(result["pareto"]), x="K", y="Xm")
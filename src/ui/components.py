@@ -11,13 +11,10 @@ Incluye:
 from __future__ import annotations
 
 import streamlit as st
-import numpy as np
-from typing import List, Dict, Any, Optional, Tuple
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple
 
-try:  # opcional para redimensionar más eficiente
-    import cv2  # type: ignore
-except Exception:  # noqa: BLE001
-    cv2 = None  # type: ignore
+if TYPE_CHECKING:  # numpy/cv2 se importan sólo cuando se necesitan
+    import numpy as np
 
 
 def mostrar_metricas_resumen(
@@ -91,9 +88,11 @@ def _resize_for_display(img: np.ndarray, max_height: int) -> np.ndarray:
         return img
     scale = max_height / h
     new_size = (int(w * scale), max_height)
-    if cv2 is not None:
-        return cv2.resize(img, new_size, interpolation=cv2.INTER_AREA)
-    return img
+    try:  # opcional para redimensionar más eficiente
+        import cv2  # type: ignore
+    except Exception:  # noqa: BLE001
+        return img
+    return cv2.resize(img, new_size, interpolation=cv2.INTER_AREA)
 
 
 def mostrar_deteccion_grietas(
@@ -164,7 +163,6 @@ def input_rmr() -> float:
 """Componentes reutilizables de la interfaz de usuario."""
 
 import streamlit as st
-import numpy as np
 from typing import List, Dict, Any, Optional
 
 
@@ -277,7 +275,8 @@ def selector_grietas_excluir(crack_info: List[Dict[str, Any]]) -> List[int]:
     all_ids = [c["id"] for c in crack_info]
     excluded_ids = st.multiselect(
         "IDs de grietas a excluir", 
-        options=all_ids
+        options=all_ids,
+        key="grietas_excluidas",
     )
     return excluded_ids
 
@@ -299,18 +298,125 @@ def input_escala() -> float:
     return scale_val
 
 
-def input_rmr() -> float:
+_CONDICION_JUNTAS = {
+    "Muy rugosas, discontinuas, cerradas (30)": "very_rough",
+    "Ligeramente rugosas, apertura < 1 mm (25)": "slightly_rough",
+    "Ligeramente rugosas, paredes alteradas (20)": "slightly_rough_weathered",
+    "Espejos de falla o relleno < 5 mm (10)": "slickensided",
+    "Relleno blando > 5 mm, continuas (0)": "soft_gouge",
+}
+_AGUA = {
+    "Seco (15)": "dry",
+    "Húmedo (10)": "damp",
+    "Mojado (7)": "wet",
+    "Goteo (4)": "dripping",
+    "Flujo (0)": "flowing",
+}
+_ORIENTACION = {
+    "Muy favorable": "very_favourable",
+    "Favorable": "favourable",
+    "Regular": "fair",
+    "Desfavorable": "unfavourable",
+    "Muy desfavorable": "very_unfavourable",
+}
+_OBRA = {"Túneles": "tunnels", "Fundaciones": "foundations", "Taludes": "slopes"}
+
+
+def input_rmr(rqd: float, spacing_m: float) -> float:
     """
-    Muestra el input para el Rock Mass Rating.
+    Calcula el RMR89 a partir del RQD y el espaciado detectados.
+    
+    El usuario completa los parámetros que no se obtienen de la imagen (UCS,
+    condición de juntas, agua y orientación).
+    
+    Args:
+        rqd: RQD detectado (%)
+        spacing_m: Espaciado medio de discontinuidades detectado (m)
     
     Returns:
-        Valor del RMR
+        Valor del RMR (0 si los parámetros no son válidos)
     """
-    rmr_total = st.number_input(
-        "RMR total – Rock Mass Rating (Valoración del Macizo Rocoso) [0-100]",
-        min_value=0.0,
-        max_value=100.0,
-        value=50.0,
-        key="rmr_total",
-    )
+    from src import metrics
+    
+    with st.expander("RMR89 – Rock Mass Rating (Bieniawski, 1989)", expanded=True):
+        spacing_txt = "∞" if spacing_m == float("inf") else f"{spacing_m:.3f} m"
+        st.caption(f"Desde la imagen: RQD = {rqd:.1f} % · espaciado medio = {spacing_txt}")
+        col1, col2 = st.columns(2)
+        ucs = col1.number_input(
+            "UCS – Resistencia a compresión uniaxial (MPa)",
+            min_value=0.0, max_value=400.0, value=100.0, key="rmr_ucs",
+        )
+        condicion = col2.selectbox(
+            "Condición de las juntas", list(_CONDICION_JUNTAS), index=1, key="rmr_juntas"
+        )
+        agua = col1.selectbox("Agua subterránea", list(_AGUA), key="rmr_agua")
+        obra = col2.selectbox("Tipo de obra", list(_OBRA), key="rmr_obra")
+        orientacion = st.selectbox(
+            "Orientación de las discontinuidades", list(_ORIENTACION), key="rmr_orientacion"
+        )
+        
+        args = (ucs, rqd, spacing_m, _CONDICION_JUNTAS[condicion], _AGUA[agua], _ORIENTACION[orientacion])
+        try:
+            rmr_total = metrics.rmr(*args, application=_OBRA[obra])
+        except ValueError:
+            st.error("Parámetros de RMR fuera de rango.")
+            return 0.0
+        
+        parts = metrics.rmr_components(*args, application=_OBRA[obra])
+        st.markdown(f"**RMR89 = {rmr_total:.1f}**")
+        st.caption(
+            " · ".join(
+                f"{nombre}: {float(parts[clave]):.1f}"
+                for nombre, clave in (
+                    ("UCS", "ucs"), ("RQD", "rqd"), ("Espaciado", "spacing"),
+                    ("Juntas", "joint_condition"), ("Agua", "groundwater"),
+                    ("Orientación", "orientation"),
+                )
+            )
+        )
     return rmr_total
+
+
+def mostrar_estadisticas_cache() -> None:
+    """
+    Muestra en la barra lateral las estadísticas de la caché de resultados.
+    """
+    from src.core.result_cache import get_result_cache
+
+    cache = get_result_cache()
+    stats = cache.stats
+    with st.sidebar.expander("🧮 Caché de resultados"):
+        col1, col2 = st.columns(2)
+        col1.metric("Aciertos", stats.hits)
+        col2.metric("Fallos", stats.misses)
+        st.metric("Tasa de aciertos", f"{stats.hit_rate * 100:.1f} %")
+        st.caption(
+            f"Memoria: {cache.memory_bytes / 1024**2:.1f} MB · "
+            f"Disco: {cache.disk_bytes / 1024**2:.1f} MB · "
+            f"Desalojos: {stats.memory_evictions} (mem) / {stats.disk_evictions} (disco)"
+        )
+
+
+def mostrar_memoria_sesion() -> None:
+    """
+    Muestra en la barra lateral el uso de memoria de la sesión actual.
+    """
+    from src.core.session_memory import get_session_memory
+
+    usage = get_session_memory().usage()
+    mb = 1024**2
+    with st.sidebar.expander("💾 Memoria de la sesión"):
+        st.progress(
+            min(1.0, usage["used_bytes"] / max(usage["budget_bytes"], 1)),
+            text=f"{usage['used_bytes'] / mb:.1f} / {usage['budget_bytes'] / mb:.0f} MB",
+        )
+        col1, col2 = st.columns(2)
+        col1.metric("Fuentes", f"{usage['source_bytes'] / mb:.1f} MB")
+        col2.metric("Derivados", f"{usage['derived_bytes'] / mb:.1f} MB")
+        st.caption(
+            f"Desalojos: {usage['evictions']} "
+            f"({usage['evicted_bytes'] / mb:.1f} MB liberados)"
+        )
+        for name, info in usage["entries"].items():
+            kind = "derivado" if info["derived"] else "fuente"
+            st.text(f"{name}: {info['bytes'] / mb:.2f} MB ({kind})")
@@ -0,0 +1,121 @@
+"""Selección interactiva de grietas (clic y lazo) sobre el índice espacial."""
+
+from typing import List, Optional
+
+import numpy as np
+import streamlit as st
+
+from src.ui.components import selector_grietas_excluir
+from src.ui.jobs import _rerun
+from src.ui.scale_calibration import _load_click_coords
+
+_EXCLUDED_KEY = "grietas_excluidas"
+_VERTICES_KEY = "lazo_vertices"
+_LAST_CLICK_KEY = "grietas_ultimo_clic"
+_DISPLAY_WIDTH = 1000
+
+
+def _alternar(ids: List[int], *, excluir: Optional[bool] = None) -> None:
+    """Alterna (o fuerza) la exclusión de ``ids`` en el estado del multiselect."""
+    actuales = set(st.session_state.get(_EXCLUDED_KEY, []))
+    for cid in ids:
+        quitar = cid in actuales if excluir is None else not excluir
+        if quitar:
+            actuales.discard(cid)
+        else:
+            actuales.add(cid)
+    st.session_state[_EXCLUDED_KEY] = sorted(actuales)
+
+
+def selector_grietas_interactivo(overlay, crack_info: list, image_hash: str) -> List[int]:  # noqa: ANN001
+    """
+    Selección de grietas a excluir por clic, lazo o lista.
+
+    Args:
+        overlay: Overlay anotado (:class:`src.crack_overlay.CrackOverlay`) con su índice espacial
+        crack_info: Información de las grietas
+        image_hash: Clave de identidad de la imagen/ROI
+
+    Returns:
+        Lista de IDs de grietas a excluir
+    """
+    valid_ids = {c["id"] for c in crack_info}
+    if st.session_state.get("_grietas_hash") != image_hash:
+        st.session_state["_grietas_hash"] = image_hash
+        st.session_state.pop(_VERTICES_KEY, None)
+        st.session_state.pop(_LAST_CLICK_KEY, None)
+    st.session_state[_EXCLUDED_KEY] = [
+        cid for cid in st.session_state.get(_EXCLUDED_KEY, []) if cid in valid_ids
+    ]
+
+    click_coords = _load_click_coords()
+    if click_coords is not None and crack_info:
+        with st.expander("🖱️ Selección interactiva de grietas", expanded=False):
+            _panel_interactivo(click_coords, overlay)
+    return selector_grietas_excluir(crack_info)
+
+
+def _panel_interactivo(click_coords, overlay) -> None:  # noqa: ANN001
+    import cv2
+    from PIL import Image
+
+    index = overlay.index
+    modo = st.radio(
+        "Modo", ["Alternar grieta (clic)", "Lazo (vértices)"], horizontal=True, key="modo_seleccion"
+    )
+    vertices = st.session_state.setdefault(_VERTICES_KEY, [])
+
+    # Sólo se repintan las grietas que cambiaron desde la última ejecución
+    display = overlay.update(st.session_state.get(_EXCLUDED_KEY, []))
+    if vertices:
+        display = display.copy()
+        pts = np.array(vertices, dtype=np.int32).reshape(-1, 1, 2)
+        cv2.polylines(display, [pts], len(vertices) > 2, (0, 255, 0), 2)
+    factor = min(1.0, _DISPLAY_WIDTH / display.shape[1])
+    if factor < 1.0:
+        display = cv2.resize(
+            display, (int(display.shape[1] * factor), int(display.shape[0] * factor)),
+            interpolation=cv2.INTER_AREA,
+        )
+    clic = click_coords(Image.fromarray(display), key="clic_grietas")
+
+    if modo.startswith("Lazo"):
+        col1, col2, col3 = st.columns(3)
+        dentro = index.in_polygon(vertices)
+        if col1.button(f"Excluir {len(dentro)} grietas del lazo", key="lazo_excluir", disabled=not dentro):
+            _alternar(dentro, excluir=True)
+            st.session_state[_VERTICES_KEY] = []
+            _rerun()
+        if col2.button("Incluir grietas del lazo", key="lazo_incluir", disabled=not dentro):
+            _alternar(dentro, excluir=False)
+            st.session_state[_VERTICES_KEY] = []
+            _rerun()
+        if col3.button("Borrar lazo", key="lazo_borrar", disabled=not vertices):
+            st.session_state[_VERTICES_KEY] = []
+            _rerun()
+
+    spacing = index.neighbour_spacing()
+    if np.isfinite(spacing).any():
+        st.caption(
+            f"Espaciado al vecino más cercano (centroides): mediana {np.nanmedian(spacing):.1f} px · "
+            f"mínimo {np.nanmin(spacing):.1f} px"
+        )
+
+    if not clic or clic.get("x") is None:
+        return
+    marca = (clic["x"], clic["y"], clic.get("unix_time"))
+    if st.session_state.get(_LAST_CLICK_KEY) == marca:
+        return
+    st.session_state[_LAST_CLICK_KEY] = marca
+    x, y = clic["x"] / factor, clic["y"] / factor
+    if modo.startswith("Lazo"):
+        st.session_state[_VERTICES_KEY] = vertices + [(int(x), int(y))]
+        _rerun()
+    cid = index.pick(x, y, radius=int(max(6, 6 / factor)))
+    if cid is None:
+        vecino = index.nearest(x, y)
+        if vecino:
+            st.caption(f"Sin grieta bajo el clic; la más cercana es #{vecino[0][0]} a {vecino[0][1]:.0f} px.")
+        return
+    _alternar([cid])
+    _rerun()
@@ -0,0 +1,136 @@
+"""Integración de los análisis en segundo plano con la UI de Streamlit.
+
+Cada análisis ocupa un *slot* en ``st.session_state``. Mientras el trabajo de
+los parámetros actuales se calcula, se sigue mostrando el último resultado del
+mismo slot (si pertenece a la misma imagen) junto con una barra de progreso.
+
+Los resultados terminados se guardan como artefactos derivados en la memoria
+de la sesión (:mod:`src.core.session_memory`); si se desalojan, el siguiente
+rerun los vuelve a pedir y se resuelven desde la caché de resultados.
+
+Un trabajo que queda obsoleto (parámetros o imagen nuevos) se cancela si aún
+está en cola. Un trabajo fallido se suelta tras mostrar el error; los mismos
+parámetros no se recalculan hasta pulsar «Reintentar».
+"""
+
+import time
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+import streamlit as st
+
+from src.core.background import ExecutorBusy, get_background_executor
+from src.core.session_memory import SessionMemory, get_session_memory
+
+_JOBS_KEY = "_background_jobs"
+_PENDING_KEY = "_background_pending"
+
+# Espera breve tras encolar: los aciertos de caché terminan sin re-ejecución.
+_FAST_PATH_TIMEOUT_S = 0.15
+
+
+def _rerun() -> None:
+    """Re-ejecuta el script con la API disponible en la versión de Streamlit."""
+    rerun = getattr(st, "rerun", None) or getattr(st, "experimental_rerun")
+    rerun()
+
+
+def analisis_en_segundo_plano(
+    slot: str,
+    scope: Hashable,
+    key: Hashable,
+    fn: Callable[..., Any],
+    *,
+    label: str,
+    **kwargs: Any,
+) -> Tuple[Optional[Any], bool]:
+    """
+    Ejecuta ``fn(**kwargs)`` en segundo plano y devuelve el resultado disponible.
+
+    Args:
+        slot: Nombre del análisis (p. ej. ``"grietas"``).
+        scope: Ámbito de validez de resultados previos (hash de la imagen).
+        key: Parámetros actuales; un cambio lanza un trabajo nuevo.
+        fn: Función de análisis que acepta ``progress=``.
+        label: Texto para la barra de progreso.
+
+    Returns:
+        (resultado, actual): el resultado de ``key`` si está listo, o el último
+        resultado del mismo ``scope`` con ``actual=False`` (``None`` si no hay).
+    """
+    memory = get_session_memory()
+    executor = get_background_executor()
+    jobs = st.session_state.setdefault(_JOBS_KEY, {})
+    entry = jobs.get(slot)
+    if entry is None or entry["scope"] != scope:
+        if entry is not None and entry["job"] is not None:
+            executor.cancel(entry["job"])
+        entry = jobs[slot] = {"scope": scope, "job": None, "failed": None}
+        memory.discard(slot)
+
+    current = memory.get(slot, tag=key)
+    if current is not None:
+        return current, True
+
+    job = entry["job"]
+    if job is not None and job.key != key:
+        # Parámetros nuevos: el trabajo anterior deja de interesar
+        executor.cancel(job)
+        job = entry["job"] = None
+
+    failed = entry["failed"]
+    if job is None and failed is not None and failed[0] == key:
+        if not _reintentar(slot, label, failed[1]):
+            return _last_result(memory, slot)
+        entry["failed"] = None
+
+    if job is None:
+        try:
+            job = executor.submit(key, fn, label=label, **kwargs)
+        except ExecutorBusy:
+            st.warning("Servidor ocupado: el análisis se reintentará en breve.")
+            st.session_state[_PENDING_KEY] = True
+            return _last_result(memory, slot)
+        entry["job"] = job
+        try:
+            job.result(timeout=_FAST_PATH_TIMEOUT_S)
+        except Exception:  # noqa: BLE001 - en curso o con error (se trata abajo)
+            pass
+
+    if job.done():
+        # El trabajo se suelta: el resultado queda sólo en la memoria de la sesión
+        # y, si falló, sólo se recuerda el mensaje hasta que se pida reintentar
+        entry["job"] = None
+        error = job.error()
+        if error is not None:
+            entry["failed"] = (key, str(error))
+            _reintentar(slot, label, str(error))
+            return _last_result(memory, slot)
+        return memory.put(slot, job.result(), tag=key), True
+
+    st.progress(job.fraction, text=f"{label}: {job.stage} ({job.elapsed:.1f} s)")
+    st.session_state[_PENDING_KEY] = True
+    result, _ = _last_result(memory, slot)
+    if result is not None:
+        st.caption("Mostrando resultados de los parámetros anteriores mientras se calcula.")
+    return result, False
+
+
+def _reintentar(slot: str, label: str, error: str) -> bool:
+    """Muestra el error del último intento; devuelve si se pulsó «Reintentar»."""
+    st.error(f"{label}: error durante el análisis ({error}).")
+    return st.button("Reintentar", key=f"_reintentar_{slot}")
+
+
+def _last_result(memory: SessionMemory, slot: str) -> Tuple[Optional[Any], bool]:
+    return memory.get(slot), False
+
+
+def refrescar_si_hay_trabajos(intervalo_s: float = 0.5) -> None:
+    """
+    Programa una re-ejecución mientras queden análisis en curso.
+
+    Debe llamarse al final del script para que la página ya esté dibujada.
+    """
+    if st.session_state.pop(_PENDING_KEY, False):
+        time.sleep(intervalo_s)
+        _rerun()
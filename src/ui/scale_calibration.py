@@ -6,17 +6,23 @@ from PIL import Image, ImageDraw
 import math
 from typing import Optional, Tuple
 
-try:
-    from streamlit_drawable_canvas import st_canvas  # type: ignore
-    _HAS_CANVAS = True
-except Exception:  # noqa: BLE001
-    _HAS_CANVAS = False
 
-try:
-    from streamlit_image_coordinates import streamlit_image_coordinates  # type: ignore
-    _HAS_CLICK_COORDS = True
-except Exception:  # noqa: BLE001
-    _HAS_CLICK_COORDS = False
+def _load_canvas():  # noqa: ANN202
+    """Importa ``st_canvas`` sólo cuando se usa (``None`` si no está instalado)."""
+    try:
+        from streamlit_drawable_canvas import st_canvas  # type: ignore
+    except Exception:  # noqa: BLE001
+        return None
+    return st_canvas
+
+
+def _load_click_coords():  # noqa: ANN202
+    """Importa ``streamlit_image_coordinates`` bajo demanda (``None`` si falta)."""
+    try:
+        from streamlit_image_coordinates import streamlit_image_coordinates  # type: ignore
+    except Exception:  # noqa: BLE001
+        return None
+    return streamlit_image_coordinates
 
 
 class ScaleCalibrator:
@@ -103,10 +109,13 @@ class ScaleCalibrator:
         
         st.markdown("**📏 Herramienta de medición:**")
 
-        if not _HAS_CANVAS and not _HAS_CLICK_COORDS:
+        st_canvas = _load_canvas()
+        has_canvas = st_canvas is not None
+        has_click_coords = _load_click_coords() is not None
+        if not has_canvas and not has_click_coords:
             st.info("Sin canvas ni módulo de clics. Usando entrada manual de puntos.")
             return self._manual_point_input_flow(image, reference_length)
-        if not _HAS_CANVAS and _HAS_CLICK_COORDS:
+        if not has_canvas and has_click_coords:
             return self._click_two_point_flow(image, reference_length)
 
         # Canvas interactivo
@@ -130,7 +139,7 @@ class ScaleCalibrator:
             )
         except AttributeError:
             # Intentar flujo de clics si está disponible antes de caer al manual
-            if _HAS_CLICK_COORDS:
+            if has_click_coords:
                 st.warning(
                     "Canvas incompatible con la versión de Streamlit. Cambiando a modo de dos clics."
                 )
@@ -221,6 +230,7 @@ class ScaleCalibrator:
         reset = st.button("🔄 Reset puntos", key="reset_click_points")
         if reset:
             st.session_state.scale_click_points = []
+        streamlit_image_coordinates = _load_click_coords()
         result = streamlit_image_coordinates(Image.fromarray(image), key="click_scale_img")
         if result and result.get("x") is not None:
             # Registrar nuevo punto sólo si cambia
@@ -292,6 +302,32 @@ class ScaleCalibrator:
         )
 
 
+@st.cache_data(max_entries=32, show_spinner=False)
+def _size_distribution(digest: str, _diameters_cm: np.ndarray, bins: int = 20):  # noqa: ANN202
+    """
+    Conteos del histograma y porcentaje pasante acumulado.
+
+    El caché se indexa por ``digest`` (hash del conjunto de diámetros), de modo
+    que las re-ejecuciones con los mismos datos no recalculan nada.
+
+    Returns:
+        (histograma, pasante): DataFrames indexados por diámetro (cm).
+    """
+    import pandas as pd
+
+    counts, edges = np.histogram(_diameters_cm, bins=bins)
+    centers = (edges[:-1] + edges[1:]) / 2
+    histogram = pd.DataFrame(
+        {"Frecuencia": counts},
+        index=pd.Index(np.round(centers, 2), name="Diámetro (cm)"),
+    )
+    passing = pd.DataFrame(
+        {"Pasante acumulado (%)": 100.0 * np.cumsum(counts) / max(counts.sum(), 1)},
+        index=pd.Index(np.round(edges[1:], 2), name="Diámetro (cm)"),
+    )
+    return histogram, passing
+
+
 def show_advanced_fragmentation_stats(diameters_m: list) -> None:
     """
     Muestra estadísticas avanzadas de fragmentación.
@@ -345,16 +381,21 @@ def show_advanced_fragmentation_stats(diameters_m: list) -> None:
         cu = perc_values[4] / perc_values[0]  # D90/D10
         st.metric("Coeficiente de Uniformidad (Cu)", f"{cu:.2f}")
     
-    # Histograma
+    # Histograma y curva granulométrica (conteos precalculados, sin figuras)
     st.subheader("📊 Distribución de Tamaños")
     
-    import matplotlib.pyplot as plt
-    fig, ax = plt.subplots(figsize=(5, 3))
-    ax.hist(diameters_cm, bins=20, color="#4c72b0", edgecolor="black")
-    ax.set_xlabel("Diámetro (cm)")
-    ax.set_ylabel("Frecuencia")
-    ax.set_title("Histograma de tamaños de partículas")
-    st.pyplot(fig)
+    from src.core.image_identity import hash_array
+    
+    diameters_arr = np.asarray(diameters_cm, dtype=np.float64)
+    histogram, passing = _size_distribution(hash_array(diameters_arr), diameters_arr)
+    
+    hist_col, passing_col = st.columns(2)
+    with hist_col:
+        st.caption("Histograma de tamaños de partículas")
+        st.bar_chart(histogram)
+    with passing_col:
+        st.caption("Curva granulométrica acumulada")
+        st.line_chart(passing)
     
     # Tabla detallada
     with st.expander("📋 Datos detallados"):
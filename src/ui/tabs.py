@@ -2,45 +2,66 @@
 
 import streamlit as st
 import numpy as np
-import pandas as pd
 from typing import Optional
-import hashlib
 
-from src import crack_detection, image_io, metrics, fragmentation
+from src import metrics
+from src.core import analysis, image_identity
 from src.ui.components import (
     mostrar_deteccion_grietas,
-    selector_grietas_excluir,
     input_escala,
     input_rmr,
     configuracion_display,
 )
+from src.ui.blast import panel_optimizador_voladura
+from src.ui.crack_selection import selector_grietas_interactivo
+from src.ui.jobs import analisis_en_segundo_plano
+from src.ui.uncertainty import panel_incertidumbre
 
 
-def tab_fracturas(image: np.ndarray, min_crack_length_px: int) -> dict:
+def tab_fracturas(
+    image: np.ndarray,
+    min_crack_length_px: int,
+    image_hash: Optional[str] = None,
+) -> Optional[dict]:
     """
     Maneja la lógica de la pestaña de análisis de fracturas.
     
     Args:
         image: Imagen a analizar
         min_crack_length_px: Longitud mínima de grieta en píxeles
+        image_hash: Clave de identidad de la imagen/ROI (se calcula si falta)
         
     Returns:
-        dict: Diccionario con los resultados del análisis
+        dict: Diccionario con los resultados del análisis (None mientras la
+        primera detección sigue en curso)
     """
-    # Detección de grietas
-    edges, crack_mask, crack_info = crack_detection.detect_cracks(
-        image, min_length_px=min_crack_length_px
+    # Hash de la imagen (ROI): clave de caché y de la escala calibrada
+    if image_hash is None:
+        image_hash = image_identity.hash_array(image)
+
+    # Detección de grietas en segundo plano (cacheada por hash + parámetros)
+    resultado, _ = analisis_en_segundo_plano(
+        "grietas",
+        image_hash,
+        min_crack_length_px,
+        analysis.detect_cracks,
+        label="Detección de grietas",
+        image=image,
+        image_hash=image_hash,
+        min_length_px=min_crack_length_px,
     )
+    if resultado is None:
+        st.info("Detectando grietas…")
+        return None
+    edges, crack_mask, crack_info = resultado
 
     # Configuración de display (altura máx / modo compacto)
     max_h, compact = configuracion_display()
 
-    # Crear overlay y anotaciones
-    base_overlay = image_io.overlay_mask(image, crack_mask, color=(255, 0, 0))
-    excluded_ids = selector_grietas_excluir(crack_info)
-    annotated = image_io.annotate_cracks(
-        base_overlay, crack_info, excluded_ids=set(excluded_ids)
-    )
+    # Overlay anotado persistente: las exclusiones se aplican como deltas
+    overlay = _overlay_grietas(image, crack_mask, crack_info, image_hash, min_crack_length_px)
+    excluded_ids = selector_grietas_interactivo(overlay, crack_info, image_hash)
+    annotated = overlay.update(excluded_ids)
     
     # Mostrar resultados de detección
     # Llamada robusta (si el servidor mantiene versión previa sin parámetros nuevos)
@@ -52,9 +73,6 @@ def tab_fracturas(image: np.ndarray, min_crack_length_px: int) -> dict:
 
     # Métricas geotécnicas
     st.header("3️⃣ Métricas geotécnicas")
-    # Hash de la imagen (ROI) para validar reutilización de escala calibrada
-    image_hash = hashlib.sha256(image.tobytes()).hexdigest()[:8]
-
     global_scale = st.session_state.get("global_scale_px_m")
     global_hash = st.session_state.get("global_scale_img_hash")
     force_manual = st.session_state.get("force_manual_scale", False)
@@ -63,7 +81,10 @@ def tab_fracturas(image: np.ndarray, min_crack_length_px: int) -> dict:
     if global_scale and global_hash == image_hash and not force_manual:
         col_g1, col_g2 = st.columns([4,1])
         with col_g1:
-            st.info(f"Usando escala calibrada global: {global_scale:.1f} px/m (img {image_hash})")
+            st.info(
+                f"Usando escala calibrada global: {global_scale:.1f} px/m "
+                f"(img {image_identity.short_hash(image_hash)})"
+            )
         with col_g2:
             if st.button("Editar manual", key="btn_manual_scale"):
                 st.session_state["force_manual_scale"] = True
@@ -88,7 +109,6 @@ def tab_fracturas(image: np.ndarray, min_crack_length_px: int) -> dict:
     # Mostrar tabla detallada de grietas con longitud y orientación
     if crack_info:
         with st.expander("Detalles de grietas detectadas"):
-            import pandas as pd
             # Filtro longitud mínima en metros (derivado) opcional
             min_len_m = st.number_input(
                 "Longitud mínima (m) para incluir en tabla (0 = sin filtro)",
@@ -97,43 +117,40 @@ def tab_fracturas(image: np.ndarray, min_crack_length_px: int) -> dict:
                 step=0.05,
                 key="min_len_filter_m",
             )
-            rows = []
-            for c in crack_info:
-                if c["id"] in excluded_ids:
-                    continue
-                length_m = c.get("length_px", 0) / scale_val if scale_val > 0 else None
-                if min_len_m > 0 and (length_m is None or length_m < min_len_m):
-                    continue
-                rows.append(
-                    {
-                        "ID": c["id"],
-                        "Longitud_px": c.get("length_px"),
-                        "Longitud_m": round(length_m, 4) if length_m is not None else None,
-                        "Longitud_eje_mayor_px": round(c.get("length_major_px", 0), 1),
-                        "Longitud_eje_mayor_m": round(c.get("length_major_px", 0) / scale_val, 4)
-                        if scale_val > 0
-                        else None,
-                        "Orientacion_deg": None if c.get("orientation_deg") is None else round(c.get("orientation_deg"), 1),
-                        "Area_px": c.get("area"),
-                    }
-                )
-            if rows:
-                df_cracks = pd.DataFrame(rows)
-                st.dataframe(df_cracks, use_container_width=True, hide_index=True)
-                # Estadísticas rápidas de longitud
-                lengths_m = [r["Longitud_m"] for r in rows if r["Longitud_m"] is not None]
-                if lengths_m:
-                    st.markdown("**Estadísticas de longitudes (m):**")
-                    col_a, col_b, col_c, col_d = st.columns(4)
-                    col_a.metric("Promedio", f"{np.mean(lengths_m):.4f}")
-                    col_b.metric("Mediana", f"{np.median(lengths_m):.4f}")
-                    col_c.metric("Máx", f"{np.max(lengths_m):.4f}")
-                    col_d.metric("Cuenta", len(lengths_m))
+            # Tabla completa construida una vez; sólo cambia la máscara de filas
+            incluidas, df_all = overlay.table_rows(float(scale_val))
+            min_len_px = min_len_m * scale_val
+            visibles = incluidas & (overlay.lengths_px >= min_len_px) if min_len_m > 0 else incluidas
+            stats = overlay.length_stats(min_len_px)
+            if stats is not None:
+                st.dataframe(df_all[visibles], use_container_width=True, hide_index=True)
+                # Estadísticas de longitud desde las sumas acumuladas
+                st.markdown("**Estadísticas de longitudes (m):**")
+                col_a, col_b, col_c, col_d = st.columns(4)
+                col_a.metric("Promedio", f"{stats['mean'] / scale_val:.4f}")
+                col_b.metric("Mediana", f"{stats['median'] / scale_val:.4f}")
+                col_c.metric("Máx", f"{stats['max'] / scale_val:.4f}")
+                col_d.metric("Cuenta", stats["count"])
             else:
                 st.info("No hay grietas que cumplan el filtro actual.")
     
+    # Scanlines virtuales (frecuencia y RQD por dirección)
+    _mostrar_scanlines(crack_mask, scale_val, image_hash, min_crack_length_px)
+    
+    # Mapas de intensidad P21/P20 (imágenes integrales)
+    _mostrar_intensidad(
+        image, crack_mask, crack_info, overlay.excluded_ids,
+        scale_val, image_hash, min_crack_length_px,
+    )
+    
+    # Polilíneas simplificadas (Douglas-Peucker) para exportar
+    _mostrar_polilineas(crack_mask, crack_info, scale_val, image_hash, min_crack_length_px)
+    
+    # Familias de juntas por orientación (sugerencia de Jn)
+    jn_sugerido = _mostrar_familias(overlay, scale_val, image_hash, min_crack_length_px)
+    
     # Calcular métricas básicas
-    valid_count = len(crack_info) - len(excluded_ids)
+    valid_count = overlay.valid_count
     frequency = metrics.crack_frequency(
         valid_count, image.shape[1], scale_px_per_meter=scale_val
     )
@@ -141,17 +158,25 @@ def tab_fracturas(image: np.ndarray, min_crack_length_px: int) -> dict:
 
     # Parámetros adicionales
     st.header("4️⃣ Parámetros adicionales (opcional)")
-    rmr_total = input_rmr()
+    spacing_m = 1.0 / frequency if frequency > 0 else float("inf")
+    rmr_total = input_rmr(rqd, spacing_m)
     gsi_val = metrics.gsi_from_rmr(rmr_total) if rmr_total > 0 else None
+    if gsi_val is not None:
+        with st.expander("Incertidumbre de GSI"):
+            panel_incertidumbre("gsi", {"rmr_total": rmr_total}, key="gsi")
 
     # Q-System
-    q_val = _mostrar_q_system(rqd)
+    q_val = _mostrar_q_system(rqd, jn_sugerido)
     
     # Diseño de voladura
     q_spec = _mostrar_diseno_voladura()
     
     # Fragmentación Kuz-Ram
     xm_val = _mostrar_fragmentacion_kuz_ram()
+    
+    # Optimizador de diseño de voladura
+    with st.expander("Optimizador de voladura (L–K / Kuz–Ram)"):
+        panel_optimizador_voladura()
 
     return {
         'valid_count': valid_count,
@@ -165,16 +190,19 @@ def tab_fracturas(image: np.ndarray, min_crack_length_px: int) -> dict:
     }
 
 
-def tab_fragmentacion(image: np.ndarray) -> None:
+def tab_fragmentacion(image: np.ndarray, image_hash: Optional[str] = None) -> None:
     """
     Maneja la lógica de la pestaña de análisis de fragmentación.
     
     Args:
         image: Imagen a analizar para fragmentación
+        image_hash: Clave de identidad de la imagen/ROI (se calcula si falta)
     """
     from src.ui.scale_calibration import ScaleCalibrator, show_advanced_fragmentation_stats
     
     st.header("🧩 Análisis de Fragmentación")
+    if image_hash is None:
+        image_hash = image_identity.hash_array(image)
     
     # Calibración de escala
     calibrator = ScaleCalibrator()
@@ -185,7 +213,6 @@ def tab_fragmentacion(image: np.ndarray) -> None:
         return
     else:
         # Guardar escala global reutilizable con hash
-        image_hash = hashlib.sha256(image.tobytes()).hexdigest()[:8]
         st.session_state["global_scale_px_m"] = float(scale_frag)
         st.session_state["global_scale_img_hash"] = image_hash
         # Si se estaba forzando modo manual, lo liberamos para permitir reutilización
@@ -223,12 +250,21 @@ def tab_fragmentacion(image: np.ndarray) -> None:
     # Análisis de tamaños de partículas
     st.subheader("🔍 Detección de Partículas")
     
-    with st.spinner("Analizando fragmentación..."):
-        diameters_m, labeled_img = fragmentation.particle_sizes(
-            image, 
-            scale_px_per_meter=scale_frag,
-            min_area_px=min_area_px
-        )
+    resultado, _ = analisis_en_segundo_plano(
+        "fragmentacion",
+        image_hash,
+        (float(scale_frag), min_area_px),
+        analysis.particle_sizes,
+        label="Análisis de fragmentación",
+        image=image,
+        image_hash=image_hash,
+        scale_px_per_meter=scale_frag,
+        min_area_px=min_area_px,
+    )
+    if resultado is None:
+        st.info("Analizando fragmentación…")
+        return
+    diameters_m, labeled_img = resultado
     
     # Mostrar imagen segmentada
     st.image(
@@ -271,12 +307,13 @@ def tab_fragmentacion(image: np.ndarray) -> None:
         
         summary_df = pd.DataFrame(summary_stats)
         
-        # Botón de descarga
+        # Botón de descarga (nombre de archivo con hash de la imagen)
+        short_hash = image_identity.short_hash(image_hash)
         csv_data = results_df.to_csv(index=False).encode('utf-8')
         st.download_button(
             label="📊 Descargar datos detallados (CSV)",
             data=csv_data,
-            file_name=f"fragmentacion_detallada_{scale_frag:.0f}pxm.csv",
+            file_name=f"fragmentacion_detallada_{short_hash}_{scale_frag:.0f}pxm.csv",
             mime="text/csv"
         )
         
@@ -284,7 +321,7 @@ def tab_fragmentacion(image: np.ndarray) -> None:
         st.download_button(
             label="📊 Descargar resumen estadístico (CSV)",
             data=csv_summary,
-            file_name=f"fragmentacion_resumen_{scale_frag:.0f}pxm.csv",
+            file_name=f"fragmentacion_resumen_{short_hash}_{scale_frag:.0f}pxm.csv",
             mime="text/csv"
         )
         
@@ -296,12 +333,769 @@ def tab_fragmentacion(image: np.ndarray) -> None:
         st.markdown("- Ajusta la calibración de escala")
 
 
-def _mostrar_q_system(rqd: float) -> Optional[float]:
+def tab_bandeja(
+    image: np.ndarray,
+    min_crack_length_px: int,
+    image_hash: Optional[str] = None,
+) -> None:
+    """
+    Maneja la lógica de la pestaña de bandejas de testigos.
+    
+    Al pulsar «Analizar bandeja» detecta las filas de testigo, las analiza en
+    paralelo y muestra el registro continuo por profundidad.
+    
+    Args:
+        image: Imagen de la bandeja (ROI)
+        min_crack_length_px: Longitud mínima de grieta en píxeles
+        image_hash: Clave de identidad de la imagen/ROI (se calcula si falta)
+    """
+    from src import core_tray
+    
+    st.header("🗄️ Bandeja de testigos")
+    if image_hash is None:
+        image_hash = image_identity.hash_array(image)
+    
+    global_scale = st.session_state.get("global_scale_px_m")
+    default_scale = (
+        float(global_scale)
+        if global_scale and st.session_state.get("global_scale_img_hash") == image_hash
+        else 1000.0
+    )
+    with st.form("bandeja_form"):
+        col1, col2, col3 = st.columns(3)
+        scale_val = col1.number_input(
+            "Escala a lo largo del testigo (px/m)",
+            min_value=10.0,
+            value=default_scale,
+            step=10.0,
+            key="bandeja_scale_px",
+        )
+        n_filas = col2.number_input(
+            "Número de filas (0 = automático)",
+            min_value=0,
+            max_value=12,
+            value=0,
+            key="bandeja_filas",
+        )
+        desde_m = col3.number_input(
+            "Profundidad inicial (m)",
+            min_value=0.0,
+            value=0.0,
+            step=0.1,
+            key="bandeja_desde",
+        )
+        enviado = st.form_submit_button("Analizar bandeja")
+    
+    if enviado:
+        st.session_state["bandeja_pedido"] = {
+            "image_hash": image_hash,
+            "min_len": int(min_crack_length_px),
+            "scale": float(scale_val),
+            "filas": int(n_filas),
+            "desde": float(desde_m),
+        }
+    pedido = st.session_state.get("bandeja_pedido")
+    if pedido is None or pedido["image_hash"] != image_hash:
+        st.info("Ajuste los parámetros y pulse «Analizar bandeja».")
+        return
+    desde_m = pedido["desde"]
+    
+    resultado, _ = analisis_en_segundo_plano(
+        "bandeja",
+        image_hash,
+        (pedido["min_len"], pedido["scale"], pedido["filas"], desde_m),
+        core_tray.analyze_core_tray,
+        label="Análisis de bandeja",
+        image=image,
+        scale_px_per_m=pedido["scale"],
+        from_m=desde_m,
+        min_length_px=pedido["min_len"],
+        expected_rows=pedido["filas"] or None,
+        image_hash=image_hash,
+    )
+    if resultado is None:
+        st.info("Analizando filas de la bandeja…")
+        return
+    if not resultado["rows"]:
+        st.warning("⚠️ No se detectaron filas de testigo en la imagen.")
+        return
+    
+    import cv2
+    import pandas as pd
+    
+    marcada = image.copy()
+    for box in resultado["rows"]:
+        cv2.rectangle(
+            marcada, (box["left"], box["top"]), (box["right"] - 1, box["bottom"] - 1), (0, 255, 0), 2
+        )
+        cv2.putText(
+            marcada, str(box["row"]), (box["left"] + 5, box["top"] + 25),
+            cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2,
+        )
+    st.image(marcada, caption=f"{len(resultado['rows'])} filas detectadas", use_container_width=True)
+    
+    total = resultado["total"]
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Tramo (m)", f"{total['from_m']:.2f} – {total['to_m']:.2f}")
+    col2.metric("Frecuencia del tramo (1/m)", f"{total['frequency_per_m']:.2f}")
+    col3.metric("RQD del tramo", f"{total['rqd_percent']:.1f} %")
+    
+    columnas = {
+        "row": "Fila", "from_m": "Desde (m)", "to_m": "Hasta (m)", "length_m": "Longitud (m)",
+        "crack_count": "Grietas", "intersections": "Intersecciones",
+        "frequency_per_m": "Frecuencia (1/m)", "rqd_percent": "RQD (%)",
+    }
+    df = pd.DataFrame(resultado["log"])[core_tray.RUN_LOG_COLUMNS].rename(columns=columnas)
+    st.dataframe(df, use_container_width=True, hide_index=True)
+    st.caption(
+        "Las filas se encadenan de arriba hacia abajo; las piezas no se unen entre filas. "
+        "Frecuencia y RQD a lo largo del eje del testigo (scanlines a 0°)."
+    )
+    st.download_button(
+        label="📊 Descargar registro por profundidad (CSV)",
+        data=df.to_csv(index=False).encode("utf-8"),
+        file_name=f"bandeja_{image_identity.short_hash(image_hash)}_{desde_m:.2f}m.csv",
+        mime="text/csv",
+    )
+    
+    with st.expander("📚 Índice de fracturas por profundidad"):
+        _mostrar_indice_profundidad(resultado)
+
+
+def tab_multi_roi(
+    image: np.ndarray,
+    min_crack_length_px: int,
+    image_hash: Optional[str] = None,
+) -> None:
+    """
+    Maneja la lógica de la pestaña de análisis de varias ROIs.
+    
+    Las ROIs se editan como tabla sobre la imagen completa y el análisis se
+    lanza con «Analizar ROIs»; el esqueleto y la segmentación de partículas se
+    calculan una vez sobre su unión.
+    
+    Args:
+        image: Imagen original completa (sin recortar)
+        min_crack_length_px: Longitud mínima de grieta en píxeles
+        image_hash: Clave de identidad de la imagen (se calcula si falta)
+    """
+    import pandas as pd
+    
+    from src import multi_roi
+    
+    st.header("🔲 Varias ROIs")
+    if image_hash is None:
+        image_hash = image_identity.hash_array(image)
+    h, w = image.shape[:2]
+    
+    if st.session_state.get("_multi_roi_hash") != image_hash:
+        # Por defecto, cuadrícula 2×2 sobre la imagen
+        st.session_state["_multi_roi_hash"] = image_hash
+        st.session_state["multi_roi_tabla"] = pd.DataFrame(
+            [
+                {"name": f"{fila}{col}", "left": c * (w // 2), "top": r * (h // 2),
+                 "width": w // 2, "height": h // 2}
+                for r, fila in enumerate("AB") for c, col in enumerate("12")
+            ]
+        )
+    # Formulario: editar la tabla o la escala no relanza el análisis
+    with st.form("multi_roi_form"):
+        col1, col2 = st.columns(2)
+        scale_val = col1.number_input(
+            "Escala (px/m)", min_value=10.0, value=1000.0, step=10.0, key="multi_roi_scale"
+        )
+        min_area = col2.number_input(
+            "Área mínima de partícula (px)", min_value=1, value=200, key="multi_roi_area"
+        )
+        tabla = st.data_editor(
+            st.session_state["multi_roi_tabla"],
+            num_rows="dynamic",
+            use_container_width=True,
+            key="multi_roi_editor",
+        ).dropna()
+        enviado = st.form_submit_button("Analizar ROIs")
+    
+    if enviado:
+        rois = [
+            {"name": str(r["name"]), **{k: int(r[k]) for k in ("left", "top", "width", "height")}}
+            for r in tabla.to_dict("records")
+        ]
+        if not rois:
+            st.info("Agregue al menos una ROI a la tabla.")
+            return
+        try:
+            rois = multi_roi.clip_rois(rois, image.shape)
+        except ValueError as exc:
+            st.error(f"⚠️ {exc}")
+            return
+        st.session_state["multi_roi_pedido"] = {
+            "image_hash": image_hash,
+            "rois": rois,
+            "scale": float(scale_val),
+            "min_area": int(min_area),
+            "min_len": int(min_crack_length_px),
+        }
+    
+    pedido = st.session_state.get("multi_roi_pedido")
+    if pedido is None or pedido["image_hash"] != image_hash:
+        st.info("Edite las ROIs y pulse «Analizar ROIs».")
+        return
+    rois = pedido["rois"]
+    
+    resultado, _ = analisis_en_segundo_plano(
+        "multi_roi",
+        image_hash,
+        (pedido["min_len"], pedido["scale"], pedido["min_area"],
+         tuple(tuple(r.values()) for r in rois)),
+        analysis.analyze_rois,
+        label="Análisis de varias ROIs",
+        image=image,
+        image_hash=image_hash,
+        rois=rois,
+        scale_px_per_m=pedido["scale"],
+        min_length_px=pedido["min_len"],
+        min_area_px=pedido["min_area"],
+    )
+    if resultado is None:
+        st.info("Analizando ROIs…")
+        return
+    
+    import cv2
+    
+    union = resultado["union"]
+    marcada = image.copy()
+    esqueleto = resultado["skeleton"] > 0
+    region = marcada[union["top"]:union["top"] + union["height"], union["left"]:union["left"] + union["width"]]
+    region[esqueleto] = (255, 0, 0)
+    for r in resultado["rois"]:
+        box = r["box"]
+        cv2.rectangle(
+            marcada, (box["left"], box["top"]),
+            (box["left"] + box["width"] - 1, box["top"] + box["height"] - 1), (0, 255, 0), 2,
+        )
+        cv2.putText(
+            marcada, box["name"], (box["left"] + 5, box["top"] + 25),
+            cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2,
+        )
+    st.image(
+        marcada,
+        caption=f"{len(rois)} ROIs · unión procesada {union['width']}×{union['height']} px",
+        use_container_width=True,
+    )
+    
+    resumen = pd.DataFrame(resultado["summary"])[multi_roi.SUMMARY_COLUMNS]
+    st.subheader("Comparación entre ROIs")
+    st.dataframe(resumen, use_container_width=True, hide_index=True)
+    col1, col2 = st.columns(2)
+    col1.bar_chart(resumen.set_index("roi")[["frequency_per_m"]], y_label="Frecuencia (1/m)")
+    col2.bar_chart(resumen.set_index("roi")[["p21_per_m"]], y_label="P21 (m/m²)")
+    
+    grietas = pd.DataFrame(
+        [c for r in resultado["rois"] for c in r["cracks"]], columns=multi_roi.CRACK_COLUMNS
+    )
+    for r in resultado["rois"]:
+        with st.expander(f"ROI {r['box']['name']}: {len(r['cracks'])} grietas"):
+            st.dataframe(grietas[grietas["roi"] == r["box"]["name"]], use_container_width=True, hide_index=True)
+    
+    sufijo = image_identity.short_hash(image_hash)
+    col1, col2 = st.columns(2)
+    col1.download_button(
+        label="📊 Descargar resumen por ROI (CSV)",
+        data=resumen.to_csv(index=False).encode("utf-8"),
+        file_name=f"rois_resumen_{sufijo}.csv",
+        mime="text/csv",
+    )
+    col2.download_button(
+        label="📊 Descargar grietas por ROI (CSV)",
+        data=grietas.to_csv(index=False).encode("utf-8"),
+        file_name=f"rois_grietas_{sufijo}.csv",
+        mime="text/csv",
+    )
+
+
+def tab_comparacion(
+    image: np.ndarray,
+    min_crack_length_px: int,
+    image_hash: Optional[str] = None,
+) -> None:
+    """
+    Maneja la lógica de la pestaña de comparación entre levantamientos.
+    
+    Registra una imagen anterior del mismo frente sobre la actual y compara
+    sus polilíneas de grietas (nuevas, extendidas, cerradas).
+    
+    Args:
+        image: Imagen actual completa (sin recortar)
+        min_crack_length_px: Longitud mínima de grieta en píxeles
+        image_hash: Clave de identidad de la imagen (se calcula si falta)
+    """
+    from src import change_detection, image_io
+    from src.core.session_memory import get_session_memory
+    
+    st.header("🔁 Comparación con un levantamiento anterior")
+    if image_hash is None:
+        image_hash = image_identity.hash_array(image)
+    archivo = st.file_uploader(
+        "Imagen anterior del mismo frente (jpg, png)",
+        type=["jpg", "jpeg", "png"],
+        key="comparacion_anterior",
+    )
+    if archivo is None:
+        st.info("Cargue la imagen del levantamiento anterior para comparar.")
+        return
+    anterior_hash = image_identity.source_hash(archivo)
+    memory = get_session_memory()
+    anterior = memory.get("comparacion_anterior", tag=anterior_hash)
+    if anterior is None:
+        anterior = memory.put(
+            "comparacion_anterior", image_io.load_image(archivo), tag=anterior_hash, derived=False
+        )
+    
+    global_scale = st.session_state.get("global_scale_px_m")
+    col1, col2, col3 = st.columns(3)
+    scale_val = col1.number_input(
+        "Escala de la imagen actual (px/m)",
+        min_value=10.0,
+        value=float(global_scale) if global_scale else 1000.0,
+        step=10.0,
+        key="comparacion_scale",
+    )
+    tolerancia_m = col2.number_input(
+        "Tolerancia de coincidencia (m)",
+        min_value=0.001, value=0.01, step=0.005, format="%.3f", key="comparacion_tolerancia",
+    )
+    extension_m = col3.number_input(
+        "Extensión mínima (m)",
+        min_value=0.001, value=0.02, step=0.005, format="%.3f", key="comparacion_extension",
+    )
+    
+    resultado, _ = analisis_en_segundo_plano(
+        "comparacion",
+        image_hash,
+        (anterior_hash, min_crack_length_px, float(scale_val), float(tolerancia_m), float(extension_m)),
+        change_detection.compare_surveys,
+        label="Comparación de levantamientos",
+        before_image=anterior,
+        after_image=image,
+        before_hash=anterior_hash,
+        after_hash=image_hash,
+        scale_px_per_m=float(scale_val),
+        min_length_px=min_crack_length_px,
+        tolerance_m=float(tolerancia_m),
+        min_extension_m=float(extension_m),
+    )
+    if resultado is None:
+        st.info("Registrando y comparando levantamientos…")
+        return
+    
+    import pandas as pd
+    
+    registro = resultado["registration"]
+    st.caption(
+        f"Registro: {registro.inliers}/{registro.matches} correspondencias ORB válidas"
+        + (f" · ECC {registro.ecc:.3f}" if registro.ecc is not None else " · sin refinamiento ECC")
+    )
+    st.image(
+        change_detection.render_changes(image, resultado["before"], resultado["after"], resultado),
+        caption="Rojo: nuevas · naranja: extendidas · verde: sin cambio · azul: cerradas",
+        use_container_width=True,
+    )
+    resumen = resultado["summary"]
+    cols = st.columns(4)
+    for col, estado in zip(cols, change_detection.STATUS_COLORS):
+        col.metric(estado.capitalize(), resumen[estado])
+    col1, col2 = st.columns(2)
+    col1.metric(
+        "Longitud total (m)", f"{resumen['length_after_m']:.3f}",
+        delta=f"{resumen['length_after_m'] - resumen['length_before_m']:+.3f}",
+    )
+    col2.metric("Longitud sin contraparte anterior (m)", f"{resumen['new_length_m']:.3f}")
+    
+    df = pd.DataFrame(resultado["rows"], columns=change_detection.CHANGE_COLUMNS)
+    df["crack_after"] = df["crack_after"].astype("Int64")  # vacío en las cerradas
+    cambios = df[df["status"] != "sin cambio"]
+    st.dataframe(cambios, use_container_width=True, hide_index=True)
+    st.download_button(
+        label="📊 Descargar cambios (CSV)",
+        data=df.to_csv(index=False).encode("utf-8"),
+        file_name=(
+            f"cambios_{image_identity.short_hash(anterior_hash)}_{image_identity.short_hash(image_hash)}.csv"
+        ),
+        mime="text/csv",
+    )
+
+
+def _mostrar_indice_profundidad(resultado: dict) -> None:
+    """
+    Agrega el registro de la bandeja al índice por sondaje y permite consultarlo.
+    
+    Args:
+        resultado: Resultado de :func:`src.core_tray.analyze_core_tray`
+    """
+    import pandas as pd
+    from src.core.depth_index import get_depth_index
+    
+    index = get_depth_index()
+    col1, col2 = st.columns([3, 1])
+    pozo = col1.text_input("Sondaje", value="DDH-1", key="indice_pozo").strip()
+    if col2.button("Agregar al índice", key="indice_agregar", disabled=not pozo):
+        n = index.add_tray(pozo, resultado)
+        index.save()
+        st.success(f"{n} fracturas registradas en {pozo} ({resultado['total']['from_m']:.2f}–{resultado['total']['to_m']:.2f} m).")
+    
+    if not index.holes:
+        st.caption("El índice está vacío.")
+        return
+    col1, col2, col3, col4 = st.columns(4)
+    consulta = col1.selectbox("Consultar sondaje", index.holes, key="indice_consulta")
+    tramos = index.runs(consulta)
+    desde = col2.number_input("Desde (m)", value=float(tramos[0, 0]), key="indice_desde")
+    hasta = col3.number_input("Hasta (m)", value=float(tramos[-1, 1]), key="indice_hasta")
+    paso = col4.number_input("Bin (m)", min_value=0.01, value=1.0, step=0.5, key="indice_bin")
+    if hasta <= desde:
+        st.warning("El intervalo debe cumplir desde < hasta.")
+        return
+    bins = index.query(consulta, desde, hasta, paso)
+    df = pd.DataFrame(
+        {
+            "Desde (m)": bins["edges"][:-1],
+            "Hasta (m)": bins["edges"][1:],
+            "Registrado (m)": bins["logged_m"],
+            "Fracturas": bins["fractures"],
+            "Frecuencia (1/m)": bins["frequency_per_m"],
+            "RQD (%)": bins["rqd_percent"],
+        }
+    )
+    st.line_chart(df.set_index("Desde (m)")[["Frecuencia (1/m)", "RQD (%)"]])
+    st.dataframe(df.round(3), use_container_width=True, hide_index=True)
+
+
+def _overlay_grietas(
+    image: np.ndarray,
+    crack_mask: np.ndarray,
+    crack_info: list,
+    image_hash: str,
+    min_crack_length_px: int,
+):
+    """
+    Overlay anotado de la sesión (:class:`src.crack_overlay.CrackOverlay`).
+    
+    Se guarda como artefacto derivado en la memoria de la sesión, etiquetado
+    con la imagen y los parámetros de detección; sólo se reconstruye si cambian.
+    """
+    from src.core.session_memory import get_session_memory
+    from src.crack_overlay import CrackOverlay
+    
+    memory = get_session_memory()
+    tag = (image_hash, int(min_crack_length_px))
+    overlay = memory.get("overlay_grietas", tag=tag)
+    if overlay is None:
+        overlay = memory.put("overlay_grietas", CrackOverlay(image, crack_mask, crack_info), tag=tag)
+    return overlay
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _scanlines(image_hash: str, min_crack_length_px: int, scale_val: float, _crack_mask: np.ndarray) -> list:
+    """Encuesta de scanlines cacheada por imagen, parámetros de detección y escala."""
+    from src.scanlines import scanline_survey
+    
+    return scanline_survey(_crack_mask, scale_px_per_m=scale_val).as_rows()
+
+
+def _mostrar_scanlines(
+    crack_mask: np.ndarray,
+    scale_val: float,
+    image_hash: str,
+    min_crack_length_px: int,
+) -> None:
+    """
+    Muestra la frecuencia lineal y el RQD por dirección a partir de scanlines.
+    
+    Args:
+        crack_mask: Máscara de grietas detectadas
+        scale_val: Escala (px/m)
+        image_hash: Clave de identidad de la imagen/ROI
+        min_crack_length_px: Parámetro de detección (parte de la clave de caché)
+    """
+    if scale_val <= 0:
+        return
+    with st.expander("📏 Scanlines virtuales (frecuencia y RQD por dirección)"):
+        import pandas as pd
+        
+        rows = _scanlines(image_hash, min_crack_length_px, float(scale_val), crack_mask)
+        df = pd.DataFrame(rows).set_index("angle_deg")
+        axial = df.loc[0.0] if 0.0 in df.index else df.iloc[0]
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Frecuencia a 0° (1/m)", f"{axial['frequency_per_m']:.2f}")
+        col2.metric("RQD a 0° (piezas ≥ 10 cm)", f"{axial['rqd_percent']:.1f} %")
+        col3.metric(
+            "Dirección de máx. frecuencia",
+            f"{df['frequency_per_m'].idxmax():.0f}°",
+        )
+        st.line_chart(df[["frequency_per_m"]].rename(columns={"frequency_per_m": "Frecuencia (1/m)"}))
+        st.caption(
+            "Ángulos desde el eje horizontal de la imagen (antihorario). "
+            "Incluye todas las grietas detectadas (las exclusiones manuales no se aplican)."
+        )
+        st.dataframe(df.round(3), use_container_width=True)
+
+
+def _mapas_intensidad(
+    crack_mask: np.ndarray,
+    crack_info: list,
+    scale_val: float,
+    image_hash: str,
+    min_crack_length_px: int,
+):
+    """Tablas integrales P21/P20 de la sesión, por imagen, detección y escala.
+    
+    Se guardan como artefacto derivado en la memoria de la sesión (sin copias
+    por pickle y dentro de su presupuesto); las exclusiones se restan al
+    consultar, sin reconstruir las tablas.
+    """
+    from src.core.session_memory import get_session_memory
+    from src.intensity import build_intensity_maps
+    
+    memory = get_session_memory()
+    tag = (image_hash, int(min_crack_length_px), float(scale_val))
+    maps = memory.get("mapas_intensidad", tag=tag)
+    if maps is None:
+        maps = memory.put(
+            "mapas_intensidad",
+            build_intensity_maps(crack_mask, crack_info, scale_px_per_m=scale_val),
+            tag=tag,
+        )
+    return maps
+
+
+def _mostrar_intensidad(
+    image: np.ndarray,
+    crack_mask: np.ndarray,
+    crack_info: list,
+    excluded_ids: list,
+    scale_val: float,
+    image_hash: str,
+    min_crack_length_px: int,
+) -> None:
+    """
+    Muestra los mapas de intensidad P21 (m/m²) y P20 (1/m²) como heatmap.
+    
+    Args:
+        image: Imagen analizada
+        crack_mask: Máscara de grietas detectadas
+        crack_info: Información de las grietas
+        excluded_ids: Grietas excluidas (no cuentan en P21 ni en P20)
+        scale_val: Escala (px/m)
+        image_hash: Clave de identidad de la imagen/ROI
+        min_crack_length_px: Parámetro de detección (parte de la clave de caché)
+    """
+    if scale_val <= 0 or not crack_info:
+        return
+    with st.expander("🌡️ Mapas de intensidad (P21 / P20)"):
+        # El cuerpo de un expander se ejecuta aunque esté cerrado: las tablas
+        # sólo se construyen cuando el usuario pide el panel.
+        if not st.checkbox("Calcular mapas de intensidad", key="intensidad_activar"):
+            return
+        from src import intensity
+        
+        maps = _mapas_intensidad(
+            crack_mask, crack_info, float(scale_val), image_hash, min_crack_length_px
+        )
+        col1, col2, col3 = st.columns(3)
+        medida = col1.radio("Medida", ["P21 (m/m²)", "P20 (1/m²)"], key="intensidad_medida")
+        modo = col2.radio("Modo", ["Celdas", "Ventana deslizante"], key="intensidad_modo")
+        lado_m = col3.number_input(
+            "Tamaño de celda/ventana (m)",
+            min_value=1.0 / scale_val,
+            value=max(0.1, 1.0 / scale_val),
+            step=0.05,
+            format="%.3f",
+            key="intensidad_lado",
+        )
+        lado_px = max(1, int(round(lado_m * scale_val)))
+        grid = (
+            maps.grid(lado_px, excluded_ids=excluded_ids)
+            if modo == "Celdas"
+            else maps.window(lado_px, excluded_ids=excluded_ids)
+        )
+        clave = "p21" if medida.startswith("P21") else "p20"
+        st.image(
+            intensity.heatmap_overlay(
+                image, grid[clave], cell_px=lado_px if modo == "Celdas" else None
+            ),
+            caption=f"{medida} · {grid[clave].shape[0]}×{grid[clave].shape[1]} celdas de {lado_px} px",
+            use_container_width=True,
+        )
+        totales = maps.totals(excluded_ids=excluded_ids)
+        col1, col2, col3 = st.columns(3)
+        col1.metric("P21 global (m/m²)", f"{totales['p21']:.3f}")
+        col2.metric("P20 global (1/m²)", f"{totales['p20']:.3f}")
+        col3.metric(f"{medida.split()[0]} máx. local", f"{np.nanmax(grid[clave]):.3f}")
+        if modo == "Celdas":
+            st.download_button(
+                label="💾 Descargar grilla P21/P20 (.npz)",
+                data=intensity.export_npz(grid, cell_px=lado_px, scale_px_per_m=scale_val),
+                file_name=f"intensidad_{image_identity.short_hash(image_hash)}_{lado_px}px.npz",
+                mime="application/octet-stream",
+            )
+
+
+def _mostrar_polilineas(
+    crack_mask: np.ndarray,
+    crack_info: list,
+    scale_val: float,
+    image_hash: str,
+    min_crack_length_px: int,
+) -> None:
+    """
+    Vectoriza los esqueletos en polilíneas y ofrece su descarga (.npz).
+    
+    Args:
+        crack_mask: Máscara de grietas detectadas
+        crack_info: Información de las grietas
+        scale_val: Escala (px/m) para la tolerancia en metros
+        image_hash: Clave de identidad de la imagen/ROI
+        min_crack_length_px: Parámetro de detección (parte de la clave de caché)
+    """
+    if scale_val <= 0 or not crack_info:
+        return
+    with st.expander("✏️ Polilíneas (vectorización)"):
+        tolerancia_m = st.number_input(
+            "Tolerancia de simplificación (m)",
+            min_value=0.0,
+            value=max(0.005, 1.0 / scale_val),
+            step=0.001,
+            format="%.4f",
+            key="polilineas_tolerancia",
+        )
+        lineas = analysis.vectorize_cracks(
+            crack_mask,
+            crack_info,
+            image_hash=image_hash,
+            min_length_px=min_crack_length_px,
+            tolerance_px=tolerancia_m * scale_val,
+        )
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Polilíneas", len(lineas))
+        col2.metric("Vértices", lineas.coords.shape[0])
+        col3.metric(
+            "Tamaño (KB)",
+            f"{lineas.nbytes / 1024:.0f}",
+            delta=f"máscara {crack_mask.size / 8 / 1024:.0f} KB (1 bit/px)",
+            delta_color="off",
+        )
+        st.image(lineas.render(thickness=2), caption="Polilíneas simplificadas", use_container_width=True)
+        st.download_button(
+            label="💾 Descargar polilíneas (.npz)",
+            data=lineas.to_npz(),
+            file_name=f"polilineas_{image_identity.short_hash(image_hash)}.npz",
+            mime="application/octet-stream",
+        )
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _familias(
+    image_hash: str,
+    min_crack_length_px: int,
+    excluded_ids: tuple,
+    scale_val: float,
+    max_sets: int,
+    concentracion: float,
+    _overlay,  # noqa: ANN001
+):
+    """Familias de juntas e histograma de rosa cacheados por imagen, exclusiones y parámetros.
+    
+    Returns:
+        (JointSetResult, histograma) o None si no hay grietas con orientación
+    """
+    from src import joint_sets
+    
+    orient = np.array(
+        [np.nan if c.get("orientation_deg") is None else c["orientation_deg"] for c in _overlay.crack_info],
+        dtype=np.float64,
+    )
+    usar = np.isfinite(orient)
+    usar[_overlay.rows(excluded_ids)] = False
+    if not usar.any():
+        return None
+    resultado = joint_sets.cluster_joint_sets(
+        orient[usar],
+        _overlay.lengths_px[usar],
+        centroids=_overlay.index.centroids[usar],
+        scale_px_per_m=scale_val if scale_val > 0 else None,
+        max_sets=max_sets,
+        concentration=concentracion,
+    )
+    hist = joint_sets.rose_histogram(orient[usar], _overlay.lengths_px[usar], labels=resultado.labels)
+    return resultado, hist
+
+
+def _mostrar_familias(
+    overlay,  # noqa: ANN001
+    scale_val: float,
+    image_hash: str,
+    min_crack_length_px: int,
+) -> Optional[float]:
+    """
+    Agrupa las grietas incluidas en familias de juntas y dibuja el diagrama de rosa.
+    
+    El agrupamiento se cachea por conjunto de exclusiones: sólo se recalcula
+    cuando cambian las grietas excluidas o los parámetros.
+    
+    Args:
+        overlay: Overlay anotado (grietas, exclusiones y centroides)
+        scale_val: Escala (px/m); el espaciado se informa en m si es > 0
+        image_hash: Clave de identidad de la imagen/ROI
+        min_crack_length_px: Parámetro de detección (parte de la clave de caché)
+        
+    Returns:
+        Jn sugerido o None si no hay grietas con orientación
+    """
+    if not overlay.valid_count:
+        return None
+    from src import joint_sets
+    
+    with st.expander("🧭 Familias de juntas (orientación)"):
+        col1, col2 = st.columns(2)
+        max_sets = col1.slider("Máximo de familias", 1, 4, 4, key="familias_max")
+        concentracion = col2.slider(
+            "Concentración mínima (R̄)", 0.5, 0.99, 0.85, 0.01, key="familias_r"
+        )
+        familias = _familias(
+            image_hash,
+            min_crack_length_px,
+            tuple(overlay.excluded_ids),
+            float(scale_val),
+            max_sets,
+            concentracion,
+            overlay,
+        )
+        if familias is None:
+            st.info("No hay grietas incluidas con orientación.")
+            return None
+        resultado, hist = familias
+        col1, col2 = st.columns([1, 2])
+        col1.image(
+            joint_sets.render_rose(hist, mean_deg=resultado.mean_deg),
+            caption="Rosa ponderada por longitud (gris: aleatorias)",
+            use_container_width=True,
+        )
+        jn_sugerido = resultado.jn()
+        col2.metric("Familias", resultado.n_sets)
+        col2.metric("Juntas aleatorias (% longitud)", f"{100 * resultado.random_fraction:.1f}")
+        col2.metric("Jn sugerido", f"{jn_sugerido:g}")
+        if resultado.n_sets:
+            st.dataframe(resultado.as_rows(), use_container_width=True)
+    return jn_sugerido
+
+
+def _mostrar_q_system(rqd: float, jn_sugerido: Optional[float] = None) -> Optional[float]:
     """
     Muestra los controles para el cálculo del Q-System.
     
     Args:
         rqd: Valor RQD calculado
+        jn_sugerido: Jn estimado a partir de las familias de juntas (opcional)
         
     Returns:
         Valor Q calculado o None si hay error
@@ -311,9 +1105,16 @@ def _mostrar_q_system(rqd: float) -> Optional[float]:
         rqd_input = st.number_input(
             "RQD (%)", min_value=0.0, max_value=100.0, value=rqd, key="rqd_input"
         )
+        if jn_sugerido is not None:
+            st.button(
+                f"Usar Jn sugerido por las familias detectadas ({jn_sugerido:g})",
+                key="usar_jn",
+                on_click=lambda: st.session_state.update(jn=float(jn_sugerido)),
+            )
+        st.session_state.setdefault("jn", 9.0)  # el botón de Jn sugerido escribe en esta clave
         jn = st.number_input(
             "Jn – Número de familias de juntas (Joint set number)",
-            min_value=0.1, max_value=20.0, value=9.0, key="jn"
+            min_value=0.1, max_value=20.0, key="jn"
         )
         jr = st.number_input(
             "Jr – Rugosidad de la junta (Joint roughness)",
@@ -337,6 +1138,12 @@ def _mostrar_q_system(rqd: float) -> Optional[float]:
             st.markdown(f"**Q = {q_val}**")
         except ValueError:
             st.error("Todos los factores deben ser positivos y mayores a cero.")
+        else:
+            panel_incertidumbre(
+                "q_system",
+                {"rqd_percent": rqd_input, "jn": jn, "jr": jr, "ja": ja, "jw": jw, "srf": srf},
+                key="q",
+            )
     
     return q_val
 
@@ -388,5 +1195,12 @@ def _mostrar_fragmentacion_kuz_ram() -> Optional[float]:
             st.markdown(f"**Tamaño medio Xm = {xm_val} cm**")
         except ValueError:
             st.error("Todos los parámetros deben ser mayores a cero.")
+        else:
+            panel_incertidumbre(
+                "kuz_ram",
+                {"A": A_val, "V": V_val, "Q_mass": Q_mass, "RWS": RWS_val},
+                key="kuz_ram",
+                unidad="cm",
+            )
     
     return xm_val
@@ -0,0 +1,90 @@
+"""Panel opcional de incertidumbre (Monte Carlo) para las métricas geotécnicas."""
+
+from typing import Dict
+
+import streamlit as st
+
+from src import uncertainty
+
+_PERCENTILES = (10, 50, 90)
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _propagar(model: str, spec: tuple, n_samples: int) -> dict:
+    """Ejecuta la propagación; ``spec`` = ((nombre, tipo, bajo, modo, alto), ...)."""
+    inputs = {}
+    for name, kind, low, mode, high in spec:
+        if kind == "Uniforme":
+            inputs[name] = uncertainty.Uniform(low, high)
+        elif kind == "Triangular":
+            inputs[name] = uncertainty.Triangular(low, mode, high)
+        else:
+            inputs[name] = mode
+    result = uncertainty.propagate(
+        model, inputs, n_samples=n_samples, percentiles=_PERCENTILES, seed=0
+    )
+    return {"summary": result.as_dict(), "histogram": result.histogram}
+
+
+def panel_incertidumbre(
+    model: str,
+    valores: Dict[str, float],
+    *,
+    key: str,
+    unidad: str = "",
+) -> None:
+    """
+    Muestra controles de rango por entrada y el resultado Monte Carlo.
+
+    Args:
+        model: Modelo de :data:`src.uncertainty.MODELS`.
+        valores: Valor puntual de cada entrada (modo de la distribución).
+        key: Prefijo único para las claves de los widgets.
+        unidad: Unidad de la salida para las etiquetas.
+    """
+    if not st.checkbox("Propagar incertidumbre (Monte Carlo)", key=f"{key}_mc"):
+        return
+
+    import numpy as np
+    import pandas as pd
+
+    kind = st.radio(
+        "Distribución de las entradas",
+        ["Triangular", "Uniforme"],
+        horizontal=True,
+        key=f"{key}_mc_dist",
+    )
+    st.caption("Variación relativa (±%) alrededor del valor ingresado; 0 = valor fijo.")
+    spec = []
+    cols = st.columns(min(len(valores), 3))
+    for i, (name, value) in enumerate(valores.items()):
+        pct = cols[i % len(cols)].number_input(
+            f"± % {name}", min_value=0.0, max_value=90.0, value=0.0, step=5.0,
+            key=f"{key}_mc_{name}",
+        )
+        delta = abs(value) * pct / 100.0
+        spec.append((name, kind if pct > 0 else "Fijo", value - delta, value, value + delta))
+    n_samples = st.select_slider(
+        "Muestras", options=[10_000, 100_000, 1_000_000], value=100_000, key=f"{key}_mc_n"
+    )
+
+    result = _propagar(model, tuple(spec), n_samples)
+    summary = result["summary"]
+    cols = st.columns(len(_PERCENTILES))
+    for col, p in zip(cols, _PERCENTILES):
+        col.metric(f"P{p}", f"{summary['percentiles'][f'P{p}']:.3f} {unidad}".strip())
+    if summary["n_invalid"]:
+        st.caption(f"Muestras inválidas descartadas: {summary['n_invalid']}")
+
+    counts, edges = result["histogram"]
+    if counts.size:
+        st.bar_chart(
+            pd.DataFrame(
+                {"Frecuencia": counts},
+                index=pd.Index(np.round((edges[:-1] + edges[1:]) / 2, 3), name=model),
+            )
+        )
+    sensitivity = {k: v for k, v in summary["sensitivity"].items() if v > 0}
+    if sensitivity:
+        st.markdown("**Sensibilidad (índice de Sobol de primer orden)**")
+        st.bar_chart(pd.Series(sensitivity, name="S1"))
@@ -0,0 +1,327 @@
+"""Propagación de incertidumbre por Monte Carlo sobre las fórmulas de ``metrics``.
+
+Los factores del Q-System (Jn, Jr, Ja, SRF...) o de Kuz–Ram (A, RWS) son
+estimaciones con rango, no valores puntuales. :func:`propagate` muestrea cada
+entrada según su distribución, evalúa la versión vectorizada de la fórmula
+(``metrics.*_batch``) por bloques y devuelve percentiles e índices de
+sensibilidad de primer orden (Sobol, estimados por binning:
+``Var(E[Y|X_i]) / Var(Y)``).
+
+La memoria no depende de ``n_samples``: cada bloque se reduce a estadísticos
+acumulables y se descarta. Media y varianza se combinan por bloques (fórmula
+de Chan et al.); los percentiles y el histograma salen de un histograma fino
+(:class:`_StreamingHistogram`) cuyo rango se duplica al llegar valores fuera
+de él, de modo que el error de un percentil es menor que el ancho de un bin
+(``rango / quantile_bins``); las sumas por intervalo de cada entrada dan los
+índices de Sobol.
+
+Ejemplo::
+
+    from src import uncertainty as unc
+    res = unc.propagate(
+        "q_system",
+        {"rqd_percent": 65, "jn": unc.Triangular(6, 9, 12), "jr": unc.Uniform(1.5, 3),
+         "ja": 2.0, "jw": 1.0, "srf": unc.Uniform(1, 2.5)},
+    )
+    res.percentiles[50], res.sensitivity["jn"]
+"""
+from __future__ import annotations
+
+from typing import Callable, Dict, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from src import metrics
+
+__all__ = [
+    "Fixed",
+    "Uniform",
+    "Triangular",
+    "Normal",
+    "MODELS",
+    "UncertaintyResult",
+    "propagate",
+]
+
+
+class Fixed:
+    """Valor sin incertidumbre."""
+
+    def __init__(self, value: float):
+        self.value = float(value)
+
+    def sample(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        return np.full(n, self.value)
+
+    def __repr__(self) -> str:
+        return f"Fixed({self.value})"
+
+
+class Uniform:
+    """Distribución uniforme en ``[low, high]``."""
+
+    def __init__(self, low: float, high: float):
+        if high < low:
+            raise ValueError("Uniform: high debe ser ≥ low.")
+        self.low, self.high = float(low), float(high)
+
+    def sample(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        return rng.uniform(self.low, self.high, n)
+
+    def __repr__(self) -> str:
+        return f"Uniform({self.low}, {self.high})"
+
+
+class Triangular:
+    """Distribución triangular (mínimo, más probable, máximo)."""
+
+    def __init__(self, low: float, mode: float, high: float):
+        if not low <= mode <= high:
+            raise ValueError("Triangular: se requiere low ≤ mode ≤ high.")
+        self.low, self.mode, self.high = float(low), float(mode), float(high)
+
+    def sample(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        if self.low == self.high:
+            return np.full(n, self.low)
+        return rng.triangular(self.low, self.mode, self.high, n)
+
+    def __repr__(self) -> str:
+        return f"Triangular({self.low}, {self.mode}, {self.high})"
+
+
+class Normal:
+    """Distribución normal, opcionalmente truncada por recorte a ``[low, high]``."""
+
+    def __init__(
+        self,
+        mean: float,
+        std: float,
+        low: Optional[float] = None,
+        high: Optional[float] = None,
+    ):
+        if std < 0:
+            raise ValueError("Normal: std debe ser ≥ 0.")
+        self.mean, self.std = float(mean), float(std)
+        self.low, self.high = low, high
+
+    def sample(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        values = rng.normal(self.mean, self.std, n)
+        if self.low is not None or self.high is not None:
+            np.clip(values, self.low, self.high, out=values)
+        return values
+
+    def __repr__(self) -> str:
+        return f"Normal({self.mean}, {self.std}, low={self.low}, high={self.high})"
+
+
+class _StreamingHistogram:
+    """Histograma de ``n_bins`` bins iguales con rango ampliable por bloques.
+
+    Al llegar un valor fuera del rango, el ancho se duplica fusionando pares
+    de bins (exacto) y el rango se extiende hacia el lado necesario. Mínimo y
+    máximo se guardan exactos para acotar los percentiles.
+    """
+
+    def __init__(self, n_bins: int):
+        self.n_bins = n_bins + n_bins % 2
+        self.counts = np.zeros(self.n_bins, dtype=np.int64)
+        self.lo = self.width = None
+        self.min, self.max = np.inf, -np.inf
+
+    def _grow(self, low: bool) -> None:
+        half = self.n_bins // 2
+        merged = self.counts.reshape(half, 2).sum(axis=1)
+        self.counts = np.zeros_like(self.counts)
+        if low:
+            self.counts[half:] = merged
+            self.lo -= self.n_bins * self.width
+        else:
+            self.counts[:half] = merged
+        self.width *= 2.0
+
+    def add(self, values: np.ndarray) -> None:
+        if not values.size:
+            return
+        vmin, vmax = float(values.min()), float(values.max())
+        self.min, self.max = min(self.min, vmin), max(self.max, vmax)
+        if self.lo is None:
+            self.lo = vmin
+            self.width = (vmax - vmin) / self.n_bins or max(abs(vmin), 1.0) * 1e-9
+        while vmin < self.lo:
+            self._grow(low=True)
+        while vmax >= self.lo + self.n_bins * self.width:
+            self._grow(low=False)
+        idx = np.minimum(((values - self.lo) / self.width).astype(np.int64), self.n_bins - 1)
+        self.counts += np.bincount(idx, minlength=self.n_bins)
+
+    def percentiles(self, q: Sequence[float]) -> np.ndarray:
+        """Percentiles (interpolación lineal de rango, como ``np.percentile``) dentro de cada bin."""
+        total = int(self.counts.sum())
+        cum = np.cumsum(self.counts)
+        rank = np.asarray(q, dtype=np.float64) / 100.0 * (total - 1)
+        b = np.searchsorted(cum, rank, side="right")
+        before = np.where(b > 0, cum[np.maximum(b - 1, 0)], 0)
+        inside = (rank - before + 0.5) / self.counts[b]
+        return np.clip(self.lo + self.width * (b + inside), self.min, self.max)
+
+    def coarse(self, n_bins: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Histograma de ``n_bins`` entre el mínimo y el máximo (cada bin fino va al de su centro)."""
+        edges = np.linspace(self.min, self.max, n_bins + 1)
+        centers = self.lo + self.width * (np.arange(self.n_bins) + 0.5)
+        idx = np.clip(np.searchsorted(edges, centers, side="right") - 1, 0, n_bins - 1)
+        return np.bincount(idx, weights=self.counts, minlength=n_bins).astype(np.int64), edges
+
+
+Distribution = Union[Fixed, Uniform, Triangular, Normal]
+
+# Modelo -> (función vectorizada, nombres de entrada en orden)
+MODELS: Dict[str, Tuple[Callable[..., Tuple[np.ndarray, np.ndarray]], Tuple[str, ...]]] = {
+    "q_system": (metrics.q_system_batch, ("rqd_percent", "jn", "jr", "ja", "jw", "srf")),
+    "gsi": (metrics.gsi_from_rmr_batch, ("rmr_total",)),
+    "kuz_ram": (metrics.kuz_ram_batch, ("A", "V", "Q_mass", "RWS")),
+    "blast_lk": (metrics.blast_lk_batch, ("fe", "S", "B", "c", "E")),
+    "rqd": (metrics.rqd_from_frequency_batch, ("frequency",)),
+}
+
+
+class UncertaintyResult:
+    """Resumen de una propagación Monte Carlo."""
+
+    def __init__(
+        self,
+        model: str,
+        n_samples: int,
+        n_invalid: int,
+        mean: float,
+        std: float,
+        percentiles: Dict[float, float],
+        sensitivity: Dict[str, float],
+        histogram: Tuple[np.ndarray, np.ndarray],
+    ):
+        self.model = model
+        self.n_samples = n_samples
+        self.n_invalid = n_invalid
+        self.mean = mean
+        self.std = std
+        self.percentiles = percentiles
+        self.sensitivity = sensitivity
+        self.histogram = histogram  # (conteos, bordes)
+
+    @property
+    def invalid_fraction(self) -> float:
+        return self.n_invalid / self.n_samples if self.n_samples else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "model": self.model,
+            "n_samples": self.n_samples,
+            "n_invalid": self.n_invalid,
+            "mean": self.mean,
+            "std": self.std,
+            "percentiles": {f"P{p:g}": v for p, v in self.percentiles.items()},
+            "sensitivity": dict(self.sensitivity),
+        }
+
+
+def _as_distribution(value) -> Distribution:  # noqa: ANN001
+    return value if hasattr(value, "sample") else Fixed(value)
+
+
+def propagate(
+    model: str,
+    inputs: Mapping[str, Union[Distribution, float]],
+    *,
+    n_samples: int = 1_000_000,
+    chunk_size: int = 1 << 17,
+    percentiles: Sequence[float] = (5, 10, 50, 90, 95),
+    sensitivity_bins: int = 32,
+    histogram_bins: int = 40,
+    quantile_bins: int = 1 << 14,
+    seed: Optional[int] = None,
+) -> UncertaintyResult:
+    """
+    Propaga la incertidumbre de ``inputs`` a través de la fórmula ``model``.
+
+    Args:
+        model: Clave de :data:`MODELS` (``"q_system"``, ``"gsi"``, ``"kuz_ram"``...).
+        inputs: Distribución (o valor fijo) por cada entrada del modelo.
+        n_samples: Número total de muestras.
+        chunk_size: Muestras por bloque (acota la memoria).
+        percentiles: Percentiles a reportar.
+        sensitivity_bins: Intervalos por entrada para estimar ``E[Y|X_i]``.
+        histogram_bins: Intervalos del histograma de la salida.
+        quantile_bins: Bins del histograma fino del que salen los percentiles.
+        seed: Semilla para resultados reproducibles.
+
+    Returns:
+        UncertaintyResult con percentiles, media, desviación e índices de
+        sensibilidad de primer orden (las muestras inválidas se descartan).
+    """
+    if model not in MODELS:
+        raise ValueError(f"Modelo desconocido: {model}")
+    func, names = MODELS[model]
+    missing = set(names) - set(inputs)
+    if missing:
+        raise ValueError(f"Faltan entradas para {model}: {sorted(missing)}")
+    dists = {name: _as_distribution(inputs[name]) for name in names}
+    uncertain = [n for n in names if not isinstance(dists[n], Fixed)]
+    rng = np.random.default_rng(seed)
+
+    n_valid, mean, m2 = 0, 0.0, 0.0
+    hist = _StreamingHistogram(quantile_bins)
+    edges: Dict[str, np.ndarray] = {}
+    bin_count = {n: np.zeros(sensitivity_bins) for n in uncertain}
+    bin_sum = {n: np.zeros(sensitivity_bins) for n in uncertain}
+
+    for start in range(0, n_samples, chunk_size):
+        n = min(chunk_size, n_samples - start)
+        draws = {name: dist.sample(rng, n) for name, dist in dists.items()}
+        values, invalid = func(*(draws[name] for name in names))
+        ok = ~invalid & np.isfinite(values)
+        y = values[ok]
+        if y.size:
+            # Combinación de media y suma de cuadrados centrada por bloques
+            chunk_mean = float(y.mean())
+            chunk_m2 = float(np.square(y - chunk_mean).sum())
+            total = n_valid + y.size
+            delta = chunk_mean - mean
+            mean += delta * y.size / total
+            m2 += chunk_m2 + delta * delta * n_valid * y.size / total
+            n_valid = total
+            hist.add(y)
+        for name in uncertain:
+            x = draws[name]
+            if name not in edges:
+                # Bordes por cuantiles del primer bloque: intervalos equiprobables
+                edges[name] = np.quantile(x, np.linspace(0, 1, sensitivity_bins + 1)[1:-1])
+            idx = np.searchsorted(edges[name], x[ok], side="right")
+            bin_count[name] += np.bincount(idx, minlength=sensitivity_bins)
+            bin_sum[name] += np.bincount(idx, weights=y, minlength=sensitivity_bins)
+
+    if n_valid == 0:
+        nan = float("nan")
+        return UncertaintyResult(
+            model, n_samples, n_samples, nan, nan,
+            {p: nan for p in percentiles}, {n: nan for n in names},
+            (np.zeros(0), np.zeros(0)),
+        )
+
+    var = m2 / n_valid
+    sensitivity = {name: 0.0 for name in names}
+    for name in uncertain:
+        counts = bin_count[name]
+        used = counts > 0
+        cond_means = bin_sum[name][used] / counts[used]
+        between = float(np.sum(counts[used] * (cond_means - mean) ** 2) / n_valid)
+        sensitivity[name] = between / var if var > 0 else 0.0
+
+    return UncertaintyResult(
+        model=model,
+        n_samples=n_samples,
+        n_invalid=n_samples - n_valid,
+        mean=float(mean),
+        std=float(np.sqrt(var)),
+        percentiles=dict(zip(percentiles, map(float, hist.percentiles(percentiles)))),
+        sensitivity=sensitivity,
+        histogram=hist.coarse(histogram_bins),
+    )
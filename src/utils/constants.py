@@ -8,6 +8,7 @@ PAGE_CONFIG = {
 
 # Configuración de la aplicación
 APP_TITLE = "📷 Detector de Grietas Geotécnico"
+APP_VERSION = "2.1"
 
 # Configuración por defecto de parámetros
 DEFAULT_VALUES = {
@@ -71,3 +72,20 @@ MESSAGES = {
     "blast_error": "Verifique que c y E sean > 0.",
     "kuz_ram_error": "Todos los parámetros deben ser mayores a cero."
 }
+
+# Caché de resultados de análisis (memoria LRU + disco)
+CACHE_SETTINGS = {
+    "memory_mb": 256,
+    "disk_mb": 1024,
+    "disk_dir": ".cache/resultados",
+}
+
+# Presupuesto de memoria por sesión (imagen, ROI y resultados retenidos)
+SESSION_MEMORY_SETTINGS = {
+    "budget_mb": 512,
+}
+
+# Índice de fracturas por profundidad (sondajes)
+DEPTH_INDEX_SETTINGS = {
+    "path": ".cache/indice_profundidad.npz",
+}
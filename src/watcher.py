@@ -0,0 +1,208 @@
+"""Ingesta continua desde una carpeta vigilada (modo *daemon*).
+
+La cámara de la sala de testigos deja una fotografía cada pocos segundos en
+una carpeta compartida. :class:`FolderWatcher` sondea la carpeta, espera a que
+cada archivo deje de cambiar (tamaño y fecha estables durante ``debounce_s``)
+y lo encola en un pool acotado que ejecuta los análisis de grietas y de
+fragmentación. Cada resultado se anexa a un :class:`JsonlStore`; al reiniciar
+el daemon, los archivos ya registrados no se reprocesan.
+
+Uso::
+
+    python -m src.cli watch /mnt/testigos --store resultados.jsonl --scale 1000
+"""
+from __future__ import annotations
+
+import io
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.core.background import BackgroundExecutor, ExecutorBusy
+from src.core.jsonl_store import JsonlStore
+from src.utils.constants import ALLOWED_IMAGE_TYPES
+
+__all__ = ["FolderWatcher"]
+
+
+class FolderWatcher:
+    """
+    Vigila una carpeta y procesa cada imagen nueva una sola vez.
+
+    Args:
+        directory: Carpeta a vigilar.
+        store: Almacén de resultados (sólo anexado).
+        scale_px_per_m: Escala para convertir longitudes y diámetros.
+        min_length_px: Longitud mínima de grieta (px).
+        min_area_px: Área mínima de partícula (px).
+        analyses: Pipelines a ejecutar (``"cracks"``, ``"fragmentation"``).
+        debounce_s: Tiempo que un archivo debe permanecer sin cambios.
+        poll_interval_s: Intervalo entre sondeos de la carpeta.
+        workers: Hilos de análisis.
+        max_queue: Máximo de imágenes encoladas (el resto espera al siguiente sondeo).
+    """
+
+    def __init__(
+        self,
+        directory,  # noqa: ANN001
+        store: JsonlStore,
+        *,
+        scale_px_per_m: float = 1000.0,
+        min_length_px: int = 50,
+        min_area_px: int = 200,
+        analyses: Sequence[str] = ("cracks", "fragmentation"),
+        debounce_s: float = 2.0,
+        poll_interval_s: float = 1.0,
+        workers: int = 2,
+        max_queue: int = 64,
+    ):
+        self.directory = Path(directory)
+        self.store = store
+        self.scale_px_per_m = float(scale_px_per_m)
+        self.min_length_px = int(min_length_px)
+        self.min_area_px = int(min_area_px)
+        self.analyses = tuple(analyses)
+        self.debounce_s = debounce_s
+        self.poll_interval_s = poll_interval_s
+        self._executor = BackgroundExecutor(max_workers=workers, max_pending=max_queue)
+        self._suffixes = {f".{ext}" for ext in ALLOWED_IMAGE_TYPES}
+        # ruta -> (tamaño, mtime_ns, instante desde el que está estable)
+        self._candidates: Dict[Path, Tuple[int, int, float]] = {}
+        self._done = {r.get("key") for r in store}
+        self._in_flight: set = set()
+        self._lock = threading.Lock()
+        self._started_at = time.time()
+        self.processed = 0
+        self.failed = 0
+        self.queued = 0
+
+    # --- Sondeo -------------------------------------------------------------
+    def _key(self, path: Path, size: int, mtime_ns: int) -> str:
+        return f"{path.resolve()}|{size}|{mtime_ns}|{self.scale_px_per_m}|{self.min_length_px}|{self.min_area_px}"
+
+    def scan_once(self, now: Optional[float] = None) -> List[Path]:
+        """Sondea la carpeta una vez y encola los archivos estables; devuelve los encolados."""
+        now = time.time() if now is None else now
+        queued: List[Path] = []
+        present = set()
+        for path in sorted(self.directory.iterdir()):
+            if path.suffix.lower() not in self._suffixes or not path.is_file():
+                continue
+            present.add(path)
+            try:
+                stat = path.stat()
+            except OSError:
+                continue  # borrado o renombrado entre listado y stat
+            signature = (stat.st_size, stat.st_mtime_ns)
+            key = self._key(path, *signature)
+            with self._lock:
+                if key in self._done or key in self._in_flight:
+                    continue
+            previous = self._candidates.get(path)
+            if previous is None or previous[:2] != signature:
+                self._candidates[path] = (*signature, now)
+                continue
+            if stat.st_size == 0 or now - previous[2] < self.debounce_s:
+                continue
+            try:
+                self._executor.submit(key, self._process, path, key, label=path.name)
+            except ExecutorBusy:
+                break  # contrapresión: se reintenta en el próximo sondeo
+            with self._lock:
+                self._in_flight.add(key)
+                self.queued += 1
+            del self._candidates[path]
+            queued.append(path)
+        # Olvidar candidatos que desaparecieron
+        for path in list(self._candidates):
+            if path not in present:
+                del self._candidates[path]
+        return queued
+
+    def run(self, stop_event: Optional[threading.Event] = None) -> None:
+        """Bucle de sondeo hasta que se active ``stop_event`` (o Ctrl+C)."""
+        stop_event = stop_event or threading.Event()
+        try:
+            while not stop_event.is_set():
+                self.scan_once()
+                stop_event.wait(self.poll_interval_s)
+        except KeyboardInterrupt:
+            pass
+
+    def drain(self, timeout: float = 60.0) -> bool:
+        """Espera a que terminen los trabajos encolados; ``False`` si vence el plazo."""
+        deadline = time.time() + timeout
+        while self._executor.pending:
+            if time.time() > deadline:
+                return False
+            time.sleep(0.02)
+        return True
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    # --- Procesamiento ------------------------------------------------------
+    def _process(self, path: Path, key: str, *, progress) -> None:  # noqa: ANN001
+        from src import export, image_io
+        from src.cli import crack_summary
+        from src.core import analysis, image_identity
+
+        record: dict = {"key": key, "path": str(path), "processed_at": export.utc_timestamp()}
+        try:
+            # Una sola decodificación; el hash de los bytes es la clave de la
+            # caché de resultados, así que un archivo re-depositado es un acierto.
+            data = path.read_bytes()
+            image = image_io.load_image(io.BytesIO(data))
+            image_hash = image_identity.hash_bytes(data)
+            record["image_hash"] = image_hash
+            if "cracks" in self.analyses:
+                progress("Grietas", 0.0)
+                _, _, crack_info = analysis.detect_cracks(
+                    image, image_hash=image_hash, min_length_px=self.min_length_px
+                )
+                record["cracks"], record["crack_rows"] = crack_summary(
+                    image,
+                    crack_info,
+                    image_hash=image_hash,
+                    path=path,
+                    task={
+                        "scale_px_per_m": self.scale_px_per_m,
+                        "min_length_px": self.min_length_px,
+                        "min_length_filter_m": 0.0,
+                    },
+                )
+            if "fragmentation" in self.analyses:
+                progress("Fragmentación", 0.5)
+                diameters_m, _ = analysis.particle_sizes(
+                    image,
+                    image_hash=image_hash,
+                    scale_px_per_meter=self.scale_px_per_m,
+                    min_area_px=self.min_area_px,
+                )
+                record["fragmentation"] = export.fragmentation_summary(diameters_m)
+        except Exception as exc:  # noqa: BLE001 - el daemon no debe detenerse
+            record["error"] = repr(exc)
+        self.store.append(record)
+        with self._lock:
+            # Los fallos también quedan registrados: no se reintentan en bucle
+            self._in_flight.discard(key)
+            self._done.add(key)
+            if "error" in record:
+                self.failed += 1
+            else:
+                self.processed += 1
+
+    # --- Contadores ---------------------------------------------------------
+    def counters(self) -> Dict[str, float]:
+        """Contadores de rendimiento y profundidad de cola."""
+        elapsed = max(time.time() - self._started_at, 1e-9)
+        with self._lock:
+            return {
+                "queued": self.queued,
+                "processed": self.processed,
+                "failed": self.failed,
+                "queue_depth": self._executor.pending,
+                "waiting_debounce": len(self._candidates),
+                "throughput_per_min": round(60.0 * self.processed / elapsed, 2),
+            }
@@ -0,0 +1,68 @@
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from src.core.background import BackgroundExecutor, ExecutorBusy
+
+
+def test_job_reports_progress_and_result():
+    executor = BackgroundExecutor(max_workers=1)
+    release = threading.Event()
+
+    def analysis(value, *, progress):
+        progress("Bordes", 0.5)
+        release.wait(5)
+        return value * 2
+
+    job = executor.submit("img:1", analysis, 21, label="test")
+    # Bloqueado en la etapa intermedia
+    for _ in range(100):
+        if job.stage == "Bordes":
+            break
+        threading.Event().wait(0.01)
+    assert job.stage == "Bordes" and job.fraction == 0.5
+    assert not job.done()
+
+    release.set()
+    assert job.result(timeout=5) == 42
+    assert job.done() and job.error() is None
+    executor.shutdown()
+
+
+def test_pending_limit():
+    executor = BackgroundExecutor(max_workers=1, max_pending=1)
+    release = threading.Event()
+    job = executor.submit("a", lambda *, progress: release.wait(5))
+    with pytest.raises(ExecutorBusy):
+        executor.submit("b", lambda *, progress: None)
+    release.set()
+    job.result(timeout=5)
+    executor.shutdown()
+
+
+def test_cancel_libera_la_plaza_pendiente():
+    executor = BackgroundExecutor(max_workers=1, max_pending=2)
+    started, release = threading.Event(), threading.Event()
+
+    def blocking(*, progress):
+        started.set()
+        release.wait(5)
+
+    running = executor.submit("a", blocking)
+    assert started.wait(5)
+    queued = executor.submit("b", lambda *, progress: "b")
+    assert executor.pending == 2
+
+    assert executor.cancel(queued)
+    assert not executor.cancel(queued)  # una segunda cancelación no descuenta
+    assert executor.pending == 1
+    assert not executor.cancel(running)  # en ejecución: no se interrumpe
+    executor.submit("c", lambda *, progress: "c")  # la plaza quedó libre
+
+    release.set()
+    running.result(timeout=5)
+    executor.shutdown()
+    assert executor.pending == 0
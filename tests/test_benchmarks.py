@@ -0,0 +1,52 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from benchmarks import synthetic
+from benchmarks.run import BASELINE_PATH, baseline_sizes, compare, merge_baseline, run_benchmarks
+from src import crack_detection, fragmentation
+
+
+def test_generador_de_grietas_con_verdad_conocida():
+    image, truth = synthetic.fracture_image(0.3, seed=1)
+    assert image.shape == (*synthetic.image_shape(0.3), 3)
+    assert truth["length_px"].size == 12 and np.all(truth["orientation_deg"] < 180)
+    _, _, info = crack_detection.detect_cracks(image, min_length_px=10)
+    detected = sum(c["length_geodesic_px"] for c in info)
+    assert detected == pytest.approx(truth["length_px"].sum(), rel=0.1)
+
+
+def test_generador_de_pila_con_distribucion_conocida():
+    image, truth = synthetic.muck_pile_image(0.3, seed=1)
+    diameters, _ = fragmentation.particle_sizes(image, scale_px_per_meter=1.0, min_area_px=50)
+    assert len(diameters) == truth["diameter_px"].size
+    assert np.median(diameters) == pytest.approx(np.median(truth["diameter_px"]), rel=0.05)
+
+
+def test_comparacion_con_linea_base():
+    baseline = {"results": {"a@1MP": {"seconds": 1.0}, "b@1MP": {"seconds": 0.01}}}
+    current = {"results": {"a@1MP": {"seconds": 1.6}, "b@1MP": {"seconds": 0.03}, "c@1MP": {"seconds": 9}}}
+    assert [r["case"] for r in compare(current, baseline, tolerance=0.5)] == ["a@1MP"]
+    assert compare(current, baseline, tolerance=0.7) == []
+
+    # La línea base incluye 20 MP; actualizar un tamaño conserva los demás
+    stored = json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+    assert baseline_sizes(stored) == [1.0, 5.0, 20.0]
+    update = {"environment": {}, "results": {"a@100MP": {"megapixels": 100, "seconds": 9.0}}}
+    merged = merge_baseline(update, stored)
+    assert list(merged["results"])[:-1] == list(stored["results"]) and baseline_sizes(merged)[-1] == 100.0
+
+
+@pytest.mark.skipif(
+    os.environ.get("FF_BENCHMARK") != "1",
+    reason="Benchmark completo desactivado (FF_BENCHMARK=1 para ejecutarlo)",
+)
+def test_regresion_contra_linea_base():
+    results = run_benchmarks([1], repeat=3, log=lambda _: None)
+    assert compare(results, json.loads(BASELINE_PATH.read_text(encoding="utf-8"))) == []
@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src import blast_optimizer as bo  # noqa: E402
+
+GRID = dict(spacing_m=np.linspace(2, 6, 9), burden_m=np.linspace(1.5, 5, 8), charge_kg=np.linspace(5, 200, 12))
+
+
+def test_pareto_front_matches_brute_force_and_is_chunk_independent():
+    small = bo.optimize_blast(**GRID, hole_diameter_mm=165, chunk_size=37)
+    whole = bo.optimize_blast(**GRID, hole_diameter_mm=165)
+    assert small.pareto_rows() == whole.pareto_rows()
+    assert small.evaluated == 9 * 8 * 12 * len(bo.DEFAULT_EXPLOSIVES)
+
+    front = np.array([(r["K"], r["Xm"]) for r in whole.pareto_rows()])
+    everything = bo.optimize_blast(**GRID, hole_diameter_mm=165, top_k=10**6)
+    points = np.array([(r["K"], r["Xm"]) for r in everything.top_rows()])
+    for k, xm in front:
+        dominated = (points[:, 0] <= k) & (points[:, 1] <= xm) & ((points[:, 0] < k) | (points[:, 1] < xm))
+        assert not dominated.any()
+    assert np.all(np.diff(front[:, 0]) > 0) and np.all(np.diff(front[:, 1]) < 0)
+
+
+def test_top_candidates_meet_target_p80_sorted_by_specific_charge():
+    res = bo.optimize_blast(**GRID, target_p80_cm=2.0, uniformity=1.2, top_k=5, chunk_size=100)
+    rows = res.top_rows()
+    assert 0 < len(rows) <= 5
+    assert all(r["P80"] <= 2.0 for r in rows)
+    assert [r["K"] for r in rows] == sorted(r["K"] for r in rows)
+    best = rows[0]
+    assert bo.rosin_rammler_passing([best["P80"]], best["Xm"], best["n"])[0] == pytest.approx(80.0)
+    assert bo.rosin_rammler_passing([best["Xm"]], best["Xm"], best["n"])[0] == pytest.approx(50.0)
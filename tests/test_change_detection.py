@@ -0,0 +1,61 @@
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.change_detection import diff_polylines, register_images
+from src.polylines import CrackPolylines
+
+
+def _polylines(lines, ids):
+    coords = np.array([p for line in lines for p in line], dtype=np.int32)
+    offsets = np.cumsum([0] + [len(line) for line in lines])
+    return CrackPolylines(coords, offsets, np.arange(len(lines)), np.array(ids), (600, 800), 0.0)
+
+
+def test_registro_recupera_la_transformacion():
+    rng = np.random.default_rng(0)
+    texture = cv2.GaussianBlur(rng.normal(0, 1, (480, 640)).astype(np.float32), (0, 0), 4)
+    before = cv2.cvtColor((128 + 30 * texture / texture.std()).clip(0, 255).astype(np.uint8), cv2.COLOR_GRAY2RGB)
+    m = cv2.getRotationMatrix2D((320, 240), 1.5, 1.0)
+    m[:, 2] += (12, -7)
+    after = cv2.warpAffine(before, m, (640, 480), borderMode=cv2.BORDER_REFLECT)
+    reg = register_images(after, before, proxy_px=640, refine_px=640)
+    expected = cv2.transform(np.float32([[[100, 100], [500, 400]]]), m)[0]
+    np.testing.assert_allclose(reg.transform([[100, 100], [500, 400]]), expected, atol=0.5)
+
+
+def test_nuevas_extendidas_y_cerradas():
+    before = _polylines(
+        [[(100, 100), (300, 100)], [(100, 300), (200, 300)], [(500, 500), (700, 500)]], [1, 2, 3]
+    )
+    # 1 sin cambio (desplazada 2 px), 2 extendida 80 px, 3 cerrada, 9 nueva
+    after = _polylines(
+        [[(100, 102), (300, 102)], [(100, 300), (280, 300)], [(400, 50), (400, 250)]], [4, 5, 9]
+    )
+    diff = diff_polylines(before, after, tolerance_px=5, min_extension_px=20, scale_px_per_m=100.0)
+    by_after = {r["crack_after"]: r for r in diff["rows"]}
+    assert by_after[4]["status"] == "sin cambio" and by_after[4]["cracks_before"] == "1"
+    assert by_after[5]["status"] == "extendida"
+    assert abs(by_after[5]["extension_m"] - 0.8) < 0.05 and abs(by_after[5]["delta_m"] - 0.8) < 1e-6
+    assert by_after[9]["status"] == "nueva" and by_after[9]["length_after_m"] == 2.0
+    closed = [r for r in diff["rows"] if r["status"] == "cerrada"]
+    assert [r["cracks_before"] for r in closed] == ["3"]
+    assert diff["summary"]["nueva"] == 1 and diff["summary"]["cerrada"] == 1
+
+
+def test_diferencia_en_el_marco_registrado():
+    before = _polylines([[(100, 100), (300, 100)]], [1])
+    after = _polylines([[(130, 90), (330, 90)]], [2])
+
+    class Shift:
+        @staticmethod
+        def transform(points):
+            return np.asarray(points, dtype=np.float64) + (30, -10)
+
+    assert diff_polylines(before, after)["summary"]["sin cambio"] == 0
+    diff = diff_polylines(before, after, registration=Shift())
+    assert [r["status"] for r in diff["rows"]] == ["sin cambio"]
@@ -0,0 +1,48 @@
+import csv
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from src.cli import main
+from src.core.jsonl_store import JsonlStore
+from src.export import CRACK_COLUMNS
+
+
+def _write_core_photo(path, n_lines):
+    img = np.full((200, 400, 3), 210, dtype=np.uint8)
+    for k in range(n_lines):
+        x = 40 + 80 * k
+        cv2.line(img, (x, 10), (x + 20, 190), (20, 20, 20), 2)
+    cv2.imwrite(str(path), img)
+
+
+def test_batch_folder_with_manifest_scale_and_resume(tmp_path):
+    images = tmp_path / "fotos"
+    images.mkdir()
+    _write_core_photo(images / "a.png", 2)
+    _write_core_photo(images / "b.png", 4)
+    manifest = tmp_path / "manifest.csv"
+    manifest.write_text("path,scale_px_per_m\nfotos/a.png,2000\nfotos/b.png,\n")
+
+    output = tmp_path / "grietas.csv"
+    summary = tmp_path / "resumen.csv"
+    assert main(["batch", str(manifest), "-o", str(output), "--summary", str(summary)]) == 0
+
+    with output.open() as fh:
+        reader = csv.DictReader(fh)
+        assert reader.fieldnames == CRACK_COLUMNS
+        rows = list(reader)
+    assert rows and {r["scale_px_per_m"] for r in rows} == {"2000.0", "1000.0"}
+
+    with summary.open() as fh:
+        per_image = {Path(r["image_path"]).name: r for r in csv.DictReader(fh)}
+    assert int(per_image["b.png"]["crack_count"]) > int(per_image["a.png"]["crack_count"])
+
+    # Reanudar: no se reprocesa nada y el checkpoint no crece
+    checkpoint = JsonlStore(tmp_path / "grietas.csv.checkpoint.jsonl")
+    assert len(checkpoint) == 2
+    assert main(["batch", str(manifest), "-o", str(output)]) == 0
+    assert len(checkpoint) == 2
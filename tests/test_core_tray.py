@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.core_tray import analyze_core_tray, detect_core_rows
+
+
+def _tray(rows=4, row_h=60, gap=20, width=600, seed=0):
+    """Bandeja sintética: filas texturadas separadas por divisores lisos."""
+    rng = np.random.default_rng(seed)
+    h = gap + rows * (row_h + gap)
+    img = np.full((h, width + 40, 3), 200, dtype=np.uint8)
+    for r in range(rows):
+        top = gap + r * (row_h + gap)
+        img[top:top + row_h, 20:20 + width] = rng.integers(90, 150, (row_h, width, 1), dtype=np.uint8)
+        # Una fractura vertical oscura por fila
+        x = 20 + width // 2
+        img[top:top + row_h, x:x + 3] = 0
+    return img
+
+
+def test_detect_core_rows_finds_rows_and_channel_extent():
+    img = _tray()
+    rows = detect_core_rows(img)
+    assert [r["row"] for r in rows] == [1, 2, 3, 4]
+    for i, r in enumerate(rows):
+        top = 20 + i * 80
+        assert abs(r["top"] - top) <= 1 and abs(r["bottom"] - (top + 60)) <= 1
+        assert abs(r["left"] - 20) <= 1 and abs(r["right"] - 620) <= 1
+
+
+def test_detect_core_rows_expected_rows_keeps_tallest():
+    rows = detect_core_rows(_tray(rows=5), expected_rows=3)
+    assert len(rows) == 3
+
+
+def test_analyze_core_tray_chains_depths():
+    out = analyze_core_tray(_tray(), scale_px_per_m=200.0, from_m=10.0, min_length_px=20)
+    log = out["log"]
+    assert len(log) == 4
+    assert log[0]["from_m"] == 10.0
+    for prev, cur in zip(log, log[1:]):
+        assert cur["from_m"] == prev["to_m"]
+    assert out["total"]["to_m"] == log[-1]["to_m"]
+    assert abs(out["total"]["length_m"] - sum(r["length_m"] for r in log)) < 1e-6
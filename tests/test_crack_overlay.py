@@ -0,0 +1,79 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src import image_io
+from src.crack_overlay import CrackOverlay
+
+
+def _scene():
+    image = np.full((120, 200, 3), 180, dtype=np.uint8)
+    mask = np.zeros((120, 200), dtype=bool)
+    mask[10:60, 20] = True
+    mask[30, 100:180] = True
+    mask[80:110, 150] = True
+    info = [
+        {"id": 5, "centroid": (20, 35), "bbox": (20, 10, 1, 50), "area": 50, "length_px": 50},
+        {"id": 9, "centroid": (140, 30), "bbox": (100, 30, 80, 1), "area": 80, "length_px": 80},
+        {"id": 12, "centroid": (150, 95), "bbox": (150, 80, 1, 30), "area": 30, "length_px": 30},
+    ]
+    return image, mask, info
+
+
+def test_initial_render_matches_full_overlay():
+    image, mask, info = _scene()
+    overlay = CrackOverlay(image, mask, info)
+    expected = image_io.annotate_cracks(image_io.overlay_mask(image, mask), info)
+    np.testing.assert_array_equal(overlay.image, expected)
+
+
+def test_toggle_repaints_only_locally_and_round_trips():
+    image, mask, info = _scene()
+    overlay = CrackOverlay(image, mask, info)
+    before = overlay.image.copy()
+    overlay.update([12])
+    changed = np.argwhere((overlay.image != before).any(axis=2))
+    assert changed[:, 0].min() >= 60  # la grieta 5 y la 9 no se tocan
+    overlay.update([])
+    np.testing.assert_array_equal(overlay.image, before)
+
+
+def test_running_length_stats():
+    image, mask, info = _scene()
+    overlay = CrackOverlay(image, mask, info)
+    overlay.update([9])
+    assert overlay.valid_count == 2
+    assert overlay.length_stats() == {"count": 2, "mean": 40.0, "median": 40.0, "max": 50.0}
+    assert overlay.length_stats(40)["count"] == 1
+    overlay.update([5, 9, 12])
+    assert overlay.length_stats() is None
+
+
+def test_length_stats_match_brute_force_after_random_toggles():
+    rng = np.random.default_rng(3)
+    lengths = rng.integers(5, 60, size=40)
+    image = np.full((80, 40 * 12, 3), 180, dtype=np.uint8)
+    mask = np.zeros(image.shape[:2], dtype=bool)
+    info = []
+    for i, n in enumerate(lengths):
+        x = 6 + 12 * i
+        mask[10:10 + n, x] = True
+        info.append({"id": i + 1, "centroid": (x, 10), "bbox": (x, 10, 1, int(n)), "area": int(n), "length_px": int(n)})
+    overlay = CrackOverlay(image, mask, info)
+    for _ in range(30):
+        excluded = set(rng.choice(np.arange(1, 41), size=rng.integers(0, 40), replace=False).tolist())
+        overlay.update(excluded)
+        assert overlay.excluded_ids == sorted(excluded)
+        for min_len in (0, 20, 45):
+            kept = np.sort([n for i, n in enumerate(lengths) if i + 1 not in excluded and n >= min_len])
+            stats = overlay.length_stats(min_len)
+            if not kept.size:
+                assert stats is None
+                continue
+            assert stats["count"] == kept.size
+            np.testing.assert_allclose(
+                [stats["mean"], stats["median"], stats["max"]], [kept.mean(), np.median(kept), kept.max()]
+            )
@@ -0,0 +1,49 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.core.depth_index import DepthIndex
+
+
+def test_query_bins_frequency_and_rqd():
+    index = DepthIndex()
+    index.add_run("DDH-12", 0.0, 1.0, [0.25, 0.3, 0.8])
+    out = index.query("DDH-12", 0.0, 2.0, 0.5)
+    np.testing.assert_array_equal(out["fractures"], [2, 1, 0, 0])
+    np.testing.assert_allclose(out["logged_m"], [0.5, 0.5, 0.0, 0.0])
+    np.testing.assert_allclose(out["frequency_per_m"][:2], [4.0, 2.0])
+    # Piezas [0, .25) y [.3, .8) cuentan; [.25, .3) es menor a 10 cm
+    np.testing.assert_allclose(out["rqd_percent"][:2], [90.0, 100.0])
+    assert np.isnan(out["rqd_percent"][2:]).all()
+
+
+def test_overlapping_run_replaces_previous_fractures():
+    index = DepthIndex()
+    index.add_run("H", 0.0, 2.0, [0.5, 1.0, 1.5])
+    index.add_run("H", 0.8, 1.2, [0.9])
+    np.testing.assert_allclose(index.runs("H"), [[0.0, 0.8], [0.8, 1.2], [1.2, 2.0]])
+    assert index.query("H", 0.0, 2.0, 2.0)["fractures"].tolist() == [3]
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    index = DepthIndex(tmp_path / "indice.npz")
+    index.add_tray("DDH-1", {"log": [
+        {"from_m": 10.0, "to_m": 11.0, "fracture_depths_m": [10.4]},
+        {"from_m": 11.0, "to_m": 12.0, "fracture_depths_m": []},
+    ]})
+    index.save()
+    loaded = DepthIndex.load(tmp_path / "indice.npz")
+    assert loaded.holes == ["DDH-1"]
+    a, b = index.query("DDH-1", 10, 12, 0.5), loaded.query("DDH-1", 10, 12, 0.5)
+    np.testing.assert_allclose(a["rqd_percent"], b["rqd_percent"])
+    np.testing.assert_array_equal(a["fractures"], b["fractures"])
+
+
+def test_query_unknown_hole_returns_nan_bins():
+    out = DepthIndex().query("X", 0, 2, 0.5)
+    np.testing.assert_array_equal(out["fractures"], [0, 0, 0, 0])
+    np.testing.assert_allclose(out["logged_m"], 0.0)
+    assert np.isnan(out["frequency_per_m"]).all() and np.isnan(out["rqd_percent"]).all()
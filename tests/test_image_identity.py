@@ -0,0 +1,33 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from src.core.image_identity import hash_array, roi_hash, source_hash
+
+
+def test_hash_array_depends_on_content_and_layout():
+    img = np.zeros((20, 30, 3), dtype=np.uint8)
+    same = img.copy()
+    other = img.copy()
+    other[5, 5, 0] = 1
+
+    assert hash_array(img) == hash_array(same)
+    assert hash_array(img) != hash_array(other)
+    # Mismos bytes con otra forma no deben colisionar
+    assert hash_array(img) != hash_array(img.reshape(30, 20, 3))
+    # Vistas no contiguas se tratan igual que su copia contigua
+    assert hash_array(img[2:10, 3:12]) == hash_array(img[2:10, 3:12].copy())
+
+
+def test_roi_hash_and_source_hash(tmp_path):
+    path = tmp_path / "img.bin"
+    path.write_bytes(b"core-tray")
+
+    base = source_hash(path)
+    assert base == source_hash(b"core-tray")
+    assert roi_hash(base, None) == base
+    box_a = {"left": 0, "top": 0, "width": 10, "height": 10}
+    box_b = {"left": 1, "top": 0, "width": 10, "height": 10}
+    assert roi_hash(base, box_a) != roi_hash(base, box_b)
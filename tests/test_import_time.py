@@ -0,0 +1,60 @@
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+ROOT = Path(__file__).resolve().parents[1]
+HEAVY = (
+    "cv2",
+    "skimage",
+    "pandas",
+    "matplotlib",
+    "scipy",
+    "streamlit_cropper",
+    "streamlit_drawable_canvas",
+    "streamlit_image_coordinates",
+)
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def _importtime(statement):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    modules = {}
+    for self_us, cumulative_us, _, name in _LINE.findall(proc.stderr):
+        modules[name] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def test_app_startup_defers_heavy_imports():
+    pytest.importorskip("streamlit")
+    modules = _importtime("import app")
+    loaded = sorted({m.split(".")[0] for m in modules} & set(HEAVY))
+    assert loaded == [], f"Importados al inicio: {loaded}"
+
+    # Desglose por módulo propio (visible con pytest -s)
+    own = {n: c for n, (_, c) in modules.items() if n == "app" or n.startswith("src")}
+    for name, cumulative in sorted(own.items(), key=lambda kv: -kv[1]):
+        print(f"{cumulative / 1000:8.1f} ms  {name}")
+
+    app_ms = (modules["app"][1] - modules.get("streamlit", (0, 0))[1]) / 1000
+    budget_ms = float(os.environ.get("FF_IMPORT_BUDGET_MS", "500"))
+    assert app_ms < budget_ms, f"Importar app tomó {app_ms:.0f} ms (presupuesto {budget_ms:.0f} ms)"
+
+
+def test_tabs_module_is_light():
+    pytest.importorskip("streamlit")
+    modules = _importtime("import src.ui.tabs")
+    loaded = sorted({m.split(".")[0] for m in modules} & {"cv2", "skimage", "pandas", "matplotlib"})
+    assert loaded == []
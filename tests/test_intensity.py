@@ -0,0 +1,71 @@
+import io
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.intensity import build_intensity_maps, export_npz, heatmap_overlay
+
+
+def _mask():
+    mask = np.zeros((100, 200), dtype=bool)
+    mask[10:60, 20] = True  # 50 px de traza en la celda izquierda
+    mask[50, 150] = True  # grieta de un píxel en la celda derecha
+    return mask
+
+
+def _info():
+    return [
+        {"id": 1, "centroid": (20, 35), "bbox": (20, 10, 1, 50), "area": 50},
+        {"id": 2, "centroid": (150, 50), "bbox": (150, 50, 1, 1), "area": 1},
+    ]
+
+
+def _maps(**kwargs):
+    return build_intensity_maps(_mask(), _info(), scale_px_per_m=100.0, **kwargs)
+
+
+def test_grid_matches_brute_force():
+    grid = _maps().grid(100)
+    assert grid["p21"].shape == (1, 2)
+    # 0.5 m de traza en 1 m²
+    np.testing.assert_allclose(grid["p21"], [[0.5, 0.01]])
+    np.testing.assert_allclose(grid["p20"], [[1.0, 1.0]])
+
+
+def test_window_and_totals():
+    maps = _maps()
+    totals = maps.totals()
+    np.testing.assert_allclose([totals["p21"], totals["p20"]], [0.255, 1.0])
+    win = maps.window(40, 20)
+    assert win["p21"].shape == (5, 10)
+    assert np.nanmax(win["p21"]) > totals["p21"]
+
+
+def test_export_is_compact_float32():
+    data = np.load(io.BytesIO(export_npz(_maps().grid(10), cell_px=10, scale_px_per_m=100.0)))
+    assert data["p21"].dtype == np.float32 and data["p21"].shape == (10, 20)
+    assert int(data["cell_px"]) == 10
+
+
+def test_heatmap_overlay_keeps_image_shape():
+    grid = _maps().grid(30)
+    image = np.zeros((100, 200, 3), dtype=np.uint8)
+    assert heatmap_overlay(image, grid["p21"], cell_px=30).shape == image.shape
+
+
+def test_excluded_cracks_are_subtracted_without_rebuild():
+    maps = _maps()
+    grid = maps.grid(100, excluded_ids={2})
+    np.testing.assert_allclose(grid["p20"], [[1.0, 0.0]])
+    np.testing.assert_allclose(grid["p21"], [[0.5, 0.0]])
+    totals = maps.totals(excluded_ids=[1])
+    np.testing.assert_allclose([totals["p21"], totals["p20"]], [0.005, 0.5])
+    # Ventanas solapadas: igual que construir sin la grieta excluida
+    built = _maps(excluded_ids={1})
+    for key in ("p21", "p20"):
+        np.testing.assert_allclose(maps.window(40, 20, excluded_ids=[1])[key], built.window(40, 20)[key])
+    # Excluir otra vez una grieta ya excluida al construir no resta dos veces
+    np.testing.assert_allclose(built.totals(excluded_ids={1})["p21"], totals["p21"])
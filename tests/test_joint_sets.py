@@ -0,0 +1,47 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.joint_sets import cluster_joint_sets, render_rose, rose_histogram, suggest_jn
+
+
+def _familias(rng, n=3000):
+    # Dos familias (10° y 100°) con dispersión de 4° y 10 % de juntas aleatorias
+    a = rng.normal(10, 4, n)
+    b = rng.normal(100, 4, n)
+    r = rng.uniform(0, 180, n // 5)
+    orient = np.concatenate([a, b, r])
+    lengths = rng.uniform(20, 200, orient.size)
+    return orient, lengths
+
+
+def test_dos_familias_con_aleatorias():
+    rng = np.random.default_rng(0)
+    orient, lengths = _familias(rng)
+    res = cluster_joint_sets(orient, lengths, concentration=0.8)
+    assert res.n_sets == 2
+    np.testing.assert_allclose(np.sort(res.mean_deg), [10, 100], atol=1.5)
+    assert res.labels.shape == orient.shape
+    assert res.jn() == suggest_jn(2, res.random_fraction >= 0.1)
+
+
+def test_axial_y_espaciado():
+    # Familia horizontal cruzando 0°/180°: líneas cada 25 px en y
+    orient = np.array([179.0, 1.0, 178.5, 0.5, 180.5])
+    centroids = np.column_stack([np.full(5, 50.0), np.arange(5) * 25.0])
+    res = cluster_joint_sets(orient, centroids=centroids, scale_px_per_m=100.0)
+    assert res.n_sets == 1 and res.jn() == 2.0
+    assert min(res.mean_deg[0], 180 - res.mean_deg[0]) < 1.0
+    np.testing.assert_allclose(res.spacing, [0.25], atol=1e-3)
+
+
+def test_rosa_desde_conteos():
+    orient = np.array([5.0, 5.0, 95.0, 170.0])
+    hist = rose_histogram(orient, bins=18, labels=np.array([0, 0, 1, -1]))
+    assert hist.shape == (3, 18)
+    assert hist[0, 0] == 2 and hist[1, 9] == 1 and hist[2, 17] == 1
+    img = render_rose(hist, size=120, mean_deg=[5.0])
+    assert img.shape == (120, 120, 3) and (img != 255).any()
@@ -0,0 +1,76 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src import metrics  # noqa: E402
+
+
+def _scalar_or_nan(fn, *args, **kwargs):
+    try:
+        return fn(*args, **kwargs)
+    except ValueError:
+        return np.nan
+
+
+@pytest.mark.parametrize(
+    "batch, scalar, arity",
+    [
+        (metrics.rqd_from_frequency_batch, metrics.rqd_from_frequency, 1),
+        (metrics.gsi_from_rmr_batch, metrics.gsi_from_rmr, 1),
+        (metrics.q_system_batch, metrics.q_system, 6),
+        (metrics.blast_lk_batch, metrics.blast_lk, 5),
+        (metrics.kuz_ram_batch, metrics.kuz_ram, 4),
+    ],
+)
+def test_batch_matches_scalar(batch, scalar, arity):
+    rng = np.random.default_rng(arity)
+    args = [np.round(rng.uniform(-2, 60, 2000), rng.integers(0, 4)) for _ in range(arity)]
+    args[0][:4] = [0.125, 2.675, 1.005, 33.335]  # empates decimales
+    values, invalid = batch(*args)
+    expected = np.array([_scalar_or_nan(scalar, *map(float, row)) for row in zip(*args)])
+    assert np.array_equal(np.isnan(expected), invalid)
+    assert values[~invalid].tolist() == expected[~invalid].tolist()
+
+
+def test_crack_frequency_batch_broadcasts_and_masks():
+    counts = np.arange(0, 500)
+    values, invalid = metrics.crack_frequency_batch(counts, 1333, scale_px_per_meter=997.0)
+    assert values.tolist() == [
+        metrics.crack_frequency(int(c), 1333, scale_px_per_meter=997.0) for c in counts
+    ]
+    assert not invalid.any()
+
+    values, invalid = metrics.crack_frequency_batch([3, 3], [0, 100])
+    assert invalid.tolist() == [True, False]
+    assert np.isnan(values[0]) and values[1] == metrics.crack_frequency(3, 100)
+
+
+def test_rmr89_table_values_and_interpolation():
+    # Valores de tabla en el límite inferior de cada clase
+    assert metrics.rmr(100, 90, 2.0, "very_rough", "dry") == 12 + 20 + 20 + 30 + 15
+    assert metrics.rmr(0, 0, 0, "soft_gouge", "flowing") == 0 + 3 + 5 + 0 + 0
+    # Interpolación lineal entre clases y ajuste por orientación
+    assert metrics.rmr(75, 62.5, 0.4, 20, "wet", "fair") == 9.5 + 15 + 12.5 + 20 + 7 - 5
+    assert metrics.rmr(100, 90, 2.0, 30, 15, "very_unfavourable", application="slopes") == 37
+    assert metrics.joint_condition_rating(0.5, 0, "very_rough", "none", "unweathered") == 30
+    with pytest.raises(ValueError):
+        metrics.rmr(100, 120, 1.0, "very_rough")
+
+
+def test_rmr_batch_rates_interval_database():
+    rng = np.random.default_rng(0)
+    n = 1000
+    ucs, rqd, spacing = rng.uniform(0, 300, n), rng.uniform(0, 100, n), rng.uniform(0, 3, n)
+    joints = rng.choice(list(metrics.RMR_JOINT_CONDITION), n)
+    water = rng.choice(list(metrics.RMR_GROUNDWATER), n)
+    values, invalid = metrics.rmr_batch(ucs, rqd, spacing, joints, water, "fair")
+    assert not invalid.any()
+    expected = [metrics.rmr(*row, "fair") for row in zip(ucs, rqd, spacing, joints, water)]
+    assert values.tolist() == expected
+
+    values, invalid = metrics.rmr_batch(100, [50, 50], 1.0, ["very_rough", "bogus"])
+    assert invalid.tolist() == [False, True]
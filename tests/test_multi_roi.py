@@ -0,0 +1,74 @@
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src import crack_detection
+from src.core import analysis
+from src.core.result_cache import ResultCache
+from src.multi_roi import analyze_rois, clip_rois
+
+
+def _image():
+    rng = np.random.default_rng(3)
+    image = np.full((240, 360, 3), 200, dtype=np.uint8)
+    for _ in range(25):
+        x, y = int(rng.integers(20, 330)), int(rng.integers(20, 210))
+        a = rng.uniform(0, np.pi)
+        cv2.line(image, (x, y), (x + int(30 * np.cos(a)), y + int(30 * np.sin(a))), (0, 0, 0), 1)
+    return image
+
+
+def test_roi_completa_coincide_con_detect_cracks():
+    image = _image()
+    full = {"name": "todo", "left": 0, "top": 0, "width": 360, "height": 240}
+    result = analyze_rois(image, [full], scale_px_per_m=1000.0, min_length_px=20)
+    _, _, info = crack_detection.detect_cracks(image, min_length_px=20)
+    cracks = result["rois"][0]["cracks"]
+    assert [c["crack"] for c in cracks] == [c["id"] for c in info]
+    for roi_crack, crack in zip(cracks, info):
+        assert (roi_crack["centroid_x"], roi_crack["centroid_y"]) == crack["centroid"]
+        assert roi_crack["length_px"] == crack["length_px"]
+        assert roi_crack["length_geodesic_m"] == pytest.approx(crack["length_geodesic_px"] / 1000.0, abs=1e-4)
+        assert roi_crack["length_major_m"] == pytest.approx(crack["length_major_px"] / 1000.0, abs=1e-4)
+        assert roi_crack["orientation_deg"] == pytest.approx(crack["orientation_deg"], abs=0.05)
+
+
+def test_varias_rois_comparten_la_union():
+    image = _image()
+    rois = [
+        {"name": "izq", "left": 0, "top": 0, "width": 180, "height": 240},
+        {"name": "der", "left": 180, "top": 0, "width": 180, "height": 240},
+        {"name": "centro", "left": 100, "top": 60, "width": 400, "height": 120},  # se recorta
+    ]
+    result = analyze_rois(image, rois, scale_px_per_m=500.0, min_length_px=5)
+    assert result["union"] == {"left": 0, "top": 0, "width": 360, "height": 240}
+    assert [s["roi"] for s in result["summary"]] == ["izq", "der", "centro"]
+    assert result["summary"][2]["width"] == 260
+    izq, der = result["summary"][:2]
+    assert izq["crack_count"] > 0 and der["crack_count"] > 0
+    mean = np.mean([s["frequency_per_m"] for s in result["summary"]])
+    assert izq["frequency_vs_mean"] == pytest.approx(izq["frequency_per_m"] / mean, abs=1e-3)
+
+
+def test_rois_invalidas():
+    with pytest.raises(ValueError):
+        clip_rois([{"name": "a", "left": 0, "top": 0, "width": 5, "height": 5}] * 2, (10, 10))
+    with pytest.raises(ValueError):
+        clip_rois([{"name": "a", "left": 20, "top": 0, "width": 5, "height": 5}], (10, 10))
+
+
+def test_version_cacheada_por_rois():
+    image = _image()
+    cache = ResultCache()
+    rois = [{"name": "izq", "left": 0, "top": 0, "width": 180, "height": 240}]
+    kwargs = dict(image_hash="img", scale_px_per_m=500.0, min_length_px=5, cache=cache)
+    first = analysis.analyze_rois(image, rois=rois, **kwargs)
+    assert analysis.analyze_rois(image, rois=[dict(rois[0])], **kwargs) is first
+    otra = [{**rois[0], "width": 200}]
+    assert analysis.analyze_rois(image, rois=otra, **kwargs) is not first
+    assert cache.stats.memory_hits == 1 and cache.stats.misses == 2
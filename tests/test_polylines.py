@@ -0,0 +1,56 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.polylines import CrackPolylines, vectorize_cracks
+
+
+def _scene():
+    # Una grieta en "T" (bifurcación) y una diagonal en escalera
+    mask = np.zeros((100, 120), dtype=bool)
+    mask[20, 10:90] = True
+    mask[21:70, 50] = True
+    for i in range(40):
+        mask[60 + i // 2, 70 + i] = True
+    info = [
+        {"id": 3, "centroid": (50, 44), "bbox": (10, 20, 80, 50), "area": 129},
+        {"id": 7, "centroid": (89, 69), "bbox": (70, 60, 40, 20), "area": 40},
+    ]
+    return mask, info
+
+
+def test_longitud_sin_simplificar_es_geodesica():
+    mask, info = _scene()
+    lines = vectorize_cracks(mask, info, tolerance_px=0)
+    assert set(lines.crack_ids[lines.crack_row]) == {3, 7}
+    lengths = lines.lengths_px()
+    assert lengths[0] == 79 + 49  # brazos de la T (1 px por paso)
+    steps = np.diff(np.argwhere(mask[60:80, 70:110]), axis=0)
+    assert np.isclose(lengths[1], 39 + (np.sqrt(2) - 1) * np.sum(np.abs(steps).sum(axis=1) == 2))
+
+
+def test_simplificacion_compacta_y_orientacion():
+    mask, info = _scene()
+    lines = vectorize_cracks(mask, info, tolerance_m=0.01, scale_px_per_m=100.0)
+    assert len(lines) == 4  # tres brazos desde la bifurcación + la diagonal
+    assert lines.coords.shape[0] <= 9
+    orient = lines.orientations_deg()
+    assert abs(orient[1] - np.degrees(np.arctan2(1, 2))) < 2.0
+    rendered = lines.render() > 0
+    assert rendered[20, 30] and rendered[45, 50]
+
+
+def test_scanlines_y_npz():
+    mask, info = _scene()
+    lines = vectorize_cracks(mask, info, tolerance_px=1.0)
+    counts = lines.scanline_intersections([0, 90], line_spacing_px=10.0)
+    # Horizontales: brazo vertical (49 px) + diagonal (20 px de alto);
+    # verticales: brazo horizontal (80 px) + diagonal (40 px de ancho)
+    assert counts.tolist() == [5 + 2, 8 + 4]
+    again = CrackPolylines.from_npz(lines.to_npz())
+    np.testing.assert_array_equal(again.coords, lines.coords)
+    np.testing.assert_array_equal(again.offsets, lines.offsets)
+    assert again.shape == lines.shape
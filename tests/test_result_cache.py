@@ -0,0 +1,91 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from src.core.result_cache import ResultCache
+
+
+def test_memory_lru_spills_to_disk_and_counts(tmp_path):
+    cache = ResultCache(max_memory_bytes=1500, cache_dir=tmp_path, max_disk_bytes=10**6)
+    key_a = cache.make_key("detect_cracks", "abc", {"min_length_px": 50})
+    key_b = cache.make_key("detect_cracks", "abc", {"min_length_px": 60})
+    assert key_a != key_b
+
+    calls = []
+
+    def compute(seed):
+        calls.append(seed)
+        return np.full(1000, seed, dtype=np.uint8), [{"id": seed}]
+
+    arr_a, _ = cache.get_or_compute(key_a, lambda: compute(1))
+    cache.get_or_compute(key_b, lambda: compute(2))  # desaloja A de memoria
+    assert cache.stats.memory_evictions == 1
+    assert not arr_a.flags.writeable
+
+    arr_again, info = cache.get_or_compute(key_a, lambda: compute(99))
+    assert calls == [1, 2]
+    assert cache.stats.disk_hits == 1
+    assert np.array_equal(arr_again, arr_a) and info == [{"id": 1}]
+
+    # Un proceso nuevo reutiliza el nivel en disco
+    fresh = ResultCache(max_memory_bytes=1500, cache_dir=tmp_path)
+    found, _ = fresh.get(key_b)
+    assert found and fresh.stats.hit_rate == 1.0
+
+
+def test_disk_eviction_respects_budget(tmp_path):
+    cache = ResultCache(max_memory_bytes=0, cache_dir=tmp_path, max_disk_bytes=3000)
+    rng = np.random.default_rng(0)
+    for i in range(5):
+        cache.put(f"k{i}", rng.integers(0, 255, 1000, dtype=np.uint8))
+    assert cache.disk_bytes <= 3000
+    assert cache.stats.disk_evictions >= 2
+    assert cache.get("k4")[0] and not cache.get("k0")[0]
+
+
+def test_serialization_runs_outside_the_lock(tmp_path):
+    import threading
+
+    cache = ResultCache(cache_dir=tmp_path)
+    cache.put("otra", np.zeros(10))
+    seen = []
+
+    class Probe:
+        # Mientras se serializa, otro hilo debe poder leer la caché
+        def __reduce__(self):
+            reader = threading.Thread(target=lambda: seen.append(cache.get("otra")[0]))
+            reader.start()
+            reader.join(timeout=5)
+            return (list, ())
+
+    cache.put("grande", Probe())
+    assert seen == [True]
+    assert sorted(p.name for p in tmp_path.iterdir() if p.suffix == ".tmp") == []
+    assert ResultCache(cache_dir=tmp_path).get("grande") == (True, [])
+
+
+def test_disk_read_runs_outside_the_lock(tmp_path, monkeypatch):
+    import threading
+    import zlib
+
+    ResultCache(cache_dir=tmp_path).put("grande", np.arange(10))
+    cache = ResultCache(cache_dir=tmp_path)  # "grande" sólo está en disco
+    cache.put("otra", np.zeros(10))
+    seen = []
+    decompress = zlib.decompress
+
+    def probe(data):
+        # Mientras se lee del disco, otro hilo debe poder leer la caché
+        reader = threading.Thread(target=lambda: seen.append(cache.get("otra")[0]))
+        reader.start()
+        reader.join(timeout=5)
+        return decompress(data)
+
+    monkeypatch.setattr("src.core.result_cache.zlib.decompress", probe)
+    found, value = cache.get("grande")
+    assert seen == [True]
+    assert found and np.array_equal(value, np.arange(10))
+    assert cache.stats.disk_hits == 1 and cache.get("grande")[0]
+    assert cache.stats.memory_hits == 2
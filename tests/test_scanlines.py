@@ -0,0 +1,32 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.scanlines import scanline_survey  # noqa: E402
+
+
+def test_vertical_cracks_frequency_spacing_and_rqd():
+    mask = np.zeros((400, 1000), dtype=bool)
+    for x in (100, 250, 400, 700, 720):
+        mask[:, x] = True
+    survey = scanline_survey(mask, scale_px_per_m=1000, angles_deg=[0, 45, 90], line_spacing_px=10)
+    i0, i45, i90 = survey.at(0), survey.at(45), survey.at(180 - 90)
+
+    assert survey.frequency_per_m[i0] == pytest.approx(5.0)
+    assert survey.frequency_per_m[i45] == pytest.approx(5.0 * np.cos(np.pi / 4), rel=0.05)
+    assert survey.intersections[i90] == 0 and survey.rqd_percent[i90] == pytest.approx(100.0)
+    # Piezas de 0.10, 0.15, 0.15, 0.30, 0.02 y 0.28 m: sólo la de 2 cm no cuenta
+    assert survey.rqd_percent[i0] == pytest.approx(98.0)
+    assert sorted(set(np.round(survey.spacings_m[i0], 2))) == [0.02, 0.15, 0.3]
+
+
+def test_empty_mask_is_fully_intact():
+    survey = scanline_survey(np.zeros((50, 80), dtype=bool), scale_px_per_m=100, chunk_lines=7)
+    assert not survey.intersections.any()
+    # Las diagonales que recortan esquinas dejan piezas < 10 cm; los ejes no
+    assert survey.rqd_percent[survey.at(0)] == pytest.approx(100.0)
+    assert survey.rqd_percent[survey.at(90)] == pytest.approx(100.0)
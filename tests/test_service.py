@@ -0,0 +1,99 @@
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from src.core.result_cache import ResultCache
+from src.service import AnalysisService, make_server
+
+
+@pytest.fixture()
+def base_url():
+    service = AnalysisService(workers=2, cache=ResultCache(cache_dir=None))
+    server = make_server("127.0.0.1", 0, service)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    service.shutdown()
+
+
+def _request(url, data=None):
+    req = urllib.request.Request(url, data=data, method="POST" if data is not None else "GET")
+    with urllib.request.urlopen(req, timeout=10) as resp:
+        return resp.status, json.loads(resp.read())
+
+
+def _png_bytes():
+    img = np.full((240, 480, 3), 215, dtype=np.uint8)
+    for x in (60, 200, 340):
+        cv2.line(img, (x, 10), (x + 30, 230), (15, 15, 15), 2)
+    ok, buf = cv2.imencode(".png", img)
+    assert ok
+    return buf.tobytes()
+
+
+def test_submit_poll_and_reuse_cracks_job(base_url):
+    body = _png_bytes()
+    status, job = _request(f"{base_url}/jobs?analysis=cracks&scale_px_per_m=480", body)
+    assert status in (200, 202) and job["cached"] is False
+
+    deadline = time.time() + 20
+    while job["status"] != "done":
+        assert time.time() < deadline and job["status"] != "error", job
+        time.sleep(0.05)
+        _, job = _request(f"{base_url}/jobs/{job['job_id']}")
+
+    result = job["result"]
+    assert result["crack_count"] == 3
+    assert result["frequency_per_m"] == pytest.approx(3.0)
+    assert len(result["cracks"]) == 3
+
+    # Misma imagen y parámetros: se reutiliza el trabajo terminado
+    status, again = _request(f"{base_url}/jobs?analysis=cracks&scale_px_per_m=480", body)
+    assert status == 200 and again["cached"] and again["job_id"] == job["job_id"]
+
+
+def test_metrics_endpoint_and_errors(base_url):
+    payload = json.dumps({"rqd_percent": 90, "jn": 9, "jr": 2, "ja": 2, "jw": 1, "srf": 1}).encode()
+    status, body = _request(f"{base_url}/metrics/q_system", payload)
+    assert status == 200 and body["value"] == 0.1
+
+    with pytest.raises(urllib.error.HTTPError) as err:
+        _request(f"{base_url}/jobs?analysis=cracks", b"not an image")
+    assert err.value.code == 415
+
+    with pytest.raises(urllib.error.HTTPError) as err:
+        _request(f"{base_url}/jobs/unknown")
+    assert err.value.code == 404
+
+
+def test_bad_content_length_and_unexpected_errors_get_json(base_url, monkeypatch):
+    import http.client
+    from urllib.parse import urlparse
+
+    url = urlparse(base_url)
+    conn = http.client.HTTPConnection(url.hostname, url.port, timeout=10)
+    conn.putrequest("POST", "/jobs?analysis=cracks")
+    conn.putheader("Content-Length", "abc")
+    conn.endheaders()
+    resp = conn.getresponse()
+    assert resp.status == 400 and "error" in json.loads(resp.read())
+    conn.close()
+
+    def boom(self):
+        raise RuntimeError("fallo inesperado")
+
+    monkeypatch.setattr(AnalysisService, "health", boom)
+    with pytest.raises(urllib.error.HTTPError) as err:
+        _request(f"{base_url}/health")
+    assert err.value.code == 500 and "error" in json.loads(err.value.read())
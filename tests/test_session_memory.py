@@ -0,0 +1,40 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.core.session_memory import SessionMemory  # noqa: E402
+
+
+def _mb(n):
+    return np.zeros(n * 1024**2, dtype=np.uint8)
+
+
+def test_derived_artifacts_are_evicted_before_sources():
+    memory = SessionMemory(budget_bytes=5 * 1024**2)
+    memory.put("original", _mb(2), tag="img", derived=False)
+    memory.put("roi", _mb(1), tag="roi")
+    memory.put("grietas", _mb(1), tag=50)
+    memory.put("fragmentacion", _mb(2), tag=200)
+
+    assert "roi" not in memory  # derivado más antiguo
+    assert memory.get("original", tag="img") is not None
+    assert memory.used_bytes <= memory.budget_bytes
+    assert memory.evictions == 1
+
+    # La etiqueta distinta no devuelve el artefacto anterior
+    assert memory.get("grietas", tag=60) is None
+    assert memory.get("grietas") is not None
+
+    usage = memory.usage()
+    assert usage["source_bytes"] == 2 * 1024**2
+    assert set(usage["entries"]) == {"original", "grietas", "fragmentacion"}
+
+
+def test_sources_are_evicted_only_when_derived_are_gone():
+    memory = SessionMemory(budget_bytes=3 * 1024**2)
+    memory.put("original", _mb(2), tag="a", derived=False)
+    memory.put("original_b", _mb(2), tag="b", derived=False)
+    assert "original" not in memory and "original_b" in memory
@@ -0,0 +1,24 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+pytest.importorskip("streamlit")
+pytest.importorskip("pandas")
+
+from src.core.image_identity import hash_array  # noqa: E402
+from src.ui.scale_calibration import _size_distribution  # noqa: E402
+
+
+def test_size_distribution_counts_and_passing_curve():
+    diameters = np.array([1.0, 2.0, 2.5, 4.0, 9.0, 10.0])
+    histogram, passing = _size_distribution(hash_array(diameters), diameters, bins=3)
+    assert histogram["Frecuencia"].tolist() == [3, 1, 2]
+    assert passing["Pasante acumulado (%)"].iloc[-1] == pytest.approx(100.0)
+    assert np.all(np.diff(passing["Pasante acumulado (%)"].to_numpy()) >= 0)
+    # Mismo hash: se devuelve el resultado en caché
+    again, _ = _size_distribution(hash_array(diameters), diameters.copy(), bins=3)
+    assert again.equals(histogram)
@@ -0,0 +1,43 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.spatial_index import build_crack_index, points_in_polygon
+
+
+def _cracks():
+    mask = np.zeros((120, 200), dtype=bool)
+    mask[10:60, 20] = True
+    mask[30, 100:180] = True
+    mask[80:110, 150] = True
+    info = [
+        {"id": 5, "centroid": (20, 35), "bbox": (20, 10, 1, 50), "area": 50},
+        {"id": 9, "centroid": (140, 30), "bbox": (100, 30, 80, 1), "area": 80},
+        {"id": 12, "centroid": (150, 95), "bbox": (150, 80, 1, 30), "area": 30},
+    ]
+    return mask, info
+
+
+def test_pick_returns_nearest_skeleton_crack():
+    index = build_crack_index(*_cracks(), cell_px=16)
+    assert index.pick(22, 40) == 5
+    assert index.pick(120, 33) == 9
+    assert index.pick(80, 100) is None
+
+
+def test_lasso_and_rectangle_selection():
+    index = build_crack_index(*_cracks(), cell_px=16)
+    assert sorted(index.in_polygon([(0, 0), (160, 0), (160, 60), (0, 60)])) == [5, 9]
+    assert index.ids[index.in_rect(140, 80, 199, 119)].tolist() == [12]
+    assert points_in_polygon(np.array([[1.0, 1.0], [5.0, 5.0]]), [(0, 0), (2, 0), (2, 2), (0, 2)]).tolist() == [True, False]
+
+
+def test_nearest_and_spacing():
+    index = build_crack_index(*_cracks())
+    assert index.nearest(150, 90)[0][0] == 12
+    spacing = index.neighbour_spacing()
+    np.testing.assert_allclose(spacing[1], np.hypot(10, 65))
+    np.testing.assert_allclose(index.neighbour_spacing(12), [np.hypot(10, 65)])
@@ -0,0 +1,68 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src import metrics, uncertainty as unc  # noqa: E402
+
+
+def test_fixed_inputs_reproduce_scalar_formula():
+    res = unc.propagate("kuz_ram", {"A": 5, "V": 1000, "Q_mass": 100, "RWS": 2.3}, n_samples=1000)
+    assert res.percentiles[50] == metrics.kuz_ram(5, 1000, 100, 2.3)
+    assert res.std == 0.0 and all(v == 0.0 for v in res.sensitivity.values())
+
+
+def test_percentiles_and_sensitivity_in_chunks():
+    inputs = {"A": unc.Uniform(4, 8), "V": 1000, "Q_mass": 100, "RWS": unc.Uniform(2.2, 2.4)}
+    res = unc.propagate("kuz_ram", inputs, n_samples=200_000, chunk_size=30_000, seed=3)
+    xm_lo, xm_hi = metrics.kuz_ram(4, 1000, 100, 2.4), metrics.kuz_ram(8, 1000, 100, 2.2)
+    assert xm_lo <= res.percentiles[5] < res.percentiles[95] <= xm_hi
+    # A domina la varianza (Xm es lineal en A; RWS varía poco)
+    assert res.sensitivity["A"] > 0.9 > res.sensitivity["RWS"]
+    assert sum(res.sensitivity.values()) == pytest.approx(1.0, abs=0.05)
+
+
+def test_invalid_samples_are_discarded():
+    res = unc.propagate("gsi", {"rmr_total": unc.Normal(50, 10)}, n_samples=5000, seed=0)
+    assert res.n_invalid == 0
+    res = unc.propagate(
+        "q_system",
+        {"rqd_percent": 50, "jn": unc.Uniform(-1, 1), "jr": 1, "ja": 1, "jw": 1, "srf": 1},
+        n_samples=10_000,
+        seed=0,
+    )
+    assert 0.4 < res.invalid_fraction < 0.6
+    assert np.isfinite(res.mean)
+
+
+def test_streaming_statistics_match_exact_with_bounded_memory():
+    import tracemalloc
+
+    inputs = {"A": unc.Normal(6, 1.5, low=1), "V": 1000, "Q_mass": 100, "RWS": unc.Uniform(2.2, 2.4)}
+    res = unc.propagate("kuz_ram", inputs, n_samples=50_000, chunk_size=7_000, seed=5)
+    # Referencia exacta con el mismo flujo de números aleatorios
+    rng = np.random.default_rng(5)
+    ys = []
+    for start in range(0, 50_000, 7_000):
+        n = min(7_000, 50_000 - start)
+        a, rws = unc.Normal(6, 1.5, low=1).sample(rng, n), unc.Uniform(2.2, 2.4).sample(rng, n)
+        values, invalid = metrics.kuz_ram_batch(a, np.full(n, 1000.0), np.full(n, 100.0), rws)
+        ys.append(values[~invalid])
+    y = np.concatenate(ys)
+    assert res.mean == pytest.approx(y.mean(), rel=1e-12) and res.std == pytest.approx(y.std(), rel=1e-9)
+    width = (y.max() - y.min()) / (1 << 13)
+    for p, value in res.percentiles.items():
+        assert abs(value - np.percentile(y, p)) <= width
+
+    def peak(n_samples):
+        tracemalloc.start()
+        unc.propagate("kuz_ram", inputs, n_samples=n_samples, chunk_size=10_000, seed=1)
+        value = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return value
+
+    # 10× más muestras no deben acercarse a los 8 MB que ocuparía el vector completo
+    assert peak(1_000_000) - peak(100_000) < 1_000_000
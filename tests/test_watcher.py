@@ -0,0 +1,75 @@
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from src.core.jsonl_store import JsonlStore
+from src.watcher import FolderWatcher
+
+
+def _png_bytes():
+    img = np.full((200, 300, 3), 210, dtype=np.uint8)
+    cv2.line(img, (20, 20), (280, 180), (10, 10, 10), 2)
+    cv2.rectangle(img, (40, 120), (90, 170), (30, 30, 30), -1)
+    return cv2.imencode(".png", img)[1].tobytes()
+
+
+def test_debounce_process_and_restart(tmp_path):
+    incoming = tmp_path / "incoming"
+    incoming.mkdir()
+    store = JsonlStore(tmp_path / "resultados.jsonl")
+    watcher = FolderWatcher(incoming, store, debounce_s=1.0, workers=1)
+
+    data = _png_bytes()
+    photo = incoming / "tray_001.png"
+    photo.write_bytes(data[: len(data) // 2])  # copia a medio escribir
+    assert watcher.scan_once(now=0.0) == []
+    photo.write_bytes(data)  # termina la copia
+    assert watcher.scan_once(now=0.5) == []  # cambió: reinicia el debounce
+    assert watcher.scan_once(now=1.0) == []  # estable pero aún dentro del debounce
+    assert watcher.scan_once(now=1.6) == [photo]
+    assert watcher.drain(timeout=30)
+
+    records = list(store)
+    assert len(records) == 1 and "error" not in records[0]
+    assert records[0]["cracks"]["crack_count"] >= 1
+    assert records[0]["fragmentation"]["particle_count"] >= 1
+    counters = watcher.counters()
+    assert counters["processed"] == 1 and counters["queue_depth"] == 0
+    watcher.shutdown()
+
+    # Un daemon reiniciado no reprocesa lo ya registrado
+    restarted = FolderWatcher(incoming, store, debounce_s=0.0, workers=1)
+    restarted.scan_once(now=10.0)
+    assert restarted.scan_once(now=11.0) == []
+    restarted.shutdown()
+
+
+def test_redropped_file_hits_result_cache(tmp_path, monkeypatch):
+    from src import crack_detection, fragmentation
+    from src.core.result_cache import ResultCache
+
+    cache = ResultCache()
+    monkeypatch.setattr("src.core.analysis.get_result_cache", lambda: cache)
+    calls = []
+    for module, name in ((crack_detection, "detect_cracks"), (fragmentation, "particle_sizes")):
+        original = getattr(module, name)
+        monkeypatch.setattr(
+            module, name, lambda *a, _f=original, _n=name, **k: calls.append(_n) or _f(*a, **k)
+        )
+
+    incoming = tmp_path / "incoming"
+    incoming.mkdir()
+    watcher = FolderWatcher(incoming, JsonlStore(tmp_path / "r.jsonl"), debounce_s=0.0, workers=1)
+    for name in ("a.png", "copia_de_a.png"):
+        (incoming / name).write_bytes(_png_bytes())
+        watcher.scan_once(now=0.0)
+        watcher.scan_once(now=1.0)
+        assert watcher.drain(timeout=30)
+    watcher.shutdown()
+    records = list(watcher.store)
+    assert len(records) == 2 and records[0]["image_hash"] == records[1]["image_hash"]
+    assert records[0]["cracks"]["crack_count"] == records[1]["cracks"]["crack_count"]
+    assert sorted(calls) == ["detect_cracks", "particle_sizes"]